@@ -0,0 +1,56 @@
+"""
+Throughput of the asyncio pipeline against a local Gemini stub.
+
+Runs 1, 10 and 50 SRS documents concurrently on a single event loop and
+reports wall-clock time and documents per second.
+
+    python -m benchmarks.bench_async_throughput --latency 0.2
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from loguru import logger
+from srs_generator import SRSAgentManager
+from benchmarks.stub_gemini import StubGeminiServer
+
+async def generate_many(manager, count, output_dir):
+    await asyncio.gather(*(
+        manager.generate_srs_async(
+            f"Project {index}: a task tracker with reminders and team sharing.",
+            "Benchmark",
+            os.path.join(output_dir, f"doc_{index}.docx")
+        )
+        for index in range(count)
+    ))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub response latency in seconds")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    args = parser.parse_args()
+
+    logger.disable("srs_generator")
+    with StubGeminiServer(latency=args.latency) as stub, tempfile.TemporaryDirectory() as workdir:
+        os.environ["GEMINI_API_BASE_URL"] = stub.base_url
+        os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+        # Measure the pipeline, not the quota
+        os.environ.setdefault("GEMINI_RPM", "1000000")
+        os.environ.setdefault("GEMINI_TPM", "1000000000")
+        # Every round sends the same prompts; measure generation, not the response cache
+        os.environ.setdefault("GEMINI_CACHE", "0")
+        os.chdir(workdir)
+        manager = SRSAgentManager(verbose=False)
+
+        print(f"stub latency {args.latency:.3f}s")
+        print(f"{'docs':>6} {'wall s':>8} {'docs/s':>8} {'requests':>9}")
+        for count in args.concurrency:
+            requests_before = stub.request_count
+            start = time.perf_counter()
+            asyncio.run(generate_many(manager, count, workdir))
+            elapsed = time.perf_counter() - start
+            print(f"{count:>6} {elapsed:>8.2f} {count / elapsed:>8.2f} {stub.request_count - requests_before:>9}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Round trips, prompt tokens and wall time of the default chain and of combined sections.
+
+Generates the same SRS documents with one call per section and with each group of
+sections requested in one call, on the offline fake backend. The fake's fixed
+per-call latency stands for connection setup, queueing and time to first token,
+which dominates for short descriptions.
+
+    python -m benchmarks.bench_combined_sections --documents 5 --latency 0.5
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from loguru import logger
+from srs_generator import SRSAgentManager
+from srs_generator.llm_backend import FakeBackend
+from srs_generator.run_context import RunContext
+
+DESCRIPTION = "Project {index}: a habit tracker with daily reminders and streaks."
+
+async def generate(manager, documents, workdir, combine_sections):
+    runs = [RunContext(f"combined_{combine_sections}_{index}") for index in range(documents)]
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        manager.generate_srs_async(
+            DESCRIPTION.format(index=index), "Benchmark",
+            os.path.join(workdir, f"srs_{combine_sections}_{index}.docx"), run=run,
+            combine_sections=combine_sections
+        )
+        for index, run in enumerate(runs)
+    ))
+    return runs, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--documents", type=int, default=5, help="Documents generated at the same time")
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake per-call overhead in seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=400, help="Fake generation speed")
+    parser.add_argument("--prefill", type=float, default=None, help="Fake prompt tokens processed per second")
+    args = parser.parse_args()
+
+    logger.disable("srs_generator")
+    backend = FakeBackend(
+        latency=args.latency, tokens_per_second=args.tokens_per_second, prefill_tokens_per_second=args.prefill
+    )
+    with tempfile.TemporaryDirectory() as workdir:
+        # Both modes must reach the backend
+        os.environ.setdefault("GEMINI_CACHE", "0")
+        os.chdir(workdir)
+        manager = SRSAgentManager(verbose=False, keep_checkpoints=False, backend=backend)
+        results = {mode: asyncio.run(generate(manager, args.documents, workdir, mode)) for mode in (False, True)}
+
+    print(f"{args.documents} documents, {args.latency:.2f}s per-call overhead")
+    print(f"{'mode':>10} {'calls/doc':>10} {'prompt tokens/doc':>18} {'wall s':>7} {'failed calls':>13}")
+    for mode, (runs, total) in results.items():
+        calls = sum(run.calls for run in runs) / len(runs)
+        prompt_tokens = sum(metric.prompt_tokens for run in runs for metric in run.metrics) / len(runs)
+        print(
+            f"{'combined' if mode else 'default':>10} {calls:>10.1f} {prompt_tokens:>18.0f} {total:>7.2f} "
+            f"{sum(run.failed_calls for run in runs):>13}"
+        )
+
+if __name__ == "__main__":
+    main()
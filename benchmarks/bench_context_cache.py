@@ -0,0 +1,82 @@
+"""
+Input tokens and wall-clock time of one SRS document with and without context caching.
+
+Generates a document from a long project description against a local Gemini stub
+that charges prefill time for every prompt token it has not cached. Reports the
+prompt tokens sent inline, the tokens served from context caches and the total
+time, in the default chained mode and in outline-first mode.
+
+    python -m benchmarks.bench_context_cache --words 6000 --prefill-ms 0.2
+"""
+import argparse
+import os
+import tempfile
+import time
+from loguru import logger
+from srs_generator import SRSAgentManager
+from srs_generator.run_context import RunContext
+from benchmarks.stub_gemini import StubGeminiServer
+
+FEATURES = (
+    "task lists", "reminders", "team sharing", "comments", "attachments", "calendar sync",
+    "offline mode", "push notifications", "reports", "audit log", "single sign-on", "billing",
+)
+
+def long_description(words):
+    """
+    A project description of roughly the given number of words
+    """
+    sentences = []
+    index = 0
+    while sum(len(sentence.split()) for sentence in sentences) < words:
+        feature = FEATURES[index % len(FEATURES)]
+        sentences.append(
+            f"Requirement {index + 1}: the {feature} module must let every user manage {feature} "
+            f"from the web and mobile apps, keep a history of changes and respect the workspace permissions."
+        )
+        index += 1
+    return "A task tracker for distributed teams. " + " ".join(sentences)
+
+def generate(manager, description, file_name, outline_first, context_caching):
+    run = RunContext()
+    start = time.perf_counter()
+    manager.generate_srs(
+        description, "Benchmark", file_name, run=run,
+        outline_first=outline_first, context_caching=context_caching
+    )
+    summary = run.summary()
+    inline = summary["prompt_tokens"] - summary["cached_tokens"]
+    return inline, summary["cached_tokens"], time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--words", type=int, default=6000, help="Length of the project description")
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub generation latency per reply in seconds")
+    parser.add_argument("--prefill-ms", type=float, default=0.2, help="Stub prefill time per uncached prompt token in ms")
+    args = parser.parse_args()
+
+    logger.disable("srs_generator")
+    description = long_description(args.words)
+    with StubGeminiServer(latency=args.latency, prefill_per_token=args.prefill_ms / 1000) as stub, \
+            tempfile.TemporaryDirectory() as workdir:
+        os.environ["GEMINI_API_BASE_URL"] = stub.base_url
+        os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+        os.environ.setdefault("GEMINI_RPM", "1000000")
+        os.environ.setdefault("GEMINI_TPM", "1000000000")
+        # Every run must reach the stub
+        os.environ.setdefault("GEMINI_CACHE", "0")
+        os.chdir(workdir)
+        manager = SRSAgentManager(verbose=False, keep_checkpoints=False)
+
+        print(f"description {args.words} words, stub prefill {args.prefill_ms}ms per uncached token")
+        print(f"{'mode':>14} {'caching':>8} {'inline tokens':>14} {'cached tokens':>14} {'total s':>8}")
+        for mode, outline_first in (("chained", False), ("outline-first", True)):
+            for context_caching in (False, True):
+                file_name = os.path.join(workdir, f"{mode}-{context_caching}.docx")
+                inline, cached, total = generate(manager, description, file_name, outline_first, context_caching)
+                label = "on" if context_caching else "off"
+                print(f"{mode:>14} {label:>8} {inline:>14} {cached:>14} {total:>8.2f}")
+        print(f"context caches left on the stub: {len(stub.cached_contents)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Prompt tokens and latency per agent with full upstream sections and with context digests.
+
+Generates one SRS document twice on the offline fake backend, whose replies are
+long structured sections and whose latency grows with the prompt (prefill) and
+the reply (generation). Reports prompt tokens and mean call latency per agent.
+
+    python -m benchmarks.bench_context_digest --section-tokens 1500
+"""
+import argparse
+import os
+import tempfile
+from loguru import logger
+from srs_generator import SRSAgentManager
+from srs_generator.llm_backend import FakeBackend
+from srs_generator.run_context import RunContext
+
+DESCRIPTION = "A task tracker with reminders, team sharing, a public API and a mobile app."
+
+def long_section(section_tokens):
+    """
+    reply(prompt) for FakeBackend: a section of about section_tokens tokens with
+    subsection headings, requirement ids, actors, interfaces and prose
+    """
+    def reply(prompt):
+        if "validator" in prompt:
+            return "VALID"
+        if "PlantUML" in prompt:
+            return "@startuml\nactor User\nUser -> System: Request\nSystem --> User: Response\n@enduml"
+        parts = []
+        index = 0
+        while len("\n\n".join(parts)) // 4 < section_tokens:
+            index += 1
+            parts.append(f"**3.{index} Feature {index}**")
+            parts.append(
+                f"The system shall support feature {index} for every workspace. It is used daily by team "
+                f"members and administrators, and its behaviour is described in detail below so that "
+                f"designers, testers and operators share one understanding of it."
+            )
+            parts.append("\n".join([
+                f"- FR-{index}.1: The user shall create and edit items of feature {index}.",
+                f"- FR-{index}.2: The system shall notify watchers within one minute of a change.",
+                f"- Actors: Team member, Administrator.",
+                f"- Interface: REST API endpoint /feature{index} over HTTPS.",
+            ]))
+        return "\n\n".join(parts)
+    return reply
+
+def generate(backend, workdir, digest_context):
+    manager = SRSAgentManager(verbose=False, keep_checkpoints=False, backend=backend, digest_context=digest_context)
+    run = RunContext()
+    manager.generate_srs(DESCRIPTION, "Benchmark", os.path.join(workdir, f"digest_{digest_context}.docx"), run=run)
+    return run.agent_metrics()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--section-tokens", type=int, default=1500, help="Length of each generated section")
+    parser.add_argument("--prefill", type=float, default=4000, help="Fake prompt tokens processed per second")
+    parser.add_argument("--tokens-per-second", type=float, default=2000, help="Fake generation speed")
+    args = parser.parse_args()
+
+    logger.disable("srs_generator")
+    backend = FakeBackend(
+        latency=0.05, tokens_per_second=args.tokens_per_second,
+        prefill_tokens_per_second=args.prefill, reply=long_section(args.section_tokens)
+    )
+    with tempfile.TemporaryDirectory() as workdir:
+        # Both runs must reach the backend
+        os.environ.setdefault("GEMINI_CACHE", "0")
+        os.chdir(workdir)
+        full = generate(backend, workdir, False)
+        digested = generate(backend, workdir, True)
+
+    print(f"sections of ~{args.section_tokens} tokens, prefill {args.prefill:.0f} tokens/s")
+    print(f"{'agent':>32} {'full tokens':>12} {'digest tokens':>14} {'full s':>7} {'digest s':>9}")
+    for agent in full:
+        before, after = full[agent], digested.get(agent, {})
+        print(
+            f"{agent:>32} {before['prompt_tokens']:>12} {after.get('prompt_tokens', 0):>14} "
+            f"{before['latency_seconds'] / before['calls']:>7.2f} "
+            f"{after.get('latency_seconds', 0) / max(1, after.get('calls', 0)):>9.2f}"
+        )
+
+if __name__ == "__main__":
+    main()
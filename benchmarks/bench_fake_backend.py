@@ -0,0 +1,77 @@
+"""
+Load test of the whole pipeline on the offline fake backend.
+
+Generates many SRS documents at once through SRSAgentManager with a FakeBackend
+that models first-token latency, generation speed, server capacity and injected
+failures. Needs no network, API key or stub server. Reports documents per second,
+calls, retries, failed calls and the latency percentiles of logical calls.
+
+    python -m benchmarks.bench_fake_backend --documents 20 --latency 0.3 --errors 503:0.1
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from loguru import logger
+from srs_generator import SRSAgentManager
+from srs_generator.llm_backend import FakeBackend
+from srs_generator.run_context import RunContext
+
+def parse_errors(value):
+    errors = {}
+    for item in filter(None, value.split(",")):
+        kind, probability = item.split(":")
+        errors[int(kind) if kind.isdigit() else kind] = float(probability)
+    return errors
+
+def percentile(values, percent):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, round(percent / 100 * (len(values) - 1)))]
+
+async def load_test(manager, documents, workdir):
+    runs = [RunContext() for _ in range(documents)]
+    start = time.perf_counter()
+    results = await asyncio.gather(*(
+        manager.generate_srs_async(
+            f"Project {index}: a task tracker with reminders and team sharing.", "Benchmark",
+            os.path.join(workdir, f"srs_{index}.docx"), run=run
+        )
+        for index, run in enumerate(runs)
+    ), return_exceptions=True)
+    return runs, results, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--documents", type=int, default=20, help="Documents generated at the same time")
+    parser.add_argument("--latency", type=float, default=0.3, help="Fake time to first token in seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=400, help="Fake generation speed")
+    parser.add_argument("--max-concurrency", type=int, default=None, help="Fake server capacity")
+    parser.add_argument("--errors", default="", help="Injected failures, e.g. 503:0.1,timeout:0.02")
+    args = parser.parse_args()
+
+    logger.disable("srs_generator")
+    backend = FakeBackend(
+        latency=args.latency, tokens_per_second=args.tokens_per_second,
+        max_concurrency=args.max_concurrency, errors=parse_errors(args.errors)
+    )
+    with tempfile.TemporaryDirectory() as workdir:
+        # Every document must reach the backend
+        os.environ.setdefault("GEMINI_CACHE", "0")
+        os.chdir(workdir)
+        manager = SRSAgentManager(verbose=False, keep_checkpoints=False, call_budget=200, backend=backend)
+        runs, results, total = asyncio.run(load_test(manager, args.documents, workdir))
+
+    failed_documents = sum(isinstance(result, Exception) for result in results)
+    latencies = [metric.latency for run in runs for metric in run.metrics]
+    print(f"{args.documents} documents in {total:.2f}s ({args.documents / total:.2f} documents/s), "
+          f"{failed_documents} failed")
+    print(f"calls {sum(run.calls for run in runs)}, retries {sum(run.retries for run in runs)}, "
+          f"failed calls {sum(run.failed_calls for run in runs)}, injected errors {backend.injected_errors}")
+    print(f"call latency p50 {percentile(latencies, 50):.2f}s p95 {percentile(latencies, 95):.2f}s "
+          f"max {max(latencies, default=0):.2f}s")
+
+if __name__ == "__main__":
+    main()
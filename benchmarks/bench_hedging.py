@@ -0,0 +1,95 @@
+"""
+Tail latency of LLM calls and documents with and without hedged requests.
+
+Generates the same documents against a local Gemini stub where a small fraction of
+requests is much slower than the rest, once without hedging and once with a
+HedgePolicy. Reports call and document latency percentiles, the calls that still took
+at least half the slow latency, and the extra requests the hedges cost.
+
+    python -m benchmarks.bench_hedging --documents 100 --slow-fraction 0.03 --slow-latency 2
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from loguru import logger
+from srs_generator import SRSAgentManager
+from srs_generator.hedging import HedgePolicy
+from srs_generator.run_context import RunContext
+from benchmarks.stub_gemini import StubGeminiServer
+
+def percentile(values, percent):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, round(percent / 100 * (len(values) - 1)))]
+
+async def generate(manager, documents, concurrency, workdir, label):
+    semaphore = asyncio.Semaphore(concurrency)
+    runs, durations = [], []
+
+    async def one(index):
+        async with semaphore:
+            run = RunContext(f"{label}_{index}")
+            started = time.perf_counter()
+            await manager.generate_srs_async(
+                f"Project {index}: a habit tracker with daily reminders and streaks.", "Benchmark",
+                os.path.join(workdir, f"{label}_{index}.docx"), run=run
+            )
+            durations.append(time.perf_counter() - started)
+            runs.append(run)
+
+    await asyncio.gather(*(one(index) for index in range(documents)))
+    return runs, durations
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--documents", type=int, default=60, help="Documents generated per mode")
+    parser.add_argument("--concurrency", type=int, default=10, help="Documents generated at the same time")
+    parser.add_argument("--latency", type=float, default=0.1, help="Usual stub latency in seconds")
+    parser.add_argument("--slow-fraction", type=float, default=0.03, help="Share of requests in the latency tail")
+    parser.add_argument("--slow-latency", type=float, default=2.0, help="Latency of the tail in seconds")
+    parser.add_argument("--percentile", type=float, default=95, help="Hedge after this latency percentile")
+    parser.add_argument("--max-ratio", type=float, default=0.1, help="Cap of hedged requests per request")
+    parser.add_argument("--min-samples", type=int, default=10, help="Latencies observed before hedging")
+    args = parser.parse_args()
+
+    logger.disable("srs_generator")
+    stub = StubGeminiServer(latency=args.latency, slow_fraction=args.slow_fraction, slow_latency=args.slow_latency)
+    with stub, tempfile.TemporaryDirectory() as workdir:
+        os.environ["GEMINI_API_BASE_URL"] = stub.base_url
+        os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+        # Measure the latency tail, not the quota or the response cache
+        os.environ.setdefault("GEMINI_RPM", "1000000")
+        os.environ.setdefault("GEMINI_TPM", "1000000000")
+        os.environ.setdefault("GEMINI_CACHE", "0")
+        os.chdir(workdir)
+
+        results = {}
+        for label, policy in (
+            ("plain", None),
+            ("hedged", HedgePolicy(args.percentile, args.max_ratio, min_samples=args.min_samples)),
+        ):
+            manager = SRSAgentManager(verbose=False, keep_checkpoints=False, hedge_policy=policy)
+            requests_before = stub.request_count
+            runs, durations = asyncio.run(generate(manager, args.documents, args.concurrency, workdir, label))
+            results[label] = (runs, durations, stub.request_count - requests_before)
+
+    print(f"{args.documents} documents, {args.slow_fraction:.0%} of requests take {args.slow_latency:.1f}s "
+          f"instead of {args.latency:.1f}s")
+    print(f"{'mode':>7} {'call p50':>9} {'call p99':>9} {'doc p50':>8} {'doc p99':>8} {'requests':>9} "
+          f"{'calls':>6} {'slow':>5} {'hedges':>7} {'wins':>5}")
+    for label, (runs, durations, requests) in results.items():
+        latencies = [metric.latency for run in runs for metric in run.metrics]
+        print(
+            f"{label:>7} {percentile(latencies, 50):>9.2f} {percentile(latencies, 99):>9.2f} "
+            f"{percentile(durations, 50):>8.2f} {percentile(durations, 99):>8.2f} {requests:>9} "
+            f"{sum(run.calls for run in runs):>6} "
+            f"{sum(latency >= args.slow_latency / 2 for latency in latencies):>5} "
+            f"{sum(run.hedged_requests for run in runs):>7} "
+            f"{sum(run.hedge_wins for run in runs):>5}"
+        )
+
+if __name__ == "__main__":
+    main()
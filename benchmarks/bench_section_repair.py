@@ -0,0 +1,128 @@
+"""
+Cost of completing sections with targeted repair calls instead of regenerating them.
+
+Generates SRS documents on the offline fake backend with a reply that writes every
+subsection, item field and requirement a section's spec asks for, but drops each of
+them with a given probability, like a model that stops early or skips a heading.
+Documents are generated once without and once with repair_sections. Reports the
+sections left incomplete, the repair calls and their reply tokens, next to the reply
+tokens that regenerating the same sections in full would cost.
+
+    python -m benchmarks.bench_section_repair --documents 10 --drop 0.05
+"""
+import argparse
+import asyncio
+import os
+import random
+import re
+import tempfile
+import time
+import zlib
+from loguru import logger
+from srs_generator import SRSAgentManager
+from srs_generator.llm_backend import FakeBackend
+from srs_generator.run_context import RunContext
+from srs_generator.section_validator import section_issues
+from srs_generator.sections import SECTIONS
+
+DESCRIPTION = "Project {index}: a habit tracker with daily reminders and streaks."
+PARAGRAPH = (
+    "The system provides this capability to every user class described above, within the operating "
+    "environment and constraints stated in the overall description, and reports errors clearly."
+)
+
+class DroppingBackend(FakeBackend):
+    def __init__(self, drop, items=4, **kwargs):
+        """
+        Fake backend writing complete sections, except for parts dropped at random
+        Args:
+            drop(float): Probability that each subsection, item field or requirement list is left out
+            items(int): Features and use cases per section
+        """
+        super().__init__(reply=self.section_reply, **kwargs)
+        self.drop = drop
+        self.items = items
+
+    def section_reply(self, prompt):
+        parts = re.findall(r"^\d+\. (.+): start it with the line (=== part \d+ ===)$", prompt, re.MULTILINE)
+        if parts:
+            return "\n\n".join(f"{marker}\n**{heading}**\n\n{PARAGRAPH}" for heading, marker in parts)
+        spec = next((spec for spec in SECTIONS if spec.system_prompt in prompt), None)
+        if spec is None:
+            return self.default_reply(prompt)
+        # Seeded by the prompt, so both modes get the same first replies
+        keep = lambda: random.Random(zlib.crc32(prompt.encode("utf-8")) + len(blocks)).random() >= self.drop
+        blocks = []
+        for number, title in spec.subsections:
+            blocks.append(f"**{number} {title}**\n\n{PARAGRAPH}\n\n- {PARAGRAPH}" if keep() else "")
+        for item in range(1, self.items + 1 if spec.item_fields else 1):
+            number = f"{spec.number}.{item}"
+            blocks.append(f"**{number} Item {item}**")
+            for index, field in enumerate(spec.item_fields, start=1):
+                blocks.append(f"**{number}.{index} {field}**: {PARAGRAPH}" if keep() else "")
+            if spec.requirement_prefix:
+                blocks.append("\n".join(
+                    f"- **{spec.requirement_prefix} {number}.{index}**: The system shall {PARAGRAPH[4:]}"
+                    for index in range(1, 4)
+                ) if keep() else "")
+        return "\n\n".join(block for block in blocks if block)
+
+async def generate(manager, documents, workdir, label):
+    runs = [RunContext(f"{label}_{index}") for index in range(documents)]
+    start = time.perf_counter()
+    paths = [os.path.join(workdir, f"{label}_{index}.docx") for index in range(documents)]
+    sections = []
+
+    async def one(index, run):
+        contents = {}
+        await manager.generate_srs_async(
+            DESCRIPTION.format(index=index), "Benchmark", paths[index], run=run,
+            on_chunk=lambda key, text, final: contents.__setitem__(key, text) if final else None
+        )
+        sections.append(contents)
+
+    await asyncio.gather(*(one(index, run) for index, run in enumerate(runs)))
+    return runs, sections, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--documents", type=int, default=10, help="Documents generated per mode")
+    parser.add_argument("--drop", type=float, default=0.05, help="Probability of leaving out each part")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake per-call overhead in seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=400, help="Fake generation speed")
+    args = parser.parse_args()
+
+    logger.disable("srs_generator")
+    backend = DroppingBackend(args.drop, latency=args.latency, tokens_per_second=args.tokens_per_second)
+    specs = {spec.key: spec for spec in SECTIONS}
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ.setdefault("GEMINI_CACHE", "0")
+        os.chdir(workdir)
+        results = {}
+        for label, repair in (("plain", False), ("repair", True)):
+            manager = SRSAgentManager(verbose=False, keep_checkpoints=False, backend=backend, repair_sections=repair)
+            results[label] = asyncio.run(generate(manager, args.documents, workdir, label))
+
+    print(f"{args.documents} documents, each part dropped with probability {args.drop:.0%}")
+    print(f"{'mode':>7} {'incomplete':>11} {'repairs':>8} {'repair tokens':>14} {'full regen tokens':>18} {'wall s':>7}")
+    for label, (runs, sections, total) in results.items():
+        incomplete = sum(
+            1 for contents in sections for key, text in contents.items()
+            if key in specs and section_issues(specs[key], text)
+        )
+        repaired = {(run.run_id, metric.agent) for run in runs for metric in run.metrics if metric.task == "repair_section"}
+        repair_tokens = sum(
+            metric.response_tokens for run in runs for metric in run.metrics if metric.task == "repair_section"
+        )
+        # What regenerating the repaired sections would have cost at least once more
+        regen_tokens = sum(
+            metric.response_tokens for run in runs for metric in run.metrics
+            if metric.task in specs and (run.run_id, metric.agent) in repaired
+        )
+        print(
+            f"{label:>7} {incomplete:>11} {sum(run.section_repairs for run in runs):>8} {repair_tokens:>14} "
+            f"{regen_tokens:>18} {total:>7.2f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Startup cost: importing the package, creating SRSAgentManager and the first request.
+
+Each measurement runs in a fresh interpreter, like a new Streamlit or batch worker.
+The documents are generated on the offline fake backend with no latency, so the
+times are the pipeline's own overhead.
+
+    python -m benchmarks.bench_startup --processes 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+def child(managers):
+    started = time.perf_counter()
+    from loguru import logger
+    from srs_generator import SRSAgentManager
+    from srs_generator.llm_backend import FakeBackend
+    imported = time.perf_counter()
+    logger.disable("srs_generator")
+
+    backend = FakeBackend()
+    construct_started = time.perf_counter()
+    manager = SRSAgentManager(verbose=False, keep_checkpoints=False, backend=backend)
+    first_manager = time.perf_counter() - construct_started
+    construct_started = time.perf_counter()
+    for _ in range(managers):
+        SRSAgentManager(verbose=False, keep_checkpoints=False, backend=backend)
+    per_manager = (time.perf_counter() - construct_started) / managers
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        documents = []
+        for index in range(2):
+            document_started = time.perf_counter()
+            manager.generate_srs(f"Project {index}: a habit tracker.", "Benchmark", f"srs_{index}.docx")
+            documents.append(time.perf_counter() - document_started)
+    print(json.dumps({
+        "import": imported - started, "first_manager": first_manager, "manager": per_manager,
+        "first_document": documents[0], "second_document": documents[1]
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--processes", type=int, default=5, help="Fresh interpreters to measure")
+    parser.add_argument("--managers", type=int, default=20, help="Managers created per process after the first")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.managers)
+        return
+
+    environment = dict(os.environ, GEMINI_CACHE="0", SRS_LLM_BACKEND="fake")
+    samples = []
+    for _ in range(args.processes):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_startup", "--child", "--managers", str(args.managers)],
+            capture_output=True, text=True, check=True, env=environment
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"median of {args.processes} fresh processes, in milliseconds")
+    for key, label in (
+        ("import", "import srs_generator"),
+        ("first_manager", "first SRSAgentManager()"),
+        ("manager", "later SRSAgentManager()"),
+        ("first_document", "first document"),
+        ("second_document", "second document"),
+    ):
+        print(f"{label:>26} {statistics.median(sample[key] for sample in samples) * 1000:>9.1f}")
+
+if __name__ == "__main__":
+    main()
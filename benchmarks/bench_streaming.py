@@ -0,0 +1,58 @@
+"""
+Time to first content with and without streaming, against a local Gemini stub.
+
+Generates one SRS document twice. Without streaming, the first text a user can
+see is the complete introduction. With streaming, it is the first chunk of the
+introduction. Also reports when the introduction completed and the total time.
+
+    python -m benchmarks.bench_streaming --latency 2.0
+"""
+import argparse
+import os
+import tempfile
+import time
+from loguru import logger
+from srs_generator import SRSAgentManager
+from srs_generator.run_context import RunContext
+from benchmarks.stub_gemini import StubGeminiServer
+
+DESCRIPTION = "A task tracker with reminders, team sharing and a mobile app."
+
+def generate(manager, file_name, stream):
+    first_chunk = {}
+    start = time.perf_counter()
+
+    def on_chunk(section_key, text, final):
+        if text and "first" not in first_chunk:
+            first_chunk["first"] = time.perf_counter() - start
+
+    run = RunContext()
+    manager.generate_srs(DESCRIPTION, "Benchmark", file_name, run=run, on_chunk=on_chunk if stream else None)
+    total = time.perf_counter() - start
+    section_done = run.stage_timings["introduction"]["end"]
+    return first_chunk.get("first", section_done), section_done, total
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=2.0, help="Stub latency of a full reply in seconds")
+    args = parser.parse_args()
+
+    logger.disable("srs_generator")
+    with StubGeminiServer(latency=args.latency) as stub, tempfile.TemporaryDirectory() as workdir:
+        os.environ["GEMINI_API_BASE_URL"] = stub.base_url
+        os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+        os.environ.setdefault("GEMINI_RPM", "1000000")
+        os.environ.setdefault("GEMINI_TPM", "1000000000")
+        # Both runs send the same prompts
+        os.environ.setdefault("GEMINI_CACHE", "0")
+        os.chdir(workdir)
+        manager = SRSAgentManager(verbose=False, keep_checkpoints=False)
+
+        print(f"stub latency {args.latency:.3f}s per reply")
+        print(f"{'mode':>10} {'first content s':>16} {'introduction s':>15} {'total s':>8}")
+        for label, stream in (("blocking", False), ("streaming", True)):
+            first, section_done, total = generate(manager, os.path.join(workdir, f"{label}.docx"), stream)
+            print(f"{label:>10} {first:>16.2f} {section_done:>15.2f} {total:>8.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Per-request connection cost against a local TLS Gemini stub.
+
+Sends the same sequence of requests three ways and reports mean latency and
+the number of TCP/TLS connections the stub accepted:
+
+  requests.post   - a new session per call, as the agents originally did
+  client per call - a new httpx.AsyncClient per call (cached SSL context)
+  shared client   - the pooled keep-alive client from srs_generator.http_client
+
+    python -m benchmarks.bench_tls_handshake --requests 30
+
+Needs the openssl command line tool to create a throwaway self-signed certificate.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import tempfile
+import time
+import httpx
+import requests
+from benchmarks.stub_gemini import StubGeminiServer
+
+PAYLOAD = {"contents": [{"role": "user", "parts": [{"text": "Write the introduction."}]}]}
+
+def make_certificate(directory):
+    certfile = os.path.join(directory, "stub.pem")
+    keyfile = os.path.join(directory, "stub.key")
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+            "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1",
+            "-keyout", keyfile, "-out", certfile
+        ],
+        check=True,
+        capture_output=True
+    )
+    return certfile, keyfile
+
+def bench_requests(url, certfile, count):
+    timings = []
+    for _ in range(count):
+        start = time.perf_counter()
+        requests.post(url, json=PAYLOAD, verify=certfile).raise_for_status()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+async def bench_client_per_call(url, count):
+    from srs_generator.http_client import get_ssl_context
+
+    timings = []
+    for _ in range(count):
+        start = time.perf_counter()
+        async with httpx.AsyncClient(verify=get_ssl_context()) as client:
+            (await client.post(url, json=PAYLOAD)).raise_for_status()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+async def bench_shared_client(url, count):
+    from srs_generator.http_client import get_http_client, close_http_client_async
+
+    timings = []
+    client = get_http_client()
+    for _ in range(count):
+        start = time.perf_counter()
+        (await client.post(url, json=PAYLOAD)).raise_for_status()
+        timings.append(time.perf_counter() - start)
+    await close_http_client_async()
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=30, help="Requests per client strategy")
+    parser.add_argument("--latency", type=float, default=0.0, help="Stub response latency in seconds")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        certfile, keyfile = make_certificate(workdir)
+        # Trust the throwaway certificate in the shared SSL context
+        os.environ["GEMINI_CA_BUNDLE"] = certfile
+        with StubGeminiServer(latency=args.latency, certfile=certfile, keyfile=keyfile) as stub:
+            url = f"{stub.base_url}/models/gemini-1.5-flash:generateContent"
+            strategies = [
+                ("requests.post", lambda: bench_requests(url, certfile, args.requests)),
+                ("client per call", lambda: asyncio.run(bench_client_per_call(url, args.requests))),
+                ("shared client", lambda: asyncio.run(bench_shared_client(url, args.requests))),
+            ]
+
+            print(f"{args.requests} requests per strategy, stub latency {args.latency:.3f}s")
+            print(f"{'strategy':>16} {'mean ms':>8} {'p50 ms':>8} {'first ms':>9} {'connections':>12}")
+            for label, run in strategies:
+                connections_before = stub.connection_count
+                timings = run()
+                print(
+                    f"{label:>16} {statistics.mean(timings) * 1000:>8.1f} "
+                    f"{statistics.median(timings) * 1000:>8.1f} {timings[0] * 1000:>9.1f} "
+                    f"{stub.connection_count - connections_before:>12}"
+                )
+
+if __name__ == "__main__":
+    main()
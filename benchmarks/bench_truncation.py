@@ -0,0 +1,122 @@
+"""
+Cost of continuing replies cut off at their token limit instead of regenerating them.
+
+Generates SRS documents on the offline fake backend with system features and use cases
+longer than their max_tokens, so the backend stops them at the limit with finish reason
+MAX_TOKENS, as Gemini does. Documents are generated once with continuations turned off
+(every section's max_total_tokens set to its max_tokens) and once with the default
+budget. Reports the sections left cut off, the calls, the continuation requests and
+their reply tokens, next to the reply tokens that regenerating the cut-off sections
+with a larger limit would cost.
+
+    python -m benchmarks.bench_truncation --documents 10 --items 5
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from loguru import logger
+from srs_generator import SRSAgentManager
+from srs_generator.llm_backend import FakeBackend, estimate_tokens
+from srs_generator.run_context import RunContext
+from srs_generator.section_validator import find_items
+from srs_generator.sections import SECTIONS
+
+DESCRIPTION = "Project {index}: a habit tracker with daily reminders and streaks."
+PARAGRAPH = (
+    "The system provides this capability to every user class described above, within the operating "
+    "environment and constraints stated in the overall description, and reports errors clearly."
+)
+
+class LongBackend(FakeBackend):
+    def __init__(self, items, **kwargs):
+        """
+        Fake backend writing features and use cases of the given number of items
+        Args:
+            items(int): Features and use cases per section
+        """
+        super().__init__(reply=self.section_reply, **kwargs)
+        self.items = items
+
+    def section_reply(self, prompt):
+        spec = next((spec for spec in SECTIONS if spec.item_fields and spec.system_prompt in prompt), None)
+        if spec is None:
+            return self.default_reply(prompt)
+        blocks = []
+        for item in range(1, self.items + 1):
+            number = f"{spec.number}.{item}"
+            blocks.append(f"**{number} Item {item}**")
+            blocks.extend(
+                f"**{number}.{index} {field}**: {PARAGRAPH} {PARAGRAPH}"
+                for index, field in enumerate(spec.item_fields, start=1)
+            )
+            if spec.requirement_prefix:
+                blocks.append("\n".join(
+                    f"- **{spec.requirement_prefix} {number}.{index}**: The system shall {PARAGRAPH[4:]}"
+                    for index in range(1, 4)
+                ))
+        return "\n\n".join(blocks)
+
+async def generate(manager, documents, workdir, label):
+    runs = [RunContext(f"{label}_{index}") for index in range(documents)]
+    start = time.perf_counter()
+    paths = [os.path.join(workdir, f"{label}_{index}.docx") for index in range(documents)]
+    sections = [{} for _ in range(documents)]
+
+    async def one(index, run):
+        await manager.generate_srs_async(
+            DESCRIPTION.format(index=index), "Benchmark", paths[index], run=run,
+            on_chunk=lambda key, text, final: sections[index].__setitem__(key, text) if final else None
+        )
+
+    await asyncio.gather(*(one(index, run) for index, run in enumerate(runs)))
+    return runs, sections, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--documents", type=int, default=10, help="Documents generated per mode")
+    parser.add_argument("--items", type=int, default=5, help="Features and use cases per section")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake per-call overhead in seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=400, help="Fake generation speed")
+    args = parser.parse_args()
+
+    logger.disable("srs_generator")
+    backend = LongBackend(args.items, latency=args.latency, tokens_per_second=args.tokens_per_second)
+    item_specs = {spec.key: spec for spec in SECTIONS if spec.item_fields}
+    modes = (
+        ("cut off", tuple(spec.replace(max_total_tokens=spec.max_tokens) for spec in SECTIONS)),
+        ("continue", SECTIONS),
+    )
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ.setdefault("GEMINI_CACHE", "0")
+        os.chdir(workdir)
+        results = {}
+        for label, sections in modes:
+            manager = SRSAgentManager(verbose=False, keep_checkpoints=False, backend=backend, sections=sections)
+            results[label] = asyncio.run(generate(manager, args.documents, workdir, label.replace(" ", "_")))
+
+    print(f"{args.documents} documents, {args.items} features and use cases per section")
+    print(f"{'mode':>9} {'cut off':>8} {'calls':>6} {'continuations':>14} {'reply tokens':>13} {'wall s':>7}")
+    cut = {}
+    for label, (runs, sections, total) in results.items():
+        cut[label] = [
+            (index, key) for index, contents in enumerate(sections) for key, spec in item_specs.items()
+            if len(find_items(spec, contents.get(key, ""))) < args.items
+        ]
+        response_tokens = sum(metric.response_tokens for run in runs for metric in run.metrics)
+        print(
+            f"{label:>9} {len(cut[label]):>8} {sum(run.calls for run in runs):>6} "
+            f"{sum(run.continuations for run in runs):>14} {response_tokens:>13} {total:>7.2f}"
+        )
+
+    # Continuations only add the missing end; a retry with a larger limit writes the whole section again
+    complete = results["continue"][1]
+    extra_tokens = sum(
+        metric.response_tokens for run in results["continue"][0] for metric in run.metrics
+    ) - sum(metric.response_tokens for run in results["cut off"][0] for metric in run.metrics)
+    regen_tokens = sum(estimate_tokens(complete[index][key]) for index, key in cut["cut off"])
+    print(f"continuation reply tokens: {extra_tokens}; regenerating the cut-off sections: {regen_tokens}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+import json
+import random
+import re
+import ssl
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SECTION_REPLY = """**1.1 Purpose**
+
+This section is produced by the local Gemini stub.
+
+- First point
+- Second point
+
+@startuml
+actor User
+User -> System: Request
+System --> User: Response
+@enduml"""
+
+STRUCTURED_REPLY = {"subsections": [{
+    "number": "1.1",
+    "title": "Purpose",
+    "paragraphs": ["This section is produced by the local Gemini stub."],
+    "bullets": ["First point", "Second point"],
+    "requirements": [{"id": "FR-1", "text": "The system shall respond to every request."}]
+}]}
+
+class StubGeminiServer:
+    """
+    Local stand-in for the Gemini generateContent, streamGenerateContent and cachedContents endpoints,
+    used by the benchmarks so they can run without network access or an API key. Requests with a
+    response schema get a fixed structured section.
+    prefill_per_token adds latency for every prompt token not served from a context cache.
+    A slow_fraction of generateContent requests takes slow_latency instead of latency, to model
+    a latency tail.
+    """
+    def __init__(self, latency=0.2, host="127.0.0.1", port=0, certfile=None, keyfile=None, prefill_per_token=0.0,
+                 slow_fraction=0.0, slow_latency=None, seed=0):
+        self.latency = latency
+        self.prefill_per_token = prefill_per_token
+        self.slow_fraction = slow_fraction
+        self.slow_latency = slow_latency if slow_latency is not None else latency * 10
+        self._random = random.Random(seed)
+        self.request_count = 0
+        # Context caches: name -> cached text
+        self.cached_contents = {}
+        # TCP connections accepted, i.e. handshakes paid by clients
+        self.connection_count = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Send headers and body in one segment; unbuffered writes hit delayed ACKs on keep-alive
+            wbufsize = -1
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                with server._lock:
+                    server.connection_count += 1
+
+            def do_HEAD(self):
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_DELETE(self):
+                name = self.path.split("/v1beta/", 1)[-1].split("?", 1)[0]
+                with server._lock:
+                    found = server.cached_contents.pop(name, None) is not None
+                self.send_json(200 if found else 404, {} if found else {"error": {"code": 404}})
+
+            def send_json(self, status, body):
+                reply = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(reply)))
+                self.end_headers()
+                self.wfile.write(reply)
+
+            def create_cached_content(self, payload):
+                text = payload["contents"][0]["parts"][0]["text"]
+                tokens = len(re.findall(r"\S+", text))
+                # The cached prefix is processed once, when it is registered
+                time.sleep(server.prefill_per_token * tokens)
+                with server._lock:
+                    name = f"cachedContents/stub{len(server.cached_contents) + 1}"
+                    while name in server.cached_contents:
+                        name += "x"
+                    server.cached_contents[name] = text
+                self.send_json(200, {"name": name, "model": payload.get("model"), "usageMetadata": {"totalTokenCount": tokens}})
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                payload = json.loads(body or b"{}")
+                if "/cachedContents" in self.path:
+                    self.create_cached_content(payload)
+                    return
+                with server._lock:
+                    server.request_count += 1
+                    cached_text = server.cached_contents.get(payload.get("cachedContent"))
+                    slow = server._random.random() < server.slow_fraction
+                latency = server.slow_latency if slow else server.latency
+                if payload.get("cachedContent") and cached_text is None:
+                    self.send_json(404, {"error": {"code": 404, "message": "CachedContent not found"}})
+                    return
+
+                prompt = payload["contents"][0]["parts"][0]["text"]
+                text = "VALID" if "validator" in prompt else SECTION_REPLY
+                if payload.get("generationConfig", {}).get("responseMimeType") == "application/json":
+                    text = json.dumps(STRUCTURED_REPLY)
+                prompt_tokens = len(re.findall(r"\S+", prompt))
+                cached_tokens = len(re.findall(r"\S+", cached_text)) if cached_text else 0
+                usage = {
+                    "promptTokenCount": prompt_tokens + cached_tokens,
+                    "candidatesTokenCount": len(re.findall(r"\S+", text))
+                }
+                if cached_tokens:
+                    usage["cachedContentTokenCount"] = cached_tokens
+
+                try:
+                    time.sleep(server.prefill_per_token * prompt_tokens)
+                    if ":streamGenerateContent" in self.path:
+                        self.stream_reply(text, usage)
+                        return
+                    time.sleep(latency)
+                    self.send_json(200, {
+                        "candidates": [{"content": {"parts": [{"text": text}]}, "finishReason": "STOP"}],
+                        "usageMetadata": usage
+                    })
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client abandoned the request (deadline or cancellation)
+                    pass
+
+            def stream_reply(self, text, usage):
+                # One server-sent event per paragraph, spread evenly over the latency
+                pieces = re.split(r"(?<=\n\n)", text)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for index, piece in enumerate(pieces):
+                    time.sleep(server.latency / len(pieces))
+                    event = {"candidates": [{"content": {"parts": [{"text": piece}]}}]}
+                    if index == len(pieces) - 1:
+                        event["candidates"][0]["finishReason"] = "STOP"
+                        event["usageMetadata"] = usage
+                    data = f"data: {json.dumps(event)}\r\n\r\n".encode()
+                    self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+                    self.wfile.flush()
+                self.wfile.write(b"0\r\n\r\n")
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.tls = certfile is not None
+        if self.tls:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(certfile, keyfile)
+            # Handshake in the handler thread rather than in accept()
+            self.httpd.socket = context.wrap_socket(
+                self.httpd.socket, server_side=True, do_handshake_on_connect=False
+            )
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        scheme = "https" if self.tls else "http"
+        return f"{scheme}://{host}:{port}/v1beta"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
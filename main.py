@@ -1,6 +1,44 @@
 import streamlit as st
 import os
+import queue
+import threading
 from srs_generator import SRSAgentManager
+from srs_generator.http_client import warmup
+
+@st.cache_resource
+def warm_gemini_connection():
+    # Once per server process: handshake with Gemini in the background while the user types
+    threading.Thread(target=warmup, kwargs={"connections": 2}, daemon=True).start()
+    return True
+
+@st.cache_resource
+def get_srs_manager():
+    # Once per server process: every form submit and session shares the manager and its agents
+    return SRSAgentManager()
+
+def show_streamed_sections(chunks, worker):
+    """
+    Render each section as its chunks arrive, until the generating thread has finished
+    Args:
+        chunks(queue.Queue): (section_key, text, final) tuples from generate_srs's on_chunk
+        worker(threading.Thread): Thread running generate_srs
+    """
+    sections = {}
+    placeholders = {}
+    while worker.is_alive() or not chunks.empty():
+        try:
+            key, text, final = chunks.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        if key not in placeholders:
+            placeholders[key] = st.expander(key.replace('_', ' ').title(), expanded=True).empty()
+        if text is None:
+            sections[key] = ""
+        elif final:
+            sections[key] = text
+        else:
+            sections[key] = sections.get(key, "") + text
+        placeholders[key].markdown(sections[key])
 
 def main():
     # Set page config
@@ -10,6 +48,8 @@ def main():
         layout="wide"
     )
 
+    warm_gemini_connection()
+
     # Add title and description
     st.title("Software Requirements Specification (SRS) Generator")
     st.markdown("""
@@ -41,6 +81,12 @@ def main():
             help="Provide a detailed description of your project. The more detailed your description, the better the generated SRS will be."
         )
 
+        # Add generation mode toggle
+        outline_first = st.checkbox(
+            "Fast mode (outline first)",
+            help="Generate a short outline first and write all sections from it in parallel. Faster, with sections that reference each other less."
+        )
+
         # Add submit button
         submit_button = st.form_submit_button("Generate SRS")
 
@@ -57,9 +103,26 @@ def main():
         # Show processing message
         with st.spinner("Generating SRS Document... This may take a few minutes."):
             try:
-                # Initialize SRS manager and generate document
-                srs_manager = SRSAgentManager()
-                srs_content = srs_manager.generate_srs(user_input, user_name, file_name)
+                # Generate the document in the background with the shared SRS manager,
+                # showing every section while it is being written
+                srs_manager = get_srs_manager()
+                chunks = queue.Queue()
+                outcome = {}
+
+                def generate():
+                    try:
+                        outcome["file"] = srs_manager.generate_srs(
+                            user_input, user_name, file_name, outline_first=outline_first,
+                            on_chunk=lambda key, text, final: chunks.put((key, text, final))
+                        )
+                    except Exception as e:
+                        outcome["error"] = e
+
+                worker = threading.Thread(target=generate, daemon=True)
+                worker.start()
+                show_streamed_sections(chunks, worker)
+                if "error" in outcome:
+                    raise outcome["error"]
 
                 # Check if file was created
                 if os.path.exists(file_name):
@@ -1,11 +1,12 @@
 import subprocess
 import os
-import requests
 import re
 from docx import Document
 from docx.shared import Inches
 from loguru import logger
 from dotenv import load_dotenv
+from srs_generator.event_loop import run_sync
+from srs_generator.llm_backend import get_backend
 
 class SystemModelsAgent:
     def __init__(self, max_retries=2, verbose=True):
@@ -92,31 +93,12 @@ class SystemModelsAgent:
 
 
     def call_gemini(self, prompt):
-        """Call Gemini API to generate PlantUML code"""
-        api_key = os.getenv('GEMINI_API_KEY')
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY environment variable not set")
-
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent?key={api_key}"
-        headers = {'Content-Type': 'application/json'}
-        payload = {
-            "contents": [{
-                "parts": [{"text": prompt}]
-            }]
-        }
-
-        response = requests.post(url, headers=headers, json=payload)
-        
-        if response.status_code == 200:
-            json_response = response.json()
-            try:
-                text = json_response['candidates'][0]['content']['parts'][0]['text']
-                return text
-            except (IndexError, KeyError, TypeError) as e:
-                logger.error(f"Error parsing Gemini response: {e}")
-                return None
-        else:
-            logger.error(f"Gemini API call failed: {response.text}")
+        """Generate PlantUML code through the configured LLM backend"""
+        try:
+            text, _, _ = run_sync(get_backend().generate([{"role": "user", "content": prompt}], max_tokens=2000))
+            return text
+        except Exception as e:
+            logger.error(f"LLM call failed: {e}")
             return None
 
     def extract_plantuml(self, text):
@@ -1,83 +1,463 @@
-import time
+import os
+import asyncio
+import threading
 from loguru import logger
 from .first_page import SRSConcrete
-from .introduction import IntroductionAgent
-from .overall_description import OverallDescriptionAgent
-from .system_feature import SystemFeaturesAgent
-from .external_interface_requirements import ExternalInterfaceAgent
-from .non_functional_requirements import NonFunctionalRequirementsAgent
-from .use_cases import UseCasesAgent
+from .sections import SECTIONS, SectionSpec, validate_sections
+from .section_agent import SectionAgent
 from .system_models_diagrams import SystemModelsAgent
+from .outline import OutlineAgent
+from .scheduler import DependencyScheduler, Stage
+from .event_loop import run_sync
+from .run_context import RunContext, get_current_run, set_current_run, reset_current_run
+from .checkpoint import Checkpoint, default_run_id, fingerprint, normalize_text, prune_checkpoints
+from .rag import is_failed_content, load_environment, FAILED_CONTENT_PREFIX
+from .budget import RunBudget, BudgetExceeded, RunCancelled
+from .context_cache import ContextCache, context_key
+from .combined_sections import CombinedSectionsAgent, DEFAULT_SECTION_GROUPS
+from .model_routing import ModelRouter
 
 class SRSAgentManager:
-    def __init__(self, name="SRSAgentManager", max_retries=5, verbose=True):
+    # Agents by attribute name; each is created and configured on first use
+    agent_classes = {
+        "outline_agent": OutlineAgent,
+        "system_models_agent": SystemModelsAgent,
+    }
+    # Attribute names of the default sections' agents, which are built from the section registry
+    section_agent_names = {
+        "introduction_agent": "introduction",
+        "overall_description_agent": "overall_description",
+        "system_features_agent": "system_features",
+        "external_interface_agent": "external_interfaces",
+        "non_functional_requirements_agent": "non_functional_requirements",
+        "use_cases_agent": "use_cases",
+    }
+
+    def __init__(self, name="SRSAgentManager", max_retries=5, verbose=True, checkpoint_dir="checkpoints", keep_checkpoints=True,
+                 outline_first=False, time_budget=600, call_budget=60, context_caching=False, backend=None,
+                 digest_context=True, context_budgets=None, structured_output=False, combine_sections=False,
+                 section_groups=DEFAULT_SECTION_GROUPS, model_routes=None, hedge_policy=None, sections=None,
+                 repair_sections=False, max_checkpoints=50):
         self.name = name
         self.max_retries = max_retries
         self.verbose = verbose
-        self.srs_writer = SRSConcrete("SRSWriter", max_retries, verbose)
-        self.introduction_agent = IntroductionAgent(max_retries, verbose)
-        self.overall_description_agent = OverallDescriptionAgent(max_retries, verbose)
-        self.system_features_agent = SystemFeaturesAgent(max_retries, verbose)
-        self.external_interface_agent = ExternalInterfaceAgent(max_retries, verbose)
-        self.non_functional_requirements_agent = NonFunctionalRequirementsAgent(max_retries, verbose)
-        self.use_cases_agent = UseCasesAgent(max_retries, verbose)
-        self.system_models_agent = SystemModelsAgent(max_retries, verbose)
+        self.checkpoint_dir = checkpoint_dir
+        self.keep_checkpoints = keep_checkpoints
+        # Completed checkpoints of other documents kept under checkpoint_dir, newest first; None
+        # keeps all. Checkpoints of failed, degraded or running documents are never removed
+        self.max_checkpoints = max_checkpoints
+        self.outline_first = outline_first
+        # Default per-run bounds: seconds of wall-clock time and LLM calls
+        self.time_budget = time_budget
+        self.call_budget = call_budget
+        # Register the context shared by several calls of a run with the API's context cache
+        self.context_caching = context_caching
+        # Write each group of section_groups with one LLM call, falling back to per-section calls
+        self.combine_sections = combine_sections
+        self.section_groups = [tuple(group) for group in section_groups]
+        # LLMBackend every agent calls; the process-wide default (SRS_LLM_BACKEND) if None
+        self.backend = backend
+        # Upstream sections beyond an agent's context_budget are embedded as extracted digests.
+        # context_budgets overrides the budget per agent section key ('system_models' for diagrams)
+        self.digest_context = digest_context
+        self.context_budgets = dict(context_budgets or {})
+        # Sections are requested as schema-constrained JSON and written from that structure
+        self.structured_output = structured_output
+        # Model, timeout, token limit and fallback per agent and task; SRS_MODEL_ROUTES if None
+        self.router = ModelRouter(model_routes) if model_routes is not None else None
+        # HedgePolicy re-sending requests slower than usual; GEMINI_HEDGE_PERCENTILE if None
+        self.hedge_policy = hedge_policy
+        # SectionSpecs in document order; prompts, dependencies, budgets, models and headings
+        # of the sections all come from them
+        self.sections = tuple(sections) if sections is not None else SECTIONS
+        validate_sections(self.sections)
+        # Check sections against their spec's skeleton and request only their missing parts
+        self.repair_sections = repair_sections
+        self._section_agents = {}
+        self._agents_lock = threading.Lock()
+        load_environment()
         self.logger = logger
 
-    def generate_srs(self, topic, user_name, file_name="SRS_document.docx"):
+    def __getattr__(self, name):
+        if name in type(self).section_agent_names:
+            return self.section_agent(type(self).section_agent_names[name])
+        agent_class = type(self).agent_classes.get(name)
+        if agent_class is None:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        with self._agents_lock:
+            # Another thread may have created it while this one waited
+            if name not in self.__dict__:
+                self.__dict__[name] = self.configure_agent(agent_class(self.max_retries, self.verbose, self.backend))
+            return self.__dict__[name]
+
+    def configure_agent(self, agent):
         """
-        Orchestrates the generation of SRS document
+        Apply the manager's settings to a newly created agent
         """
-        try:
-            self.logger.info(f"[{self.name}] Starting SRS generation")
+        if agent.section_key != "outline":
+            key = agent.section_key or "system_models"
+            if not self.digest_context:
+                agent.context_budget = None
+            elif key in self.context_budgets:
+                agent.context_budget = self.context_budgets[key]
+        if agent.section_key not in (None, "outline"):
+            agent.structured_output = self.structured_output
+        if isinstance(agent, SectionAgent):
+            agent.repair_sections = self.repair_sections
+        agent.router = self.router
+        agent.hedge_policy = self.hedge_policy
+        agent.sections = self.sections
+        if isinstance(agent, SystemModelsAgent):
+            # Diagrams are drawn from the whole document
+            agent.dependencies = tuple(spec.key for spec in self.sections)
+        return agent
+
+    def section_agent(self, key):
+        """
+        The agent writing a registered section, created on first use
+        Args:
+            key(str): Section key
 
-            # Create first page
+        Raises:
+            AttributeError: If the manager's sections have no such key
+        """
+        with self._agents_lock:
+            if key not in self._section_agents:
+                spec = next((spec for spec in self.sections if spec.key == key), None)
+                if spec is None:
+                    raise AttributeError(f"'{type(self).__name__}' has no section {key!r}")
+                self._section_agents[key] = self.configure_agent(
+                    SectionAgent(spec, self.max_retries, self.verbose, self.backend)
+                )
+            return self._section_agents[key]
+
+    def section_agents(self):
+        """
+        Section agents in document order
+        """
+        return [self.section_agent(spec.key) for spec in self.sections]
+
+    def build_stages(self, topic, user_name, file_name, checkpoint, section_overrides=None, outline_first=False,
+                     on_chunk=None, context_caching=False, combine_sections=False):
+        """
+        Build the generation graph: each section and diagram runs as soon as the
+        sections it actually reads are available. Stages stored in the checkpoint
+        with the same input fingerprint are reused instead of calling the LLM again;
+        any change to a stage's inputs regenerates it and, through the changed
+        text, everything downstream of it.
+
+        In outline-first mode one short outline call runs first and every section
+        and diagram expands it in parallel, so the critical path is two LLM calls deep.
+
+        With on_chunk, sections are streamed: the writer parses each chunk as it
+        arrives and on_chunk(section_key, text, final) sees it too. text is None when
+        a failed attempt's partial text must be discarded; the final call carries the
+        whole section, however it was obtained.
+
+        With context_caching, every context (description plus upstream contents) that
+        several stages send is registered once with the API's context cache and the
+        calls reference it instead of sending it again.
+
+        With combine_sections, each group of section_groups is requested in one call
+        that runs ahead of the group's section stages. Each section stage takes its
+        text from the combined reply when the reply held it, and otherwise calls its
+        own agent. Groups whose sections are overridden or checkpointed are not combined,
+        and nothing is combined with structured_output.
+        """
+        section_overrides = section_overrides or {}
+        normalized_topic = normalize_text(topic)
+        srs_writer = SRSConcrete("SRSWriter", self.max_retries, self.verbose, self.sections)
+        diagrams_dir = os.path.join(
+            os.path.dirname(file_name),
+            "diagrams",
+            os.path.splitext(os.path.basename(file_name))[0]
+        )
+
+        async def first_page(inputs):
             self.logger.info(f"[{self.name}] Creating first page")
-            self.srs_writer.create_first_page(user_name=user_name, file_name=file_name)
-
-            # Generate content for each section
-            contents = {}
-            
-            # Generate Introduction
-            self.logger.info(f"[{self.name}] Generating Introduction")
-            contents = self.introduction_agent.execute(topic, contents)
-            time.sleep(2)  # Reduced delay for better performance
-
-            # Generate Overall Description
-            self.logger.info(f"[{self.name}] Generating Overall Description")
-            contents = self.overall_description_agent.execute(topic, contents)
-            time.sleep(2)
-
-            # Generate System Features
-            self.logger.info(f"[{self.name}] Generating System Features")
-            contents = self.system_features_agent.execute(topic, contents)
-            time.sleep(2)
-
-            # Generate External Interface Requirements
-            self.logger.info(f"[{self.name}] Generating External Interface Requirements")
-            contents = self.external_interface_agent.execute(topic, contents)
-            time.sleep(2)
-
-            # Generate Non-functional Requirements
-            self.logger.info(f"[{self.name}] Generating Non-functional Requirements")
-            contents = self.non_functional_requirements_agent.execute(topic, contents)
-            time.sleep(2)
-
-            # Generate Use Cases
-            self.logger.info(f"[{self.name}] Generating Use Cases")
-            contents = self.use_cases_agent.execute(topic, contents)
-            time.sleep(2)
-
-            # Write all contents to document
+            await asyncio.to_thread(srs_writer.create_first_page, user_name=user_name, file_name=file_name)
+
+        stages = [Stage("first_page", first_page)]
+
+        def emit(key, text, final=False):
+            if final:
+                srs_writer.finish_section(key, text)
+            else:
+                srs_writer.feed_section(key, text)
+            on_chunk(key, text, final)
+
+        run_context = get_current_run()
+        if on_chunk is not None and run_context is not None:
+            run_context.on_chunk = emit
+
+        def section_stage(agent, dependencies, group_name=None):
+            async def produce(inputs):
+                combined = inputs.get(group_name) or {}
+                inputs = {key: value for key, value in inputs.items() if key != group_name}
+                if agent.section_key in section_overrides:
+                    self.logger.info(f"[{self.name}] Using caller-provided {agent.section_key}")
+                    return section_overrides[agent.section_key]
+
+                input_fingerprint = fingerprint(
+                    agent.name, agent.prompt_version, agent.context_budget, agent.structured_output,
+                    agent.output_settings(), normalized_topic, inputs
+                )
+                stored = checkpoint.get_section(agent.section_key, input_fingerprint)
+                if stored is not None:
+                    self.logger.info(f"[{self.name}] Reusing {agent.section_key}: inputs unchanged")
+                    structure = checkpoint.get_section_structure(agent.section_key, input_fingerprint)
+                    if structure is not None:
+                        srs_writer.set_structure(agent.section_key, stored, structure)
+                    return stored
+
+                self.logger.info(f"[{self.name}] Generating {agent.section_key.replace('_', ' ').title()}")
+                # Failure placeholders carry no information worth sending to the model
+                prompt_inputs = {key: value for key, value in inputs.items() if not is_failed_content(value)}
+                if agent.section_key in combined:
+                    self.logger.info(f"[{self.name}] Taking {agent.section_key} from the combined reply")
+                    contents = {agent.section_key: await agent.complete_section_async(
+                        topic, prompt_inputs, combined[agent.section_key]
+                    )}
+                else:
+                    try:
+                        contents = await agent.execute_async(topic, prompt_inputs)
+                    except BudgetExceeded as e:
+                        self.logger.warning(f"[{self.name}] {e}; writing a placeholder for {agent.section_key}")
+                        title = agent.section_key.replace('_', ' ')
+                        return f"{FAILED_CONTENT_PREFIX} {title} content: the generation budget was exhausted."
+                section_content = contents[agent.section_key]
+                structure = run_context.section_structures.pop(agent.section_key, None) if run_context else None
+                if structure is not None:
+                    srs_writer.set_structure(agent.section_key, section_content, structure)
+                if not is_failed_content(section_content):
+                    checkpoint.save_section(agent.section_key, section_content, input_fingerprint, structure)
+                return section_content
+
+            async def run(inputs):
+                section_content = await produce(inputs)
+                if on_chunk is not None:
+                    emit(agent.section_key, section_content, final=True)
+                return section_content
+            if group_name is not None:
+                dependencies = tuple(dependencies) + (group_name,)
+            return Stage(agent.section_key, run, dependencies)
+
+        def group_stage(group_name, agents):
+            combined_agent = CombinedSectionsAgent(agents, self.max_retries, self.verbose, self.backend)
+            combined_agent.router = self.router
+            combined_agent.hedge_policy = self.hedge_policy
+            combined_agent.sections = self.sections
+            dependencies = ("outline",) if outline_first else combined_agent.dependencies
+
+            async def run(inputs):
+                for agent in agents:
+                    # Members reading another member are regenerated with it; the others may be reusable
+                    if not outline_first and any(key in combined_agent.section_keys for key in agent.dependencies):
+                        continue
+                    if agent.section_key in section_overrides:
+                        return {}
+                    member_inputs = {key: inputs[key] for key in (dependencies if outline_first else agent.dependencies)}
+                    input_fingerprint = fingerprint(
+                        agent.name, agent.prompt_version, agent.context_budget, agent.structured_output,
+                        agent.output_settings(), normalized_topic, member_inputs
+                    )
+                    if checkpoint.get_section(agent.section_key, input_fingerprint) is not None:
+                        return {}
+
+                self.logger.info(f"[{self.name}] Generating {', '.join(combined_agent.section_keys)} in one call")
+                prompt_inputs = {key: value for key, value in inputs.items() if not is_failed_content(value)}
+                try:
+                    return await combined_agent.execute_async(topic, prompt_inputs)
+                except BudgetExceeded as e:
+                    self.logger.warning(f"[{self.name}] {e}; generating {group_name} separately")
+                    return {}
+            return Stage(group_name, run, dependencies)
+
+        groups = {}
+        if combine_sections and self.structured_output:
+            # A combined reply is free-form text; each structured section needs its own JSON reply
+            self.logger.warning(f"[{self.name}] Not combining sections: structured output requests each section on its own")
+        elif combine_sections:
+            agents_by_key = {agent.section_key: agent for agent in self.section_agents()}
+            for group in self.section_groups:
+                if any(key not in agents_by_key for key in group):
+                    self.logger.warning(f"[{self.name}] Not combining {', '.join(group)}: not all of them are registered")
+                    continue
+                group_name = f"sections:{'+'.join(group)}"
+                stages.append(group_stage(group_name, [agents_by_key[key] for key in group]))
+                groups.update({key: group_name for key in group})
+
+        if outline_first:
+            stages.append(section_stage(self.outline_agent, self.outline_agent.dependencies))
+        stages.extend(
+            section_stage(
+                agent, ("outline",) if outline_first else agent.dependencies, groups.get(agent.section_key)
+            )
+            for agent in self.section_agents()
+        )
+
+        def diagram_stage(diagram_type):
+            async def run(inputs):
+                agent = self.system_models_agent
+                input_fingerprint = fingerprint(
+                    agent.name, agent.prompt_version, agent.context_budget, diagram_type,
+                    agent.output_settings("diagram"), normalized_topic, inputs
+                )
+                stored = checkpoint.get_diagram(diagram_type, input_fingerprint)
+                if stored is not None:
+                    plantuml_code, png_path = stored
+                    self.logger.info(f"[{self.name}] Reusing {diagram_type}: inputs unchanged")
+                    if png_path:
+                        run_context.diagrams[diagram_type] = plantuml_code
+                        return png_path
+                    png_path = await agent.render_diagram_async(diagram_type, plantuml_code, diagrams_dir)
+                else:
+                    self.logger.info(f"[{self.name}] Generating {diagram_type}")
+                    prompt_inputs = {key: value for key, value in inputs.items() if not is_failed_content(value)}
+                    try:
+                        plantuml_code = await agent.generate_diagram_code_async(diagram_type, topic, prompt_inputs)
+                    except BudgetExceeded as e:
+                        self.logger.warning(f"[{self.name}] {e}; skipping {diagram_type}")
+                        return None
+                    if not plantuml_code:
+                        self.logger.warning(f"[{self.name}] Failed to generate PlantUML code for {diagram_type}")
+                        return None
+                    png_path = await agent.render_diagram_async(diagram_type, plantuml_code, diagrams_dir)
+                run_context.diagrams[diagram_type] = plantuml_code
+                checkpoint.save_diagram(diagram_type, plantuml_code, png_path, input_fingerprint)
+                return png_path
+            dependencies = ("outline",) if outline_first else self.system_models_agent.dependencies
+            return Stage(f"diagram:{diagram_type}", run, dependencies)
+
+        diagram_stages = [diagram_stage(diagram_type) for diagram_type in self.system_models_agent.diagram_types]
+        stages.extend(diagram_stages)
+
+        if context_caching and run_context is not None:
+            run_context.context_cache = ContextCache(
+                [context_key(stage.dependencies, self.sections) for stage in stages[1:]], budget=run_context.budget
+            )
+
+        section_keys = [agent.section_key for agent in self.section_agents()]
+
+        async def write_document(inputs):
+            contents = {key: inputs[key] for key in section_keys}
             self.logger.info(f"[{self.name}] Writing contents to document")
-            self.srs_writer.add_page(contents, file_name)
+            await asyncio.to_thread(srs_writer.add_page, contents, file_name)
+
+            self.logger.info(f"[{self.name}] Adding System Models and Diagrams")
+            png_paths = {stage.name.split(":", 1)[1]: inputs[stage.name] for stage in diagram_stages}
+            return await self.system_models_agent.execute_async(topic, contents, file_name, png_paths, diagrams_dir)
+
+        stages.append(Stage(
+            "document",
+            write_document,
+            ["first_page"] + section_keys + [stage.name for stage in diagram_stages]
+        ))
+        return stages
+
+    def generate_srs(self, topic, user_name, file_name="SRS_document.docx", run=None, section_overrides=None,
+                     outline_first=None, budget=None, on_chunk=None, context_caching=None, combine_sections=None):
+        """
+        Synchronous wrapper around generate_srs_async
+        """
+        return run_sync(self.generate_srs_async(
+            topic, user_name, file_name, run, section_overrides, outline_first, budget, on_chunk, context_caching,
+            combine_sections
+        ))
 
-            # Generate System Models and Diagrams
-            self.logger.info(f"[{self.name}] Generating System Models and Diagrams")
-            contents = self.system_models_agent.execute(topic, contents, file_name)
+    async def generate_srs_async(self, topic, user_name, file_name="SRS_document.docx", run=None, section_overrides=None,
+                                 outline_first=None, budget=None, on_chunk=None, context_caching=None,
+                                 combine_sections=None):
+        """
+        Orchestrates the generation of SRS document
+        Args:
+            topic(str): The project description
+            user_name(str): Author shown on the first page
+            file_name(str): Path of the .docx to write
+            run(RunContext): Collects call and retry counters; its run_id keys the checkpoint.
+                A new one, keyed on file_name, is created if omitted, so regenerating the
+                same document only regenerates stages whose inputs changed.
+            section_overrides(dict): Section texts edited by the caller; they are used as-is
+                and only the stages that read them are regenerated
+            outline_first(bool): Expand all sections in parallel from one outline call;
+                defaults to the manager's outline_first setting
+            budget(RunBudget): Wall-clock and call budget; defaults to the manager's time_budget
+                and call_budget. When it runs out, remaining sections get placeholders and
+                remaining diagrams are skipped. Calling budget.cancel() from any thread
+                aborts the run with RunCancelled and issues no further calls.
+            on_chunk(callable): Stream sections as they are generated: called as
+                on_chunk(section_key, text, final) from the event loop thread, so it must not
+                block (e.g. put the chunk on a queue). text is None to discard a failed attempt's
+                partial text; final=True carries the complete section
+            context_caching(bool): Reference context shared by several calls from the API's
+                context cache instead of resending it; defaults to the manager's context_caching setting
+            combine_sections(bool): Request each group of the manager's section_groups in one call,
+                falling back to per-section calls for sections the reply lacks; defaults to the
+                manager's combine_sections setting
+
+        Returns:
+            str: The file name of the generated document
+        """
+        run = run or RunContext(default_run_id(file_name))
+        if budget is not None:
+            run.budget = budget
+        elif run.budget.max_seconds is None and run.budget.max_calls is None:
+            run.budget = RunBudget(self.time_budget, self.call_budget)
+        run.budget.start(asyncio.current_task())
+        outline_first = self.outline_first if outline_first is None else outline_first
+        context_caching = self.context_caching if context_caching is None else context_caching
+        combine_sections = self.combine_sections if combine_sections is None else combine_sections
+        checkpoint = Checkpoint(self.checkpoint_dir, run.run_id)
+        # Kept by prune_checkpoints until the run completes
+        checkpoint.set_completed(False)
+        run_token = set_current_run(run)
+        scheduler = DependencyScheduler(f"{self.name}.Scheduler", verbose=self.verbose)
+        try:
+            self.logger.info(f"[{self.name}] Starting SRS generation (run {run.run_id})")
+            await scheduler.run_async(
+                self.build_stages(
+                    topic, user_name, file_name, checkpoint, section_overrides, outline_first, on_chunk, context_caching,
+                    combine_sections
+                )
+            )
+            if not self.keep_checkpoints:
+                checkpoint.clear()
+            else:
+                # A degraded document keeps its checkpoint for resuming, like a failed one
+                if not (run.failed_calls or run.budget.exhausted):
+                    checkpoint.set_completed(True)
+                if self.max_checkpoints is not None:
+                    await asyncio.to_thread(prune_checkpoints, self.checkpoint_dir, self.max_checkpoints, run.run_id)
 
             self.logger.info(f"[{self.name}] SRS document generation completed successfully")
+            if self.verbose:
+                for agent_name, totals in run.agent_metrics().items():
+                    self.logger.info(
+                        f"[{self.name}] {agent_name}: {totals['calls']} calls, {totals['latency_seconds']}s, "
+                        f"{totals['prompt_tokens']} prompt + {totals['response_tokens']} response tokens"
+                    )
+                for route, totals in run.route_metrics().items():
+                    self.logger.info(
+                        f"[{self.name}] {route}: {totals['calls']} calls, {totals['latency_seconds']}s, "
+                        f"${totals['cost_usd']:.4f}"
+                    )
             return file_name
+        except asyncio.CancelledError:
+            if run.budget.cancelled:
+                self.logger.warning(f"[{self.name}] Run {run.run_id} cancelled by the caller")
+                raise RunCancelled(f"Run {run.run_id} was cancelled") from None
+            raise
+        except RunCancelled:
+            self.logger.warning(f"[{self.name}] Run {run.run_id} cancelled by the caller")
+            raise
         except Exception as e:
             self.logger.error(f"[{self.name}] Failed to generate SRS document: {str(e)}")
-            raise
\ No newline at end of file
+            self.logger.info(f"[{self.name}] Completed stages are checkpointed under run id {run.run_id}; rerun to resume")
+            raise
+        finally:
+            # Kept on the run, not the manager, which concurrent runs share
+            run.stage_timings = scheduler.timings
+            if run.context_cache is not None:
+                await run.context_cache.close()
+                run.context_cache = None
+            reset_current_run(run_token)
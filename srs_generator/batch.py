@@ -0,0 +1,158 @@
+import os
+import csv
+import json
+import time
+import asyncio
+import argparse
+from loguru import logger
+from .run_context import RunContext
+from .checkpoint import default_run_id
+from .metrics import get_metrics
+
+REQUIRED_FIELDS = ("user_name", "file_name", "description")
+
+def load_jobs(path):
+    """
+    Read batch jobs from a JSONL or CSV file
+    Args:
+        path(str): File with one (user_name, file_name, description) row per job
+
+    Returns:
+        list: Job dictionaries with the required fields; file names end in .docx
+
+    Raises:
+        ValueError: On missing fields, unsupported file types or duplicate file names
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, newline="", encoding="utf-8") as f:
+        if extension in (".jsonl", ".ndjson"):
+            rows = [json.loads(line) for line in f if line.strip()]
+        elif extension == ".csv":
+            rows = list(csv.DictReader(f))
+        else:
+            raise ValueError(f"Unsupported batch file type '{extension}', expected .jsonl or .csv")
+
+    jobs = []
+    seen = set()
+    for line_number, row in enumerate(rows, 1):
+        missing = [field for field in REQUIRED_FIELDS if not str(row.get(field) or "").strip()]
+        if missing:
+            raise ValueError(f"Row {line_number} of {path} is missing {', '.join(missing)}")
+        file_name = os.path.basename(row["file_name"].strip())
+        if not file_name.endswith(".docx"):
+            file_name += ".docx"
+        if file_name in seen:
+            raise ValueError(f"Row {line_number} of {path} repeats file name {file_name}")
+        seen.add(file_name)
+        jobs.append({
+            "user_name": row["user_name"].strip(),
+            "file_name": file_name,
+            "description": row["description"].strip()
+        })
+    return jobs
+
+async def run_job(manager, job, output_dir, semaphore):
+    """
+    Generate one document and return its summary record
+    """
+    async with semaphore:
+        output_path = os.path.join(output_dir, job["file_name"])
+        # Same id as an earlier batch writing this document, so unchanged stages are reused
+        run = RunContext(default_run_id(output_path))
+        start = time.perf_counter()
+        record = {"file_name": job["file_name"], "user_name": job["user_name"]}
+        try:
+            await manager.generate_srs_async(job["description"], job["user_name"], output_path, run)
+            record["status"] = "degraded" if run.failed_calls or run.budget.exhausted else "ok"
+            record["output"] = output_path
+        except Exception as e:
+            record["status"] = "failed"
+            record["error"] = str(e)
+        record["latency_seconds"] = round(time.perf_counter() - start, 3)
+        record.update(run.summary())
+        logger.info(f"[Batch] {job['file_name']}: {record['status']} in {record['latency_seconds']}s")
+        return record
+
+async def run_batch(jobs, output_dir, concurrency=4, manager=None):
+    """
+    Generate documents for all jobs with at most `concurrency` running at once
+    Args:
+        jobs(list): Job dictionaries as returned by load_jobs
+        output_dir(str): Directory for the documents and summary.json
+        concurrency(int): Maximum number of documents in flight
+        manager(SRSAgentManager): Manager to use; a new one is created if omitted
+
+    Returns:
+        dict: The batch summary, also written to output_dir/summary.json; per-agent
+            call metrics of the process are written to output_dir/metrics.prom
+    """
+    from . import SRSAgentManager
+
+    os.makedirs(output_dir, exist_ok=True)
+    manager = manager or SRSAgentManager()
+    semaphore = asyncio.Semaphore(concurrency)
+    start = time.perf_counter()
+    records = await asyncio.gather(*(run_job(manager, job, output_dir, semaphore) for job in jobs))
+    wall_clock = time.perf_counter() - start
+
+    latencies = sorted(record["latency_seconds"] for record in records)
+    summary = {
+        "jobs": len(records),
+        "ok": sum(record["status"] == "ok" for record in records),
+        "degraded": sum(record["status"] == "degraded" for record in records),
+        "failed": sum(record["status"] == "failed" for record in records),
+        "retries": sum(record["retries"] for record in records),
+        "concurrency": concurrency,
+        "wall_clock_seconds": round(wall_clock, 3),
+        "latency_p50_seconds": _percentile(latencies, 50),
+        "latency_p95_seconds": _percentile(latencies, 95),
+        "results": records
+    }
+    with open(os.path.join(output_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    with open(os.path.join(output_dir, "metrics.prom"), "w", encoding="utf-8") as f:
+        f.write(get_metrics().to_prometheus())
+    return summary
+
+def _percentile(sorted_values, percent):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, round(percent / 100 * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m srs_generator",
+        description="Generate SRS documents for every row of a JSONL or CSV file"
+    )
+    parser.add_argument("input", help="JSONL or CSV file with user_name, file_name and description columns")
+    parser.add_argument("-o", "--output-dir", default="srs_output", help="Directory for documents and summary.json")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="Documents generated at the same time")
+    parser.add_argument("--max-seconds", type=float, default=600, help="Wall-clock budget per document")
+    parser.add_argument("--max-calls", type=int, default=60, help="LLM call budget per document")
+    parser.add_argument("--context-caching", action="store_true",
+                        help="Register context shared by several calls with the API's context cache")
+    parser.add_argument("--combine-sections", action="store_true",
+                        help="Request groups of sections in one call each to save round trips")
+    parser.add_argument("--repair-sections", action="store_true",
+                        help="Request only the missing subsections of incomplete sections")
+    parser.add_argument("--max-checkpoints", type=int, default=50,
+                        help="Completed checkpoints of earlier documents kept, newest first; "
+                             "those of failed jobs are always kept for resuming")
+    args = parser.parse_args(argv)
+
+    jobs = load_jobs(args.input)
+    logger.info(f"[Batch] Generating {len(jobs)} documents with concurrency {args.concurrency}")
+    from . import SRSAgentManager
+    manager = SRSAgentManager(
+        time_budget=args.max_seconds, call_budget=args.max_calls, context_caching=args.context_caching,
+        combine_sections=args.combine_sections, repair_sections=args.repair_sections,
+        max_checkpoints=args.max_checkpoints
+    )
+    summary = asyncio.run(run_batch(jobs, args.output_dir, args.concurrency, manager))
+    print(
+        f"{summary['jobs']} jobs: {summary['ok']} ok, {summary['degraded']} degraded, "
+        f"{summary['failed']} failed, {summary['retries']} retries in {summary['wall_clock_seconds']}s. "
+        f"Summary written to {os.path.join(args.output_dir, 'summary.json')}"
+    )
+    return 1 if summary["failed"] else 0
@@ -0,0 +1,88 @@
+import time
+import asyncio
+import threading
+
+class BudgetExceeded(Exception):
+    """Raised when a run has used up its wall-clock or call budget"""
+
+class RunCancelled(Exception):
+    """Raised when the caller cancelled the run"""
+
+class RunBudget:
+    def __init__(self, max_seconds=None, max_calls=None):
+        """
+        Wall-clock and LLM-call budget for one generate_srs invocation
+        Args:
+            max_seconds(float): Time allowed from the start of the run, None for no limit
+            max_calls(int): HTTP attempts allowed across all agents, None for no limit
+        """
+        self.max_seconds = max_seconds
+        self.max_calls = max_calls
+        self.calls = 0
+        self.deadline = None
+        self.cancelled = False
+        self.exhausted = False
+        self._task = None
+        self._loop = None
+        self._lock = threading.Lock()
+
+    def start(self, task=None):
+        """
+        Start the clock; the task, if given, is cancelled by cancel()
+        """
+        if self.max_seconds is not None and self.deadline is None:
+            self.deadline = time.monotonic() + self.max_seconds
+        if task is not None:
+            self._task = task
+            self._loop = task.get_loop()
+
+    def cancel(self):
+        """
+        Cancel the run from any thread: no further calls are issued and the
+        in-flight ones are abandoned
+        """
+        with self._lock:
+            self.cancelled = True
+            task, loop = self._task, self._loop
+        if task is not None and not task.done():
+            loop.call_soon_threadsafe(task.cancel)
+
+    def remaining_seconds(self):
+        """
+        Returns:
+            float: Seconds left before the deadline, or None without a time limit
+        """
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def check(self):
+        """
+        Raises:
+            RunCancelled: If the run was cancelled
+            BudgetExceeded: If the deadline has passed or no calls are left
+        """
+        if self.cancelled:
+            raise RunCancelled("Run was cancelled")
+        remaining = self.remaining_seconds()
+        if remaining is not None and remaining <= 0:
+            self.exhausted = True
+            raise BudgetExceeded(f"Time budget of {self.max_seconds}s exhausted")
+        if self.max_calls is not None and self.calls >= self.max_calls:
+            self.exhausted = True
+            raise BudgetExceeded(f"Call budget of {self.max_calls} calls exhausted")
+
+    def consume_call(self):
+        """
+        Check the budget and count one LLM call against it
+        """
+        with self._lock:
+            self.check()
+            self.calls += 1
+
+    async def sleep(self, seconds):
+        """
+        Sleep without overrunning the deadline
+        """
+        remaining = self.remaining_seconds()
+        await asyncio.sleep(seconds if remaining is None else min(seconds, remaining))
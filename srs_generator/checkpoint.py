@@ -0,0 +1,186 @@
+import os
+import json
+import shutil
+import hashlib
+import threading
+from loguru import logger
+
+def default_run_id(file_name):
+    """
+    Deterministic run id per output document, so regenerating the same document
+    reuses (or resumes) its stored stages
+    """
+    digest = hashlib.sha256(os.path.abspath(file_name).encode("utf-8")).hexdigest()
+    return digest[:16]
+
+def normalize_text(text):
+    """
+    Collapse whitespace so reflowing a description does not count as a change
+    """
+    return " ".join(text.split())
+
+def fingerprint(*parts):
+    """
+    Hash of everything a stage's output depends on
+    Args:
+        parts: JSON-serialisable inputs, e.g. prompt version, description and upstream section texts
+
+    Returns:
+        str: Hex digest
+    """
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def prune_checkpoints(root, keep, current=None):
+    """
+    Remove the least recently written completed checkpoints under root beyond the newest
+    keep. Checkpoints of runs that failed, or are still running in this or another
+    process, are not completed and are always kept for resuming
+    Args:
+        root(str): Directory holding all checkpoints
+        keep(int): Completed checkpoints to keep
+        current(str): Run id that is never removed, e.g. the run that just finished
+
+    Returns:
+        list: Run ids removed
+    """
+    try:
+        run_ids = [name for name in os.listdir(root) if os.path.isdir(os.path.join(root, name))]
+    except OSError:
+        return []
+
+    def written_at(run_id):
+        path = os.path.join(root, run_id)
+        state_file = os.path.join(path, "state.json")
+        try:
+            return os.path.getmtime(state_file if os.path.exists(state_file) else path)
+        except OSError:
+            return 0.0
+
+    def completed(run_id):
+        try:
+            with open(os.path.join(root, run_id, "state.json"), encoding="utf-8") as f:
+                return json.load(f).get("completed") is True
+        except (OSError, ValueError, AttributeError):
+            return False
+
+    stale = sorted(filter(completed, run_ids), key=written_at, reverse=True)[keep:]
+    removed = [run_id for run_id in stale if run_id != current]
+    for run_id in removed:
+        shutil.rmtree(os.path.join(root, run_id), ignore_errors=True)
+    if removed:
+        logger.info(f"[Checkpoint] Removed {len(removed)} old checkpoints from {root}")
+    return removed
+
+class Checkpoint:
+    def __init__(self, root, run_id):
+        """
+        Completed stages of one document, stored under root/run_id together with
+        the fingerprint of the inputs each stage was generated from
+        Args:
+            root(str): Directory holding all checkpoints
+            run_id(str): Run the checkpoint belongs to
+        """
+        self.name = "Checkpoint"
+        self.run_id = run_id
+        self.path = os.path.join(root, run_id)
+        self.state_file = os.path.join(self.path, "state.json")
+        self.logger = logger
+        self._lock = threading.Lock()
+        self.state = {"sections": {}, "diagrams": {}}
+        if os.path.exists(self.state_file):
+            try:
+                with open(self.state_file, encoding="utf-8") as f:
+                    self.state = json.load(f)
+                self.logger.info(
+                    f"[{self.name}] Loaded run {run_id}: {len(self.state['sections'])} sections, "
+                    f"{len(self.state['diagrams'])} diagrams stored"
+                )
+            except (OSError, ValueError, KeyError) as e:
+                self.logger.warning(f"[{self.name}] Ignoring unreadable checkpoint {self.state_file}: {e}")
+                self.state = {"sections": {}, "diagrams": {}}
+
+    def get_section(self, key, input_fingerprint):
+        """
+        Returns:
+            str: Stored section text, or None if the section has not completed
+                or was generated from different inputs
+        """
+        entry = self.state["sections"].get(key)
+        if not isinstance(entry, dict) or entry.get("fingerprint") != input_fingerprint:
+            return None
+        return entry["text"]
+
+    def get_section_structure(self, key, input_fingerprint):
+        """
+        Returns:
+            dict: Parsed structure stored with the section, or None
+        """
+        entry = self.state["sections"].get(key)
+        if not isinstance(entry, dict) or entry.get("fingerprint") != input_fingerprint:
+            return None
+        return entry.get("structure")
+
+    def save_section(self, key, text, input_fingerprint, structure=None):
+        """
+        Store a section's text and, in structured output mode, its parsed structure
+        """
+        with self._lock:
+            entry = {"text": text, "fingerprint": input_fingerprint}
+            if structure is not None:
+                entry["structure"] = structure
+            self.state["sections"][key] = entry
+            self._write()
+
+    def get_diagram(self, diagram_type, input_fingerprint):
+        """
+        Returns:
+            tuple: (plantuml_code, png_path) where png_path may be None, or None if not
+                stored or generated from different inputs
+        """
+        entry = self.state["diagrams"].get(diagram_type)
+        if not entry or entry.get("fingerprint") != input_fingerprint:
+            return None
+        png_path = os.path.join(self.path, entry["png"]) if entry.get("png") else None
+        if png_path and not os.path.exists(png_path):
+            png_path = None
+        return entry["code"], png_path
+
+    def save_diagram(self, diagram_type, plantuml_code, png_path, input_fingerprint):
+        """
+        Store a diagram's PlantUML code and, when rendered, a copy of its PNG
+        """
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            entry = {"code": plantuml_code, "fingerprint": input_fingerprint}
+            if png_path and os.path.exists(png_path):
+                entry["png"] = f"{diagram_type}.png"
+                shutil.copyfile(png_path, os.path.join(self.path, entry["png"]))
+            self.state["diagrams"][diagram_type] = entry
+            self._write()
+
+    def set_completed(self, completed):
+        """
+        Record whether the run's document was written; prune_checkpoints only removes
+        completed checkpoints. A run clears the mark when it starts
+        """
+        with self._lock:
+            if not completed and not os.path.exists(self.state_file):
+                return
+            self.state["completed"] = completed
+            self._write()
+
+    def clear(self):
+        """
+        Remove the checkpoint from disk
+        """
+        with self._lock:
+            shutil.rmtree(self.path, ignore_errors=True)
+            self.state = {"sections": {}, "diagrams": {}}
+
+    def _write(self):
+        os.makedirs(self.path, exist_ok=True)
+        temp_file = f"{self.state_file}.tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+        os.replace(temp_file, self.state_file)
@@ -0,0 +1,142 @@
+import re
+from loguru import logger
+from .rag import AgentBase, is_failed_content
+
+# Sections that can be requested together by default: each group reads the same
+# upstream sections, so one call replaces two round trips and sends the context once
+DEFAULT_SECTION_GROUPS = (
+    ("introduction", "overall_description"),
+    ("external_interfaces", "non_functional_requirements"),
+)
+
+SECTION_MARKER = "=== {key} ==="
+MARKER_PATTERN = re.compile(r'^\s*={3,}\s*([a-z_]+)\s*={3,}\s*$', re.MULTILINE)
+
+def group_dependencies(agents):
+    """
+    Upstream stages a group of section agents reads, excluding the group's own sections
+    Args:
+        agents(list): Section agents of the group, in document order
+
+    Returns:
+        tuple: Dependencies in the order the agents list them
+
+    Raises:
+        ValueError: If an agent reads a section written later in the group
+    """
+    keys = [agent.section_key for agent in agents]
+    dependencies = []
+    for position, agent in enumerate(agents):
+        for key in agent.dependencies:
+            if key in keys[position:]:
+                raise ValueError(f"{agent.section_key} cannot be combined with {key}, which it reads")
+            if key not in keys and key not in dependencies:
+                dependencies.append(key)
+    return tuple(dependencies)
+
+def split_sections(reply, keys):
+    """
+    Split a combined reply back into sections by their markers
+    Args:
+        reply(str): Text with a SECTION_MARKER line before each section
+        keys(list): Section keys that were requested
+
+    Returns:
+        dict: Section key -> text for every requested section found with content
+    """
+    sections = {}
+    if not reply:
+        return sections
+    markers = list(MARKER_PATTERN.finditer(reply))
+    for index, marker in enumerate(markers):
+        key = marker.group(1)
+        end = markers[index + 1].start() if index + 1 < len(markers) else len(reply)
+        text = reply[marker.end():end].strip()
+        if key in keys and text and key not in sections:
+            sections[key] = text
+    return sections
+
+
+class CombinedSectionsAgent(AgentBase):
+    """
+    Writes several consecutive sections with one LLM call. The reply is split back
+    into the sections' keys; sections missing from it are left to their own agents.
+    """
+    # Bump when the prompt changes so cached replies are not reused
+    prompt_version = 3
+
+    def __init__(self, agents, max_retries=5, verbose=True, backend=None):
+        """
+        Args:
+            agents(list): SectionAgents of consecutive sections, in document order
+            max_retries(int): Attempts per call
+            verbose(bool): Log prompts and replies
+            backend(LLMBackend): Backend of the agent's calls; the process-wide default if None
+        """
+        self.agents = list(agents)
+        self.section_keys = [agent.section_key for agent in self.agents]
+        super().__init__(
+            name=f"CombinedSectionsAgent[{'+'.join(self.section_keys)}]",
+            max_retries=max_retries, verbose=verbose, backend=backend
+        )
+        self.dependencies = group_dependencies(self.agents)
+        # The group shares the largest budget of its members; any unbounded member embeds contents in full
+        budgets = [agent.context_budget for agent in self.agents]
+        self.context_budget = None if None in budgets else max(budgets)
+        self.context_weights = {}
+        for agent in self.agents:
+            for key, weight in agent.context_weights.items():
+                self.context_weights[key] = max(weight, self.context_weights.get(key, 1))
+        self.logger = logger
+
+    async def execute_async(self, topic, previous_contents):
+        """
+        Args:
+            topic(str): The project description
+            previous_contents(dict): Upstream section texts the group reads
+
+        Returns:
+            dict: Section key -> text for each section the reply held; may be empty
+        """
+        briefs = []
+        for position, agent in enumerate(self.agents, start=1):
+            briefs.append(
+                f"{position}. {agent.spec.heading}: subsections {agent.spec.brief}. "
+                f"Start it with the line {SECTION_MARKER.format(key=agent.section_key)}"
+            )
+        system_message = (
+            "You are an expert system requirement specification document writer. Based on the project "
+            "description and the sections provided, write the following sections of the SRS, in this order:\n\n"
+            + "\n".join(briefs) +
+            "\n\nFormat Rules:\n"
+            "1. Put each marker line exactly as given, alone on its line, before its section.\n"
+            "2. Use clear, structured headings for each subsection with double asterisks (e.g., **2.1 Product Perspective**).\n"
+            "3. Don't write the main headings (e.g. 1. Introduction), as they have already been added.\n"
+            "4. Return ONLY the sections without any conversational preamble.\n"
+            "5. Keep later sections consistent with the earlier ones you write."
+        )
+        user_message = (
+            f"{self.outline_instruction(previous_contents)}"
+            f"Generate these {len(self.section_keys)} sections for this system."
+        )
+        messages = self.context_messages(topic, previous_contents) + [
+            self.format_message("system", system_message),
+            self.format_message("user", user_message)
+        ]
+
+        max_tokens = sum(agent.spec.max_tokens for agent in self.agents)
+        reply = await self.call_gemini_async(
+            messages, temperature=0.3, max_tokens=max_tokens, task="combined_sections"
+        )
+        found = split_sections(reply, self.section_keys)
+        sections = {}
+        for agent in self.agents:
+            text = found.get(agent.section_key)
+            # A section written on top of a group member that is regenerated separately would not match it
+            if is_failed_content(text) or any(key in self.section_keys and key not in sections for key in agent.dependencies):
+                continue
+            sections[agent.section_key] = text
+        missing = [key for key in self.section_keys if key not in sections]
+        if missing:
+            self.logger.warning(f"[{self.name}] Combined reply is missing {', '.join(missing)}; generating separately")
+        return sections
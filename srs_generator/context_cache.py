@@ -0,0 +1,168 @@
+import os
+import asyncio
+from loguru import logger
+from .rag import CONTEXT_ROLE, render_prompt
+from .budget import BudgetExceeded, RunCancelled
+from .sections import SECTIONS, content_labels
+
+def context_key(dependencies, sections=SECTIONS):
+    """
+    The context keys of a prompt reading dependencies, in the order AgentBase.context_messages
+    lays them out
+    Args:
+        dependencies(iterable): Section keys (or 'outline') the prompt reads
+        sections(list): Section registry giving the document order
+
+    Returns:
+        tuple: ('description', ...) followed by the dependencies in document order
+    """
+    dependencies = set(dependencies)
+    return ("description",) + tuple(key for key in content_labels(sections) if key in dependencies)
+
+def plan_contexts(contexts):
+    """
+    Choose the contexts worth registering: longest first, a context is planned when at
+    least two calls would reference it rather than a longer planned context
+    Args:
+        contexts(list): context_key(...) of every call the run is expected to make
+
+    Returns:
+        set: Planned context keys
+    """
+    planned = set()
+    candidates = {context[:length] for context in contexts for length in range(1, len(context) + 1)}
+    for candidate in sorted(candidates, key=len, reverse=True):
+        users = 0
+        for context in contexts:
+            served = max((len(prefix) for prefix in planned if context[:len(prefix)] == prefix), default=0)
+            if context[:len(candidate)] == candidate and served < len(candidate):
+                users += 1
+        if users >= 2:
+            planned.add(candidate)
+    return planned
+
+class ContextCache:
+    def __init__(self, contexts, min_tokens=None, ttl_seconds=600, budget=None):
+        """
+        Registers the context shared by the calls of one run with Gemini's cachedContents API,
+        so later calls reference it by name instead of uploading and prefilling it again.
+
+        Which contexts to register is planned up front from the calls the run will make (see
+        plan_contexts): e.g. the description read by the first sections, the contents read by
+        the three diagram types, or the outline every section expands in outline-first mode.
+        A planned context is registered the first time a call needs it; each call then uses
+        the longest registered context its prompt starts with and sends the rest inline.
+        Args:
+            contexts(list): context_key(...) of every call the run is expected to make
+            min_tokens(int): Smallest context worth caching, estimated at 4 characters per token;
+                GEMINI_CONTEXT_CACHE_MIN_TOKENS or 4096 if omitted (the API rejects smaller ones)
+            ttl_seconds(int): Lifetime of a registered cache; caches are deleted when the run ends
+            budget(RunBudget): Budget of the run; every registration counts as one of its calls
+        """
+        self.name = "ContextCache"
+        self.planned = plan_contexts(contexts)
+        if min_tokens is None:
+            min_tokens = int(os.getenv("GEMINI_CONTEXT_CACHE_MIN_TOKENS", "4096"))
+        self.min_tokens = min_tokens
+        self.ttl_seconds = ttl_seconds
+        self.budget = budget
+        # (backend, context key) -> (rendered text, task resolving to the cache name or None)
+        self._entries = {}
+        self._invalid = set()
+        # (backend, name) of the caches still to delete
+        self.created = []
+        self.registered = 0
+        self.hits = 0
+
+    async def prefix_for(self, messages, backend):
+        """
+        Find the cached context covering the longest prefix of messages, registering the
+        longest planned one first
+        Args:
+            messages(list): Messages of a call; context messages lead
+            backend(LLMBackend): Backend the call goes to; caches are not shared across backends
+
+        Returns:
+            tuple: (cache name, number of leading messages it holds), or None
+        """
+        context = []
+        for message in messages:
+            if message["role"] != CONTEXT_ROLE:
+                break
+            context.append(message)
+        keys = tuple(message.get("key") for message in context)
+        if not keys:
+            return None
+
+        for count in range(len(keys), 0, -1):
+            prefix = keys[:count]
+            if prefix in self.planned:
+                if (backend, prefix) not in self._entries:
+                    text = render_prompt(context[:count])
+                    if len(text) // 4 >= self.min_tokens:
+                        self._entries[backend, prefix] = (text, asyncio.ensure_future(self.create(backend, text)))
+                break
+
+        for count in range(len(keys), 0, -1):
+            entry = self._entries.get((backend, keys[:count]))
+            if entry is None:
+                continue
+            text, task = entry
+            # Shielded: a caller giving up must not cancel a registration others wait for
+            name = await asyncio.shield(task)
+            if name is not None and name not in self._invalid and text == render_prompt(context[:count]):
+                self.hits += 1
+                return name, count
+        return None
+
+    async def create(self, backend, text):
+        """
+        Register text as cached content
+        Returns:
+            str: Name of the cache, or None if it could not be created
+        """
+        if self.budget is not None:
+            try:
+                self.budget.consume_call()
+            except (BudgetExceeded, RunCancelled) as e:
+                logger.warning(f"[{self.name}] Not caching the shared context; sending it inline: {e}")
+                return None
+        try:
+            name = await backend.create_cached_content(text, self.ttl_seconds)
+        except Exception as e:
+            logger.warning(f"[{self.name}] Could not cache the shared context; sending it inline: {e}")
+            return None
+        if name is None:
+            return None
+        self.created.append((backend, name))
+        self.registered += 1
+        logger.info(f"[{self.name}] Cached the shared context as {name} (~{len(text) // 4} tokens)")
+        return name
+
+    def invalidate(self, name):
+        """
+        Stop using a cache the API no longer accepts (expired or deleted)
+        """
+        self._invalid.add(name)
+
+    async def close(self):
+        """
+        Delete the caches this run created; they would otherwise be billed until their TTL
+        """
+        for _, task in self._entries.values():
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*(task for _, task in self._entries.values()), return_exceptions=True)
+        for backend, name in self.created:
+            try:
+                await backend.delete_cached_content(name)
+            except Exception as e:
+                logger.warning(f"[{self.name}] Could not delete {name}; it expires after {self.ttl_seconds}s: {e}")
+        self.created = []
+
+    def stats(self):
+        """
+        Returns:
+            dict: Caches created and calls that referenced one
+        """
+        return {"created": self.registered, "hits": self.hits}
@@ -0,0 +1,131 @@
+import re
+
+# What a digest keeps, most important first; lines of a lower tier are only kept
+# while the budget allows
+HEADING = 0
+NAMED = 1
+BULLET = 2
+LEAD_SENTENCE = 3
+
+HEADING_PATTERN = re.compile(r'^(#+\s+.+|\*\*[^*]+\*\*:?|\d+(\.\d+)+\.?\s+\S.*)$')
+# Requirement and use case ids (FR-1, NFR 2, UC-3, REQ_4, IF-5) and the names later sections reuse
+NAMED_PATTERN = re.compile(
+    r'\b(?:FR|NFR|UC|REQ|IF|EI)[-_ ]?\d+|\b(?:actors?|interfaces?|API|endpoints?|protocols?)\b|^\s*[-*]\s+\*\*',
+    re.IGNORECASE
+)
+BULLET_PATTERN = re.compile(r'^\s*(?:[-*]|\d+[.)])\s+')
+
+def estimate_tokens(text):
+    """
+    Rough token count of text, at 4 characters per token
+    """
+    return len(text) // 4 + 1
+
+def first_clause(line, limit=160):
+    """
+    The line up to the end of its first sentence, or limit characters
+    """
+    match = re.search(r'[.;](\s|$)', line)
+    clause = line[:match.start() + 1] if match else line
+    return clause if len(clause) <= limit else clause[:limit].rstrip() + "..."
+
+def classify_line(line, paragraph_start):
+    """
+    Returns:
+        tuple: (tier, text kept for the line), or None if the line is dropped
+    """
+    stripped = line.strip()
+    if not stripped:
+        return None
+    if HEADING_PATTERN.match(stripped):
+        return HEADING, stripped
+    if NAMED_PATTERN.search(line):
+        return NAMED, first_clause(stripped)
+    if BULLET_PATTERN.match(line):
+        return BULLET, first_clause(stripped)
+    if paragraph_start:
+        return LEAD_SENTENCE, first_clause(stripped)
+    return None
+
+def digest_section(text, budget):
+    """
+    Condense a section to at most about budget tokens by extraction: headings first, then
+    lines naming requirement ids, actors and interfaces, then other bullets, then the lead
+    sentence of each paragraph. Kept lines stay in document order.
+    Args:
+        text(str): Section text
+        budget(int): Token budget
+
+    Returns:
+        str: The text itself if it fits, otherwise the digest
+    """
+    if estimate_tokens(text) <= budget:
+        return text
+
+    candidates = []
+    previous_blank = True
+    for index, line in enumerate(text.splitlines()):
+        classified = classify_line(line, previous_blank)
+        previous_blank = not line.strip()
+        if classified is not None:
+            candidates.append((classified[0], index, classified[1]))
+
+    kept = []
+    remaining = budget
+    for tier in (HEADING, NAMED, BULLET, LEAD_SENTENCE):
+        for line_tier, index, kept_text in candidates:
+            if line_tier != tier:
+                continue
+            cost = estimate_tokens(kept_text)
+            if cost <= remaining:
+                kept.append((index, kept_text))
+                remaining -= cost
+    return "\n".join(kept_text for _, kept_text in sorted(kept))
+
+def allocate_budget(sizes, weights, budget):
+    """
+    Split a token budget across sections by relevance weight. A section needing less
+    than its share gives the rest back to the others.
+    Args:
+        sizes(dict): Section key -> tokens of its full text
+        weights(dict): Section key -> relevance weight; missing keys weigh 1
+        budget(int): Total tokens for all sections
+
+    Returns:
+        dict: Section key -> token budget
+    """
+    shares = {}
+    open_keys = set(sizes)
+    remaining = budget
+    while open_keys:
+        total_weight = sum(weights.get(key, 1) for key in open_keys)
+        fitting = {
+            key for key in open_keys
+            if sizes[key] <= remaining * weights.get(key, 1) / total_weight
+        }
+        if not fitting:
+            for key in open_keys:
+                shares[key] = int(remaining * weights.get(key, 1) / total_weight)
+            break
+        for key in fitting:
+            shares[key] = sizes[key]
+            remaining -= sizes[key]
+        open_keys -= fitting
+    return shares
+
+def digest_contents(contents, budget, weights=None):
+    """
+    Bound the upstream contents a prompt embeds
+    Args:
+        contents(dict): Section key -> text
+        budget(int): Total token budget of the contents; None leaves them untouched
+        weights(dict): Section key -> relevance weight for this prompt
+
+    Returns:
+        dict: Section key -> text or digest
+    """
+    if budget is None:
+        return dict(contents)
+    sizes = {key: estimate_tokens(text) for key, text in contents.items()}
+    shares = allocate_budget(sizes, weights or {}, budget)
+    return {key: digest_section(text, shares[key]) for key, text in contents.items()}
@@ -0,0 +1,38 @@
+import asyncio
+import threading
+
+_loop = None
+_loop_lock = threading.Lock()
+
+def get_background_loop():
+    """
+    Returns the process-wide event loop used by the synchronous wrappers,
+    starting it in a daemon thread on first use
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="srs-event-loop", daemon=True)
+            thread.start()
+            _loop = loop
+        return _loop
+
+def run_sync(coro):
+    """
+    Run a coroutine to completion from synchronous code
+    Args:
+        coro(coroutine): The coroutine to run
+
+    Returns:
+        The coroutine's result; exceptions raised by the coroutine propagate
+    """
+    loop = get_background_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("run_sync() cannot be called from the background event loop; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
@@ -9,15 +9,27 @@ from docx.oxml import OxmlElement
 from docx.oxml.ns import qn
 import re
 import time
+from .sections import SECTIONS
 
 class SRSBase(ABC):
     def __init__(self, name, max_retries=2, verbose=True):
         self.name = name
         self.max_retries = max_retries
         self.verbose = verbose
-        self.doc = Document()
+        # Created on first use; writers that never write a document never pay for it
+        self._doc = None
         self.headings = []  # Track headings for TOC
 
+    @property
+    def doc(self):
+        if self._doc is None:
+            self._doc = Document()
+        return self._doc
+
+    @doc.setter
+    def doc(self, doc):
+        self._doc = doc
+
     @abstractmethod
     def create_first_page(self, user_name, file_name):
         pass
@@ -41,11 +53,19 @@ class SRSBase(ABC):
         raise Exception(f"[{self.name}] Failed to save document after {self.max_retries} retries.")
 
 class SRSConcrete(SRSBase):
-    def __init__(self, name, max_retries=2, verbose=True):
+    # Compiled once per process and shared by every writer
+    bold_pattern = re.compile(r'\*\*(.*?)\*\*|\*(.*?)\*')
+    heading_pattern = re.compile(r'^#+\s+(.*?)$', re.MULTILINE)
+    bullet_pattern = re.compile(r'^\s*[-*]\s+(.*?)$', re.MULTILINE)
+
+    def __init__(self, name, max_retries=2, verbose=True, sections=SECTIONS):
         super().__init__(name, max_retries, verbose)
-        self.bold_pattern = re.compile(r'\*\*(.*?)\*\*|\*(.*?)\*')
-        self.heading_pattern = re.compile(r'^#+\s+(.*?)$', re.MULTILINE)
-        self.bullet_pattern = re.compile(r'^\s*[-*]\s+(.*?)$', re.MULTILINE)
+        # SectionSpecs in document order, giving each section's number and heading
+        self.sections = list(sections)
+        # Sections parsed while they stream in: key -> {'text', 'pending', 'items'}
+        self.streamed_sections = {}
+        # Sections generated as structured JSON: key -> (text, items)
+        self.structured_sections = {}
 
     def add_table_of_contents(self):
         """Insert a Table of Contents field at the beginning of the document."""
@@ -131,6 +151,60 @@ class SRSConcrete(SRSBase):
 
         return formatted_paragraphs
 
+    def feed_section(self, key, chunk):
+        """
+        Consume a streamed chunk of a section, parsing every paragraph as soon as it is complete
+        Args:
+            key(str): Section key
+            chunk(str): Next piece of text, or None to discard what was streamed so far
+        """
+        if not any(spec.key == key for spec in self.sections):
+            return
+        if chunk is None:
+            self.streamed_sections.pop(key, None)
+            return
+        stream = self.streamed_sections.setdefault(key, {'text': '', 'pending': '', 'items': []})
+        stream['text'] += chunk
+        stream['pending'] += chunk
+        if '\n\n' in stream['pending']:
+            complete, stream['pending'] = stream['pending'].rsplit('\n\n', 1)
+            stream['items'].extend(self.parse_markdown_text(complete))
+
+    def finish_section(self, key, text):
+        """
+        Parse the tail of a streamed section, or drop the stream if the final text differs
+        (e.g. a reused checkpoint or a failure placeholder)
+        """
+        stream = self.streamed_sections.get(key)
+        if stream is None:
+            return
+        if stream['text'] != text:
+            del self.streamed_sections[key]
+            return
+        stream['items'].extend(self.parse_markdown_text(stream['pending']))
+        stream['pending'] = ''
+
+    def set_structure(self, key, text, structure):
+        """
+        Build a section from its parsed structure (see section_schema) instead of parsing its
+        text; subsection titles become level 2 headings
+        Args:
+            key(str): Section key
+            text(str): Section text rendered from the structure; the structure is only used
+                while the section's content still equals it
+            structure(dict): {'subsections': [{'number', 'title', 'paragraphs', 'bullets', 'requirements'}]}
+        """
+        items = []
+        for subsection in structure['subsections']:
+            items.append({'type': 'subsection', 'text': f"{subsection['number']} {subsection['title']}".strip()})
+            items.extend({'type': 'paragraph', 'text': text} for text in subsection['paragraphs'])
+            points = list(subsection['bullets'])
+            points.extend(f"**{item['id']}**: {item['text']}" if item['id'] else item['text']
+                          for item in subsection['requirements'])
+            if points:
+                items.append({'type': 'bullets', 'points': points})
+        self.structured_sections[key] = (text, items)
+
     def add_formatted_text(self, paragraph, text):
         """Add text to paragraph with bold formatting"""
         if not isinstance(text, str):
@@ -162,17 +236,8 @@ class SRSConcrete(SRSBase):
             # Add page break
             self.doc.add_page_break()
 
-            # Define section order and numbers
-            section_order = [
-                ('introduction', '1'),
-                ('overall_description', '2'),
-                ('system_features', '3'),
-                ('external_interfaces', '4'),
-                ('non_functional_requirements', '5'),
-                ('use_cases', '6'),
-            ]
-
-            for key, section_num in section_order:
+            for spec in self.sections:
+                key = spec.key
                 if key not in content:
                     continue
                 section_content = content[key]
@@ -196,14 +261,25 @@ class SRSConcrete(SRSBase):
                 logger.info(f"[{self.name}] Writing section '{key}' with content: {repr(section_content)[:200]}")
                 
 
-                formatted_content = self.parse_markdown_text(section_content)
+                structured = self.structured_sections.get(key)
+                stream = self.streamed_sections.get(key)
+                if structured is not None and structured[0] == section_content:
+                    formatted_content = structured[1]
+                elif stream is not None and stream['text'] == section_content and not stream['pending']:
+                    # Already parsed chunk by chunk while the section was generated
+                    formatted_content = stream['items']
+                else:
+                    formatted_content = self.parse_markdown_text(section_content)
 
                 # Add numbered heading
-                self.doc.add_heading(f"{section_num}. {key.replace('_', ' ').title()}", level=1)
+                self.doc.add_heading(spec.heading, level=1)
 
-                # Only add paragraphs and bullets, skip subheadings from LLM output
+                # Only add paragraphs and bullets, skip subheadings from LLM output;
+                # subsections of a structured section are known to be real
                 for item in formatted_content:
-                    if item['type'] == 'paragraph':
+                    if item['type'] == 'subsection':
+                        self.doc.add_heading(item['text'], level=2)
+                    elif item['type'] == 'paragraph':
                         para = self.doc.add_paragraph()
                         self.add_formatted_text(para, item['text'])
                     elif item['type'] == 'bullets':
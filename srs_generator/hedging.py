@@ -0,0 +1,201 @@
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+
+class HedgePolicy:
+    def __init__(self, percentile=95, max_ratio=0.1, min_samples=20, window=200, min_delay=0.05, burst=10):
+        """
+        When to send a duplicate of a slow LLM request. A request still unanswered after
+        the given percentile of the recent latencies of its agent and task is sent again;
+        the first reply wins and the other request is cancelled. Until a key has enough
+        latencies of its own, the recent latencies of all keys are used instead, so a new
+        process or agent does not leave its first slow requests unhedged.
+        Args:
+            percentile(float): Latency percentile after which a request is hedged
+            max_ratio(float): Hedged requests allowed per request sent, e.g. 0.1 for at most
+                10% extra request volume
+            min_samples(int): Latencies observed, for the key or across all keys, before
+                requests are hedged
+            window(int): Recent latencies kept per key
+            min_delay(float): Smallest delay before a hedge in seconds
+            burst(int): Most hedges the allowance can save up for a burst of slow requests;
+                the allowance starts full
+        """
+        self.percentile = percentile
+        self.max_ratio = max_ratio
+        self.min_samples = min_samples
+        self.window = window
+        self.min_delay = min_delay
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._latencies = {}
+        self._pooled = deque(maxlen=window)
+        # Token bucket: every request adds max_ratio tokens, every hedge takes one, so hedges
+        # never exceed max_ratio of the requests plus the starting burst
+        self._tokens = float(burst)
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def record(self, key, latency):
+        """
+        Add the latency of a completed request
+        Args:
+            key(str): Agent and task of the request
+            latency(float): Seconds the request took; for a cancelled request, the seconds it ran
+        """
+        with self._lock:
+            self._latencies.setdefault(key, deque(maxlen=self.window)).append(latency)
+            self._pooled.append(latency)
+
+    def delay_for(self, key):
+        """
+        Returns:
+            float: Seconds to wait for a request of key before hedging it, or None while
+                too few latencies have been observed
+        """
+        with self._lock:
+            latencies = self._latencies.get(key, ())
+            if len(latencies) < self.min_samples:
+                latencies = self._pooled
+            latencies = sorted(latencies)
+        if len(latencies) < self.min_samples:
+            return None
+        index = min(len(latencies) - 1, int(len(latencies) * self.percentile / 100))
+        return max(self.min_delay, latencies[index])
+
+    def on_request(self):
+        """
+        Count a request sent and earn its share of the hedge allowance
+        """
+        with self._lock:
+            self.requests += 1
+            self._tokens = min(float(self.burst), self._tokens + self.max_ratio)
+
+    def try_hedge(self):
+        """
+        Returns:
+            bool: True if a hedge may be sent now; it is then counted against the cap
+        """
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            self.hedges += 1
+            return True
+
+    def release_hedge(self):
+        """
+        Return the allowance of a hedge that was granted but not sent
+        """
+        with self._lock:
+            self._tokens += 1
+            self.hedges -= 1
+
+    def on_hedge_won(self):
+        with self._lock:
+            self.hedge_wins += 1
+
+    def stats(self):
+        """
+        Returns:
+            dict: Requests seen, hedges sent and hedges whose reply won
+        """
+        with self._lock:
+            return {"requests": self.requests, "hedges": self.hedges, "hedge_wins": self.hedge_wins}
+
+
+async def hedged(policy, key, make_request, make_hedge=None):
+    """
+    Run a request, sending a duplicate if it is still unanswered after the policy's delay.
+    Latencies are measured from the moment the request is made, so make_request and
+    make_hedge should return awaitables of the exchange with the backend alone, not of
+    any local queueing before it
+    Args:
+        policy(HedgePolicy): Hedging policy; None runs the request alone
+        key(str): Agent and task of the request, whose latency history sets the delay
+        make_request(callable): Returns an awaitable of the request
+        make_hedge(callable): Called right before a hedge is sent; returns an awaitable of
+            the duplicate, or None to skip it, e.g. when the run's call budget is spent.
+            Defaults to make_request
+
+    Returns:
+        tuple: (result of the request that answered first, True if it was the hedge)
+
+    Raises:
+        Exception: The error of the last request to fail, if none succeeded
+    """
+    if policy is None:
+        return await make_request(), False
+    policy.on_request()
+    delay = policy.delay_for(key)
+
+    async def timed(request):
+        started = time.perf_counter()
+        try:
+            result = await request
+        except asyncio.CancelledError:
+            # A request cancelled after running this long would have taken at least this long
+            policy.record(key, time.perf_counter() - started)
+            raise
+        # Failures are left out: a fast error says nothing about how long a reply takes
+        policy.record(key, time.perf_counter() - started)
+        return result
+
+    if delay is None:
+        return await timed(make_request()), False
+
+    primary = asyncio.ensure_future(timed(make_request()))
+    pending = {primary}
+    try:
+        done, _ = await asyncio.wait(pending, timeout=delay)
+        if not done and policy.try_hedge():
+            hedge = (make_hedge or make_request)()
+            if hedge is not None:
+                pending.add(asyncio.ensure_future(timed(hedge)))
+            else:
+                policy.release_hedge()
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            succeeded = [task for task in done if task.exception() is None]
+            if succeeded:
+                won_by_hedge = primary not in succeeded
+                if won_by_hedge:
+                    policy.on_hedge_won()
+                return succeeded[0].result(), won_by_hedge
+            error = next(iter(done)).exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+_policy = None
+_policy_loaded = False
+_policy_lock = threading.Lock()
+
+def get_hedge_policy():
+    """
+    Returns the process-wide default hedge policy, or None when hedging is off. It is on
+    when GEMINI_HEDGE_PERCENTILE is set; GEMINI_HEDGE_MAX_RATIO caps the extra requests
+    (default 0.1)
+    """
+    global _policy, _policy_loaded
+    with _policy_lock:
+        if not _policy_loaded:
+            percentile = os.getenv("GEMINI_HEDGE_PERCENTILE")
+            if percentile:
+                _policy = HedgePolicy(float(percentile), float(os.getenv("GEMINI_HEDGE_MAX_RATIO", "0.1")))
+            _policy_loaded = True
+        return _policy
+
+def set_hedge_policy(policy):
+    """
+    Replace the process-wide default hedge policy; None turns hedging off
+    """
+    global _policy, _policy_loaded
+    with _policy_lock:
+        _policy = policy
+        _policy_loaded = True
@@ -0,0 +1,100 @@
+import os
+import ssl
+import asyncio
+import threading
+import certifi
+import httpx
+from loguru import logger
+from .event_loop import run_sync
+
+# Gemini can take well over a minute on long sections, so only the read timeout is generous
+CONNECT_TIMEOUT = float(os.getenv("GEMINI_CONNECT_TIMEOUT", "10"))
+READ_TIMEOUT = float(os.getenv("GEMINI_READ_TIMEOUT", "120"))
+MAX_CONNECTIONS = int(os.getenv("GEMINI_MAX_CONNECTIONS", "100"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("GEMINI_MAX_KEEPALIVE_CONNECTIONS", "20"))
+KEEPALIVE_EXPIRY = 60
+
+_ssl_context = None
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_ssl_context():
+    """
+    Returns the process-wide SSL context; building one costs tens of milliseconds of CPU.
+    GEMINI_CA_BUNDLE overrides the CA file, e.g. behind a proxy or for a local TLS stub
+    """
+    global _ssl_context
+    if _ssl_context is None:
+        _ssl_context = ssl.create_default_context(cafile=os.getenv("GEMINI_CA_BUNDLE") or certifi.where())
+    return _ssl_context
+
+def get_http_client():
+    """
+    Returns the pooled keep-alive client shared by every agent running on the current
+    event loop. Connections belong to the loop that opened them, so each loop gets its
+    own client; the synchronous wrappers all run on the background loop and share one.
+
+    Returns:
+        httpx.AsyncClient: Client with connect/read timeouts and pool limits
+    """
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        # Forget clients of loops that have been closed, e.g. by earlier asyncio.run() calls
+        for stale in [other for other in _clients if other.is_closed()]:
+            del _clients[stale]
+        client = _clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                verify=get_ssl_context(),
+                timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=MAX_CONNECTIONS,
+                    max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=KEEPALIVE_EXPIRY
+                )
+            )
+            _clients[loop] = client
+        return client
+
+async def close_http_client_async():
+    """
+    Close the current loop's shared client; the next request opens a new one
+    """
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        client = _clients.pop(loop, None)
+    if client is not None:
+        await client.aclose()
+
+def warmup(base_url=None, connections=1):
+    """
+    Synchronous wrapper around warmup_async, warming the client used by generate_srs
+    """
+    return run_sync(warmup_async(base_url, connections))
+
+async def warmup_async(base_url=None, connections=1):
+    """
+    Open connections to the Gemini endpoint ahead of the first request, so the TCP and
+    TLS handshakes are not paid by the first section
+    Args:
+        base_url(str): Endpoint to connect to; defaults to GEMINI_API_BASE_URL
+        connections(int): Number of pooled connections to open
+
+    Returns:
+        bool: True if the endpoint was reached
+    """
+    from .llm_backend import DEFAULT_GEMINI_API_BASE_URL
+
+    base_url = base_url or os.getenv("GEMINI_API_BASE_URL", DEFAULT_GEMINI_API_BASE_URL)
+    client = get_http_client()
+    # Any response, even a 404, leaves a handshaken connection in the pool
+    results = await asyncio.gather(
+        *(client.head(base_url) for _ in range(max(1, connections))),
+        return_exceptions=True
+    )
+    errors = [result for result in results if isinstance(result, Exception)]
+    if errors:
+        logger.warning(f"[HTTPClient] Warm-up of {base_url} failed: {errors[0]}")
+        return False
+    logger.info(f"[HTTPClient] Warmed up {len(results)} connection(s) to {base_url}")
+    return True
@@ -0,0 +1,562 @@
+import os
+import re
+import json
+import zlib
+import itertools
+import random
+import asyncio
+import threading
+import weakref
+import httpx
+from abc import ABC, abstractmethod
+from .http_client import get_http_client
+from .rate_limiter import get_rate_limiter
+from .model_routing import GEMINI_DEFAULT_ROUTES
+
+DEFAULT_GEMINI_API_BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
+GEMINI_MODEL = "gemini-2.0-flash"
+
+def render_prompt(messages):
+    """
+    Combine messages into a single prompt text
+    """
+    return "".join(f"{msg['role'].capitalize()}: {msg['content']}\n\n" for msg in messages)
+
+def render_contents(messages):
+    """
+    Gemini contents for messages: each assistant message is a model turn of its own, and
+    the messages between them are combined into one user turn with render_prompt
+    """
+    contents, pending = [], []
+    for message in messages:
+        if message["role"] != "assistant":
+            pending.append(message)
+            continue
+        if pending:
+            contents.append({"role": "user", "parts": [{"text": render_prompt(pending)}]})
+            pending = []
+        contents.append({"role": "model", "parts": [{"text": message["content"]}]})
+    if pending:
+        contents.append({"role": "user", "parts": [{"text": render_prompt(pending)}]})
+    return contents
+
+def estimate_tokens(text):
+    """
+    Rough token count of text, at 4 characters per token
+    """
+    return len(text) // 4
+
+class LLMBackend(ABC):
+    """
+    The model every agent call goes through. Agents only build messages; a backend turns
+    them into a reply. Failures are raised as httpx exceptions (HTTPStatusError with the
+    status, TimeoutException, TransportError) or ValueError for an unusable reply, so the
+    retry policy and circuit breaker treat every backend alike.
+    """
+    name = "LLMBackend"
+    # Route per task for calls no configured route or section model covers
+    default_routes = {}
+
+    def __init__(self, model):
+        self.model = model
+        self._variants = {}
+        self._variants_lock = threading.Lock()
+
+    @property
+    def endpoint(self):
+        """
+        Identity of the service behind the backend; backends sharing one share a circuit breaker
+        """
+        return f"{self.name}:{self.model}"
+
+    @abstractmethod
+    async def generate(self, messages, temperature=0.3, max_tokens=150, on_text=None, cached_content=None,
+                       response_schema=None, reserved_tokens=None):
+        """
+        One attempt at generating a reply
+        Args:
+            messages(list): A list of message dictionaries with 'role' and 'content' keys
+            temperature(float): Sampling temperature for generation
+            max_tokens(int): Maximum number of tokens in the response
+            on_text(callable): Stream the reply, calling on_text with each text chunk as it arrives
+            cached_content(tuple): (name, count) of a context cache holding the first count messages
+            response_schema(dict): Constrain the reply to JSON following this schema
+            reserved_tokens(int): What reserve returned for this request, when the caller has
+                already waited for the local quota; None waits for it here
+
+        Returns:
+            tuple: (reply text, usageMetadata dict, finish reason)
+        """
+
+    async def reserve(self, messages, max_tokens):
+        """
+        Wait until the backend's local quota has room for a request. The wait is local
+        queueing, so callers keep it out of request timeouts and latencies
+        Returns:
+            int: Tokens reserved, to pass to generate as reserved_tokens
+        """
+        return 0
+
+    def try_reserve(self, messages, max_tokens):
+        """
+        Reserve room for a request only if the local quota has it right now
+        Returns:
+            int: Tokens reserved, or None if the request would have to wait
+        """
+        return 0
+
+    def release(self, reserved_tokens):
+        """
+        Give back a reservation of a request that was not sent
+        """
+
+    def with_model(self, model):
+        """
+        The same kind of backend, configured alike, for another model. Variants are kept,
+        so every call routed to a model shares one backend
+        Args:
+            model(str): Model name
+
+        Returns:
+            LLMBackend: The backend for model
+        """
+        with self._variants_lock:
+            if model not in self._variants:
+                self._variants[model] = self.copy_for_model(model)
+            return self._variants[model]
+
+    def copy_for_model(self, model):
+        """
+        Create the backend with_model returns
+        """
+        raise NotImplementedError(f"{type(self).__name__} cannot switch to model {model}")
+
+    async def create_cached_content(self, text, ttl_seconds):
+        """
+        Register text as cached context
+        Returns:
+            str: Name to pass as cached_content, or None if the backend has no context cache
+        """
+        return None
+
+    async def delete_cached_content(self, name):
+        pass
+
+    def on_rate_limited(self, error):
+        """
+        Called when an attempt was rejected with 429
+        """
+
+class GeminiBackend(LLMBackend):
+    name = "gemini"
+    default_routes = GEMINI_DEFAULT_ROUTES
+
+    def __init__(self, model=GEMINI_MODEL, base_url=None, api_key=None):
+        """
+        Gemini's generateContent API over the pooled HTTP client, within the shared rate limiter
+        Args:
+            model(str): Gemini model name
+            base_url(str): API root; GEMINI_API_BASE_URL or the public endpoint if omitted
+            api_key(str): API key; GEMINI_API_KEY if omitted
+        """
+        super().__init__(model)
+        self._base_url = base_url
+        self._api_key = api_key
+        self.rate_limiter = get_rate_limiter()
+
+    @property
+    def base_url(self):
+        return (self._base_url or os.getenv('GEMINI_API_BASE_URL', DEFAULT_GEMINI_API_BASE_URL)).rstrip('/')
+
+    @property
+    def endpoint(self):
+        # Models have their own capacity; one being overloaded must not stop calls to a fallback
+        return f"{self.base_url}/models/{self.model}"
+
+    def copy_for_model(self, model):
+        return GeminiBackend(model, self._base_url, self._api_key)
+
+    def api_key(self):
+        api_key = self._api_key or os.getenv('GEMINI_API_KEY')
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY environment variable not set")
+        return api_key
+
+    def build_request(self, messages, temperature=0.3, max_tokens=150, stream=False, cached_content=None,
+                      response_schema=None):
+        """
+        Build the URL, headers and payload of a Gemini generateContent request
+        Args:
+            messages(list): A list of message dictionaries with 'role' and 'content' keys
+            temperature(float): Sampling temperature for generation
+            max_tokens(int): Maximum number of tokens in the response
+            stream(bool): Target streamGenerateContent, which sends the reply as server-sent events
+            cached_content(tuple): (name, count) of a context cache holding the first count
+                messages; they are referenced by name instead of being sent again
+            response_schema(dict): Ask for JSON following this schema (responseSchema)
+
+        Returns:
+            tuple: (url, headers, payload, prompt)
+        """
+        api_key = self.api_key()
+        if stream:
+            url = f"{self.base_url}/models/{self.model}:streamGenerateContent?alt=sse&key={api_key}"
+        else:
+            url = f"{self.base_url}/models/{self.model}:generateContent?key={api_key}"
+        headers = {'Content-Type': 'application/json'}
+
+        if cached_content is not None:
+            name, count = cached_content
+            messages = messages[count:]
+        prompt = render_prompt(messages)
+
+        # A partial reply being continued is sent as the model's own turn, so the model picks
+        # it up where it stopped instead of reading it as quoted text
+        payload = {
+            "contents": render_contents(messages),
+            "generationConfig": {
+                "temperature": temperature,
+                "maxOutputTokens": max_tokens
+            }
+        }
+        if cached_content is not None:
+            payload["cachedContent"] = name
+        if response_schema is not None:
+            payload["generationConfig"]["responseMimeType"] = "application/json"
+            payload["generationConfig"]["responseSchema"] = response_schema
+        return url, headers, payload, prompt
+
+    async def generate(self, messages, temperature=0.3, max_tokens=150, on_text=None, cached_content=None,
+                       response_schema=None, reserved_tokens=None):
+        url, headers, payload, _ = self.build_request(
+            messages, temperature, max_tokens, on_text is not None, cached_content, response_schema
+        )
+        if reserved_tokens is None:
+            reserved_tokens = await self.reserve(messages, max_tokens)
+        # Pooled keep-alive client shared by all agents on this loop
+        client = get_http_client()
+        if on_text is not None:
+            reply, usage, finish_reason, response = await self.stream(client, url, headers, payload, on_text)
+        else:
+            reply, usage, finish_reason, response = await self.send(client, url, headers, payload)
+        self.rate_limiter.on_success(response.headers, reserved_tokens, usage.get('totalTokenCount'))
+        return reply, usage, finish_reason
+
+    def reservation_size(self, messages, max_tokens):
+        # Reserved against the token quota; cached tokens still count towards it
+        return estimate_tokens(render_prompt(messages)) + max_tokens
+
+    async def reserve(self, messages, max_tokens):
+        reserved_tokens = self.reservation_size(messages, max_tokens)
+        await self.rate_limiter.acquire(reserved_tokens)
+        return reserved_tokens
+
+    def try_reserve(self, messages, max_tokens):
+        reserved_tokens = self.reservation_size(messages, max_tokens)
+        return reserved_tokens if self.rate_limiter.try_acquire(reserved_tokens) else None
+
+    def release(self, reserved_tokens):
+        self.rate_limiter.release(reserved_tokens)
+
+    async def send(self, client, url, headers, payload):
+        """
+        Returns:
+            tuple: (text of the first candidate, usageMetadata dict, finishReason, response)
+
+        Raises:
+            httpx.HTTPStatusError: On non-2xx responses
+        """
+        response = await client.post(url, headers=headers, json=payload)
+        response.raise_for_status()
+
+        json_response = response.json()
+        candidate = json_response['candidates'][0]
+        reply = candidate['content']['parts'][0]['text']
+        usage = json_response.get('usageMetadata', {})
+        return reply, usage, candidate.get('finishReason'), response
+
+    async def stream(self, client, url, headers, payload, on_text):
+        """
+        Returns:
+            tuple: (concatenated text of the first candidate, usageMetadata dict, finishReason, response)
+
+        Raises:
+            httpx.HTTPStatusError: On non-2xx responses
+            ValueError: If the stream carried no text
+        """
+        chunks = []
+        usage = {}
+        finish_reason = None
+        async with client.stream("POST", url, headers=headers, json=payload) as response:
+            if response.is_error:
+                await response.aread()
+                response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                event = json.loads(line[len("data:"):])
+                usage = event.get("usageMetadata", usage)
+                for candidate in event.get("candidates", [])[:1]:
+                    finish_reason = candidate.get("finishReason", finish_reason)
+                    for part in candidate.get("content", {}).get("parts", []):
+                        if part.get("text"):
+                            chunks.append(part["text"])
+                            on_text(part["text"])
+
+        if not chunks:
+            raise ValueError("Streamed response contained no text")
+        return "".join(chunks), usage, finish_reason, response
+
+    async def create_cached_content(self, text, ttl_seconds):
+        payload = {
+            "model": f"models/{self.model}",
+            "contents": [{"role": "user", "parts": [{"text": text}]}],
+            "ttl": f"{ttl_seconds}s"
+        }
+        # Registrations count against the same request and token quota as generation
+        await self.rate_limiter.acquire(estimate_tokens(text))
+        response = await get_http_client().post(f"{self.base_url}/cachedContents?key={self.api_key()}", json=payload)
+        if response.status_code == 429:
+            self.rate_limiter.on_rate_limited(response.headers, response.text)
+        response.raise_for_status()
+        return response.json()["name"]
+
+    async def delete_cached_content(self, name):
+        response = await get_http_client().delete(f"{self.base_url}/{name}?key={self.api_key()}")
+        response.raise_for_status()
+
+    def on_rate_limited(self, error):
+        # The shared limiter pauses every agent until the server's retry delay has passed
+        self.rate_limiter.on_rate_limited(error.response.headers, error.response.text)
+
+FAKE_SECTION_REPLY = """**{heading}**
+
+This content was produced by the fake backend for prompt {digest}.
+
+- First requirement of the section
+- Second requirement of the section
+
+@startuml
+actor User
+User -> System: Request
+System --> User: Response
+@enduml"""
+
+class FakeBackend(LLMBackend):
+    name = "fake"
+
+    def __init__(self, model="fake", latency=0.0, tokens_per_second=None, max_concurrency=None, errors=None,
+                 seed=0, reply=None, prefill_tokens_per_second=None, structured_reply=None):
+        """
+        Deterministic local model for offline runs, benchmarks and load tests
+        Args:
+            model(str): Model name reported in cache keys and metrics
+            latency(float): Seconds before the first token (prefill and queueing)
+            tokens_per_second(float): Generation speed; None generates instantly
+            max_concurrency(int): Replies generated at once per event loop, like a server's batch size;
+                further calls queue. None is unlimited
+            errors(dict): Injected failures per attempt: probability keyed by an HTTP status
+                (e.g. 429, 503) or 'timeout', 'network' or 'malformed'
+            seed(int): Seed of the error injection
+            reply(callable): reply(prompt) -> text; defaults to a section with a PlantUML block,
+                or VALID for diagram validation prompts. Replies longer than a request's
+                max_tokens are cut off there with finish reason MAX_TOKENS
+            structured_reply(callable): structured_reply(prompt) -> dict returned as JSON when a
+                response schema is requested; defaults to one subsection
+            prefill_tokens_per_second(float): Prompt processing speed for tokens not served from
+                a context cache; None processes prompts instantly
+        """
+        super().__init__(model)
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.prefill_tokens_per_second = prefill_tokens_per_second
+        self.max_concurrency = max_concurrency
+        self.errors = dict(errors or {})
+        self.reply = reply or self.default_reply
+        self.structured_reply = structured_reply or self.default_structured_reply
+        self._seed = seed
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._semaphores = weakref.WeakKeyDictionary()
+        self.cached_contents = {}
+        self._cache_ids = itertools.count(1)
+        self.calls = 0
+        self.injected_errors = 0
+
+    @classmethod
+    def from_env(cls):
+        """
+        FakeBackend configured from SRS_FAKE_LATENCY, SRS_FAKE_TOKENS_PER_SECOND,
+        SRS_FAKE_MAX_CONCURRENCY and SRS_FAKE_ERRORS (e.g. "503:0.05,timeout:0.01")
+        """
+        errors = {}
+        for item in filter(None, os.getenv("SRS_FAKE_ERRORS", "").split(",")):
+            kind, probability = item.split(":")
+            errors[int(kind) if kind.strip().isdigit() else kind.strip()] = float(probability)
+        tokens_per_second = os.getenv("SRS_FAKE_TOKENS_PER_SECOND")
+        max_concurrency = os.getenv("SRS_FAKE_MAX_CONCURRENCY")
+        return cls(
+            latency=float(os.getenv("SRS_FAKE_LATENCY", "0")),
+            tokens_per_second=float(tokens_per_second) if tokens_per_second else None,
+            max_concurrency=int(max_concurrency) if max_concurrency else None,
+            errors=errors
+        )
+
+    def copy_for_model(self, model):
+        return FakeBackend(
+            model, self.latency, self.tokens_per_second, self.max_concurrency, self.errors, self._seed,
+            self.reply, self.prefill_tokens_per_second, self.structured_reply
+        )
+
+    def default_reply(self, prompt):
+        if "validator" in prompt:
+            return "VALID"
+        # crc32 rather than hash(): the reply must not change between processes
+        digest = zlib.crc32(prompt.encode("utf-8"))
+        # Combined section prompts get one section after each marker they ask for
+        markers = re.findall(r"subsections (\d+\.\w+ [A-Z][A-Za-z ]+).*line (=== [a-z_]+ ===)", prompt)
+        if markers:
+            return "\n\n".join(
+                f"{marker}\n" + FAKE_SECTION_REPLY.format(heading=heading, digest=f"{digest:08x}")
+                for heading, marker in markers
+            )
+        # Repair prompts get a short part after each marker they ask for
+        parts = re.findall(r"^\d+\. (.+): start it with the line (=== part \d+ ===)$", prompt, re.MULTILINE)
+        if parts:
+            return "\n\n".join(
+                f"{marker}\n**{heading}**\n\nThis part was produced by the fake backend for prompt {digest:08x}."
+                for heading, marker in parts
+            )
+        headings = re.findall(r"\d+\.1 [A-Z][A-Za-z ]+", prompt)
+        heading = headings[-1] if headings else "1.1 Overview"
+        return FAKE_SECTION_REPLY.format(heading=heading, digest=f"{digest:08x}")
+
+    def default_structured_reply(self, prompt):
+        headings = re.findall(r"(\d+\.1) ([A-Z][A-Za-z ]+)", prompt)
+        number, title = headings[-1] if headings else ("1.1", "Overview")
+        digest = zlib.crc32(prompt.encode("utf-8"))
+        return {"subsections": [{
+            "number": number,
+            "title": title.strip(),
+            "paragraphs": [f"This content was produced by the fake backend for prompt {digest:08x}."],
+            "bullets": ["First point of the subsection"],
+            "requirements": [{"id": "FR-1", "text": "The system shall do what the subsection describes."}]
+        }]}
+
+    def semaphore(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if loop not in self._semaphores:
+                self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+            return self._semaphores[loop]
+
+    def inject_error(self):
+        with self._lock:
+            self.calls += 1
+            for kind, probability in self.errors.items():
+                if self._random.random() < probability:
+                    self.injected_errors += 1
+                    return kind
+        return None
+
+    async def generate(self, messages, temperature=0.3, max_tokens=150, on_text=None, cached_content=None,
+                       response_schema=None, reserved_tokens=None):
+        request = httpx.Request("POST", f"fake://{self.model}/generateContent")
+        cached_text = ""
+        if cached_content is not None:
+            name, count = cached_content
+            cached_text = self.cached_contents.get(name)
+            if cached_text is None:
+                raise httpx.HTTPStatusError(
+                    "CachedContent not found", request=request, response=httpx.Response(404, request=request)
+                )
+            messages = messages[count:]
+        prompt = render_prompt(messages)
+
+        error = self.inject_error()
+        if error == "timeout":
+            await asyncio.sleep(self.latency)
+            raise httpx.ReadTimeout("Injected timeout", request=request)
+        if error == "network":
+            raise httpx.ConnectError("Injected connection failure", request=request)
+        if isinstance(error, int):
+            await asyncio.sleep(self.latency)
+            raise httpx.HTTPStatusError(
+                f"Injected {error}", request=request, response=httpx.Response(error, request=request)
+            )
+
+        if response_schema is not None:
+            text = json.dumps(self.structured_reply(cached_text + prompt))
+        elif len(messages) > 2 and messages[-2]["role"] == "assistant" and messages[-1]["role"] == "user":
+            # A request continuing a cut-off reply gets the rest of the reply it was cut from
+            partial = messages[-2]["content"]
+            text = self.reply(cached_text + render_prompt(messages[:-2]))
+            text = text[len(partial):] if text.startswith(partial) else text
+        else:
+            text = self.reply(cached_text + prompt)
+        # Like a model, stop at the token limit
+        finish_reason = "STOP"
+        if estimate_tokens(text) > max_tokens:
+            text = text[:max_tokens * 4]
+            finish_reason = "MAX_TOKENS"
+        pieces = re.split(r"(?<=\n\n)", text)
+        prefill = estimate_tokens(prompt) / self.prefill_tokens_per_second if self.prefill_tokens_per_second else 0.0
+        if self.max_concurrency:
+            async with self.semaphore():
+                await self.produce(prefill, pieces, on_text)
+        else:
+            await self.produce(prefill, pieces, on_text)
+        if error == "malformed":
+            raise ValueError("Injected malformed reply")
+
+        cached_tokens = estimate_tokens(cached_text)
+        usage = {
+            "promptTokenCount": estimate_tokens(prompt) + cached_tokens,
+            "candidatesTokenCount": estimate_tokens(text),
+            "totalTokenCount": estimate_tokens(prompt) + cached_tokens + estimate_tokens(text)
+        }
+        if cached_tokens:
+            usage["cachedContentTokenCount"] = cached_tokens
+        return text, usage, finish_reason
+
+    async def produce(self, prefill, pieces, on_text):
+        await asyncio.sleep(self.latency + prefill)
+        for piece in pieces:
+            if self.tokens_per_second:
+                await asyncio.sleep(max(1, estimate_tokens(piece)) / self.tokens_per_second)
+            if on_text is not None:
+                on_text(piece)
+
+    async def create_cached_content(self, text, ttl_seconds):
+        with self._lock:
+            name = f"cachedContents/fake{next(self._cache_ids)}"
+            self.cached_contents[name] = text
+        return name
+
+    async def delete_cached_content(self, name):
+        self.cached_contents.pop(name, None)
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_backend():
+    """
+    Returns the process-wide default backend: SRS_LLM_BACKEND=fake selects a FakeBackend
+    configured from the environment, anything else Gemini
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if os.getenv("SRS_LLM_BACKEND", "gemini").lower() == "fake":
+                _backend = FakeBackend.from_env()
+            else:
+                _backend = GeminiBackend()
+        return _backend
+
+def set_backend(backend):
+    """
+    Replace the process-wide default backend, used by agents created without one
+    """
+    global _backend
+    with _backend_lock:
+        _backend = backend
@@ -0,0 +1,223 @@
+import time
+import threading
+from collections import deque
+from .model_routing import call_cost
+
+# Upper bounds of the latency histogram in seconds
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80)
+
+class CallMetric:
+    def __init__(self, agent, run_id, outcome, latency, attempts=0, prompt_tokens=0, response_tokens=0,
+                 finish_reason=None, cached_tokens=0, task=None, model=None):
+        """
+        One logical LLM call as seen by an agent
+        Args:
+            agent(str): Name of the calling agent
+            run_id(str): Run the call belongs to, None outside a run
+            outcome(str): ok, failed, cache_hit, shared, budget_exhausted or circuit_open
+            latency(float): Seconds from the call to its result, including retries and rate-limit waits
+            attempts(int): HTTP attempts made
+            prompt_tokens(int): promptTokenCount from usageMetadata, including cached tokens
+            response_tokens(int): candidatesTokenCount from usageMetadata
+            finish_reason(str): finishReason of the reply, e.g. STOP or MAX_TOKENS
+            cached_tokens(int): cachedContentTokenCount, prompt tokens served from a context cache
+            task(str): Routing task of the call, e.g. a section key or validate_diagram
+            model(str): Model the call was routed to
+        """
+        self.agent = agent
+        self.run_id = run_id
+        self.outcome = outcome
+        self.latency = latency
+        self.attempts = attempts
+        self.prompt_tokens = prompt_tokens
+        self.response_tokens = response_tokens
+        self.finish_reason = finish_reason
+        self.cached_tokens = cached_tokens
+        self.task = task
+        self.model = model
+        self.cost = call_cost(model, prompt_tokens, response_tokens, cached_tokens)
+        self.timestamp = time.time()
+
+    @property
+    def route(self):
+        """
+        '<task>:<model>', the label calls are grouped by per route
+        """
+        return f"{self.task}:{self.model}"
+
+    def as_dict(self):
+        return dict(vars(self))
+
+def aggregate(metrics):
+    """
+    Summarise calls per agent
+    Args:
+        metrics(iterable): CallMetric objects
+
+    Returns:
+        dict: agent -> calls, attempts, tokens, latency totals and counts per outcome
+    """
+    agents = {}
+    for metric in metrics:
+        entry = agents.setdefault(metric.agent, {
+            "calls": 0, "attempts": 0, "prompt_tokens": 0, "cached_tokens": 0, "response_tokens": 0,
+            "latency_seconds": 0.0, "max_latency_seconds": 0.0, "outcomes": {}, "finish_reasons": {}
+        })
+        entry["calls"] += 1
+        entry["attempts"] += metric.attempts
+        entry["prompt_tokens"] += metric.prompt_tokens
+        entry["cached_tokens"] += metric.cached_tokens
+        entry["response_tokens"] += metric.response_tokens
+        entry["latency_seconds"] += metric.latency
+        entry["max_latency_seconds"] = max(entry["max_latency_seconds"], metric.latency)
+        entry["outcomes"][metric.outcome] = entry["outcomes"].get(metric.outcome, 0) + 1
+        if metric.finish_reason:
+            entry["finish_reasons"][metric.finish_reason] = entry["finish_reasons"].get(metric.finish_reason, 0) + 1
+    for entry in agents.values():
+        entry["latency_seconds"] = round(entry["latency_seconds"], 3)
+        entry["max_latency_seconds"] = round(entry["max_latency_seconds"], 3)
+    return agents
+
+def aggregate_routes(metrics):
+    """
+    Summarise calls per route, the model a task was sent to
+    Args:
+        metrics(iterable): CallMetric objects
+
+    Returns:
+        dict: '<task>:<model>' -> calls, latency, tokens, estimated cost in USD and counts per outcome
+    """
+    routes = {}
+    for metric in metrics:
+        if metric.model is None:
+            continue
+        entry = routes.setdefault(metric.route, {
+            "calls": 0, "prompt_tokens": 0, "response_tokens": 0, "cost_usd": 0.0,
+            "latency_seconds": 0.0, "max_latency_seconds": 0.0, "outcomes": {}
+        })
+        entry["calls"] += 1
+        entry["prompt_tokens"] += metric.prompt_tokens
+        entry["response_tokens"] += metric.response_tokens
+        entry["cost_usd"] += metric.cost
+        entry["latency_seconds"] += metric.latency
+        entry["max_latency_seconds"] = max(entry["max_latency_seconds"], metric.latency)
+        entry["outcomes"][metric.outcome] = entry["outcomes"].get(metric.outcome, 0) + 1
+    for entry in routes.values():
+        entry["cost_usd"] = round(entry["cost_usd"], 6)
+        entry["latency_seconds"] = round(entry["latency_seconds"], 3)
+        entry["max_latency_seconds"] = round(entry["max_latency_seconds"], 3)
+    return routes
+
+class MetricsRegistry:
+    def __init__(self, keep_recent=1000):
+        """
+        Process-wide totals of every LLM call, plus the most recent calls for inspection
+        Args:
+            keep_recent(int): Number of individual calls kept in memory
+        """
+        self.recent = deque(maxlen=keep_recent)
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def record(self, metric):
+        with self._lock:
+            self.recent.append(metric)
+            labels = (("agent", metric.agent), ("outcome", metric.outcome))
+            self._add("srs_llm_calls_total", labels, 1)
+            self._add("srs_llm_attempts_total", labels[:1], metric.attempts)
+            self._add("srs_llm_prompt_tokens_total", labels[:1], metric.prompt_tokens)
+            self._add("srs_llm_cached_tokens_total", labels[:1], metric.cached_tokens)
+            self._add("srs_llm_response_tokens_total", labels[:1], metric.response_tokens)
+            if metric.finish_reason:
+                self._add("srs_llm_finish_reasons_total", (labels[0], ("reason", metric.finish_reason)), 1)
+            if metric.model is not None:
+                route = (("task", metric.task), ("model", metric.model))
+                self._add("srs_llm_route_calls_total", route + (("outcome", metric.outcome),), 1)
+                self._add("srs_llm_route_latency_seconds_total", route, metric.latency)
+                self._add("srs_llm_cost_usd_total", route, metric.cost)
+            histogram = self._histograms.setdefault(metric.agent, {
+                "buckets": [0] * len(LATENCY_BUCKETS), "sum": 0.0, "count": 0
+            })
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if metric.latency <= bound:
+                    histogram["buckets"][index] += 1
+            histogram["sum"] += metric.latency
+            histogram["count"] += 1
+
+    def _add(self, name, labels, value):
+        series = self._counters.setdefault(name, {})
+        series[labels] = series.get(labels, 0) + value
+
+    def summary(self, run_id=None):
+        """
+        Returns:
+            dict: Per-agent aggregates of the recent calls, optionally of one run only
+        """
+        with self._lock:
+            metrics = [metric for metric in self.recent if run_id is None or metric.run_id == run_id]
+        return aggregate(metrics)
+
+    def route_summary(self, run_id=None):
+        """
+        Returns:
+            dict: Per-route aggregates of the recent calls, optionally of one run only
+        """
+        with self._lock:
+            metrics = [metric for metric in self.recent if run_id is None or metric.run_id == run_id]
+        return aggregate_routes(metrics)
+
+    def to_prometheus(self):
+        """
+        Render the process totals in the Prometheus text exposition format
+        """
+        help_texts = {
+            "srs_llm_calls_total": "LLM calls by agent and outcome",
+            "srs_llm_attempts_total": "HTTP attempts made by LLM calls",
+            "srs_llm_prompt_tokens_total": "Prompt tokens reported by the API",
+            "srs_llm_cached_tokens_total": "Prompt tokens served from a context cache",
+            "srs_llm_response_tokens_total": "Response tokens reported by the API",
+            "srs_llm_finish_reasons_total": "Replies by finish reason",
+            "srs_llm_route_calls_total": "LLM calls by task, model and outcome",
+            "srs_llm_route_latency_seconds_total": "Seconds spent in LLM calls by task and model",
+            "srs_llm_cost_usd_total": "Estimated cost of LLM calls in USD by task and model",
+        }
+        lines = []
+        with self._lock:
+            for name, help_text in help_texts.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in sorted(self._counters.get(name, {}).items()):
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+
+            name = "srs_llm_call_latency_seconds"
+            lines.append(f"# HELP {name} Latency of LLM calls including retries")
+            lines.append(f"# TYPE {name} histogram")
+            for agent, histogram in sorted(self._histograms.items()):
+                for bound, count in zip(LATENCY_BUCKETS, histogram["buckets"]):
+                    lines.append(f"{name}_bucket{_format_labels((('agent', agent), ('le', str(bound))))} {count}")
+                lines.append(f"{name}_bucket{_format_labels((('agent', agent), ('le', '+Inf')))} {histogram['count']}")
+                lines.append(f"{name}_sum{_format_labels((('agent', agent),))} {histogram['sum']:.6f}")
+                lines.append(f"{name}_count{_format_labels((('agent', agent),))} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self.recent.clear()
+            self._counters.clear()
+            self._histograms.clear()
+
+def _format_labels(labels):
+    parts = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+_metrics = MetricsRegistry()
+
+def get_metrics():
+    """
+    Returns the process-wide metrics registry
+    """
+    return _metrics
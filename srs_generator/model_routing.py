@@ -0,0 +1,157 @@
+import os
+import json
+import threading
+
+# USD per million tokens (input, output) of Gemini models on the paid tier; models
+# not listed are reported with a cost of 0
+MODEL_PRICES = {
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-2.0-flash-lite": (0.075, 0.30),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+    "gemini-2.5-pro": (1.25, 10.00),
+    "gemini-1.5-flash": (0.075, 0.30),
+    "gemini-1.5-pro": (1.25, 5.00),
+}
+# Share of the input price charged for prompt tokens served from a context cache
+CACHED_TOKEN_PRICE = 0.25
+
+# Task of a call when the agent names none and writes no section
+DEFAULT_TASK = "default"
+
+def call_cost(model, prompt_tokens, response_tokens, cached_tokens=0):
+    """
+    Estimated price of one call
+    Args:
+        model(str): Model name
+        prompt_tokens(int): Prompt tokens, including cached ones
+        response_tokens(int): Response tokens
+        cached_tokens(int): Prompt tokens served from a context cache
+
+    Returns:
+        float: Cost in USD
+    """
+    input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    inline_tokens = prompt_tokens - cached_tokens
+    return (
+        inline_tokens * input_price + cached_tokens * input_price * CACHED_TOKEN_PRICE
+        + response_tokens * output_price
+    ) / 1_000_000
+
+
+class Route:
+    def __init__(self, model=None, timeout=None, max_tokens=None, fallback=None):
+        """
+        Where one kind of call goes
+        Args:
+            model(str): Model name; None keeps the model of the agent's backend
+            timeout(float): Seconds the backend may take to answer one attempt before it
+                counts as a timeout and is retried, not counting the wait for the local rate
+                limiter; None waits as long as the run's deadline allows
+            max_tokens(int): Token limit of the reply, replacing the one the agent asks for
+            fallback(Route): Route tried once every attempt on this one has failed; a model
+                name or a dict of Route arguments is accepted too
+        """
+        self.model = model
+        self.timeout = timeout
+        self.max_tokens = max_tokens
+        self.fallback = Route.from_config(fallback) if fallback is not None else None
+
+    @classmethod
+    def from_config(cls, value):
+        """
+        Args:
+            value(Route|str|dict): A route, a model name or Route arguments
+
+        Returns:
+            Route: The route
+        """
+        if isinstance(value, Route):
+            return value
+        if isinstance(value, str):
+            return cls(model=value)
+        return cls(**value)
+
+    def backend_for(self, backend):
+        """
+        Returns:
+            LLMBackend: backend itself, or the same kind of backend for the route's model
+        """
+        if self.model is None or self.model == backend.model:
+            return backend
+        return backend.with_model(self.model)
+
+    def __repr__(self):
+        return f"Route(model={self.model!r}, timeout={self.timeout!r}, max_tokens={self.max_tokens!r}, fallback={self.fallback!r})"
+
+
+# Routes a Gemini backend takes for tasks no configured route or section model covers:
+# the diagram check and the short introduction need no more than the fastest model.
+# Their fallback keeps the backend's own model
+GEMINI_DEFAULT_ROUTES = {
+    "validate_diagram": Route(model="gemini-2.0-flash-lite", timeout=30, fallback=Route()),
+    "introduction": Route(model="gemini-2.0-flash-lite", fallback=Route()),
+}
+
+class ModelRouter:
+    def __init__(self, routes=None):
+        """
+        Model selection per agent and per task
+        Args:
+            routes(dict): Route, model name or Route arguments keyed by '<agent name>.<task>',
+                '<task>' or '<agent name>'. Tasks are the section keys, 'outline',
+                'combined_sections', 'repair_section', 'diagram' and 'validate_diagram'
+        """
+        self.routes = {key: Route.from_config(value) for key, value in (routes or {}).items()}
+        self.default_route = Route()
+
+    @classmethod
+    def from_env(cls):
+        """
+        ModelRouter of SRS_MODEL_ROUTES: a JSON object, or the path of a JSON file, in the
+        format of the routes argument
+        """
+        value = os.getenv("SRS_MODEL_ROUTES", "").strip()
+        if not value:
+            return cls()
+        if not value.startswith("{"):
+            with open(value, "r", encoding="utf-8") as file:
+                value = file.read()
+        return cls(json.loads(value))
+
+    def route_for(self, agent_name, task, default=None):
+        """
+        The most specific route of a call: agent and task, then task, then agent
+        Args:
+            agent_name(str): Name of the calling agent
+            task(str): What the call does
+            default(Route): Route when none is configured, e.g. the model a section declares
+
+        Returns:
+            Route: The configured route, default, or one keeping the backend's model
+        """
+        for key in (f"{agent_name}.{task}", task, agent_name):
+            if key in self.routes:
+                return self.routes[key]
+        return default or self.default_route
+
+_router = None
+_router_lock = threading.Lock()
+
+def get_router():
+    """
+    Returns the process-wide default router, configured from SRS_MODEL_ROUTES
+    """
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = ModelRouter.from_env()
+        return _router
+
+def set_router(router):
+    """
+    Replace the process-wide default router, used by agents created without one
+    """
+    global _router
+    with _router_lock:
+        _router = router
@@ -0,0 +1,43 @@
+from .rag import AgentBase
+from loguru import logger
+
+class OutlineAgent(AgentBase):
+    section_key = "outline"
+    dependencies = ()
+    # Bump when the prompt changes so stored outlines are regenerated
+    prompt_version = 2
+
+    def __init__(self, max_retries=5, verbose=True, backend=None):
+        super().__init__(name="OutlineAgent", max_retries=max_retries, verbose=verbose, backend=backend)
+        self.logger = logger
+
+    async def execute_async(self, topic, previous_contents):
+        # One short planning call that every section agent then expands in parallel
+        system_message = """You are an expert system requirement specification document writer. Based on the project description provided, write a compact outline that all sections of the SRS will be expanded from, in this format:
+
+        **Purpose**: One sentence on what the system is for and who it serves.
+        **Features**: Numbered list (F1, F2, ...) of major features, each with a short name and a one-line description.
+        **Actors**: Bulleted list of user classes and external systems, each with a one-line role.
+        **Interfaces**: Bulleted list of user, hardware, software and communication interfaces.
+        **Non-functional Priorities**: Bulleted list of the most important quality categories (e.g., Performance, Security) with one measurable target each.
+        **Key Terms**: Bulleted list of domain terms and acronyms with short definitions.
+
+        Format Rules:
+        1. Return ONLY the outline without any conversational preamble.
+        2. Keep every item to one line; this is a plan, not the document.
+        3. Use consistent names, as every section will reuse them verbatim.
+        """
+        user_message = "Generate the outline for this system."
+
+        messages = self.context_messages(topic, previous_contents) + [
+            self.format_message("system", system_message),
+            self.format_message("user", user_message)
+        ]
+
+        outline_content = await self.call_gemini_async(messages, temperature=0.3, max_tokens=800)
+
+        if not outline_content:
+            self.logger.error(f"[{self.name}] Failed to generate outline after all retries")
+            outline_content = "Failed to generate outline content."
+
+        return {**previous_contents, "outline": outline_content}
@@ -1,90 +1,626 @@
-import os
-import requests
+import json
 import time
+import asyncio
+import functools
+import httpx
 from abc import ABC, abstractmethod
 from loguru import logger
 from dotenv import load_dotenv
+from .event_loop import run_sync
+from .run_context import get_current_run
+from .budget import BudgetExceeded
+from .llm_backend import get_backend, render_prompt
+from .context_digest import digest_contents
+from .section_schema import SECTION_SCHEMA, STRUCTURED_INSTRUCTION, parse_section, render_markdown
+from .response_cache import ResponseCache, get_response_cache
+from .single_flight import get_single_flight
+from .metrics import CallMetric, get_metrics
+from .model_routing import DEFAULT_TASK, Route, get_router
+from .sections import SECTIONS, content_labels
+from .hedging import get_hedge_policy, hedged
+from .retry_policy import RetryPolicy, CircuitOpenError, classify_error, get_circuit_breaker, RATE_LIMITED, CLIENT_ERROR
+
+# How upstream contents are introduced in prompts, for the default sections
+CONTENT_LABELS = content_labels(SECTIONS)
+
+OUTLINE_INSTRUCTION = (
+    "Expand only the part of the project outline that belongs to this section. "
+    "Keep feature names, actors and interfaces exactly as the outline names them.\n\n"
+)
+
+# Role of the messages holding the shared, stable part of a prompt: the project
+# description and the upstream contents. They always come first, in document order,
+# so the prompts of one run share the longest possible prefix.
+CONTEXT_ROLE = "context"
+
+# Asked after a reply that stopped at its token limit, with the partial reply as the model's turn
+CONTINUE_INSTRUCTION = (
+    "Your reply above was cut off at the length limit. Continue it exactly where it stopped, "
+    "without repeating anything and without any preamble."
+)
+# Reply tokens a call may reach through continuations, as a multiple of its max_tokens,
+# unless the agent sets max_total_tokens
+CONTINUATION_TOKEN_FACTOR = 3
+
+# Agents fall back to "Failed to generate ... content." when every attempt fails
+FAILED_CONTENT_PREFIX = "Failed to generate"
+
+@functools.lru_cache(maxsize=None)
+def load_environment():
+    """
+    Load .env into the environment, once per process
+    """
+    load_dotenv()
+
+def join_continuation(partial, continuation):
+    """
+    Append a continuation to a reply cut off at its token limit, dropping text the
+    continuation repeats from the end of the partial reply (at least 20 characters, so
+    common words are not mistaken for a repeat)
+    """
+    overlap = next(
+        (size for size in range(min(len(partial), len(continuation), 200), 19, -1)
+         if partial.endswith(continuation[:size])),
+        0
+    )
+    return partial + continuation[overlap:]
+
+def is_failed_content(text):
+    """
+    True if text is missing or is an agent's failure placeholder
+    """
+    return not text or text.startswith(FAILED_CONTENT_PREFIX)
+
 
 class AgentBase(ABC):
-    def __init__(self, name, max_retries=5, verbose=True):  # Increased retries for robustness
+    # Key of the section the agent writes into the contents dict
+    section_key = None
+    # Section keys the agent's prompt reads
+    dependencies = ()
+    prompt_version = 1
+    # Tokens of upstream contents the prompt may embed; longer contents are replaced by
+    # extracted digests (see context_digest). None embeds them in full
+    context_budget = None
+    # Relevance of each upstream section when the budget is shared out; missing keys weigh 1
+    context_weights = {}
+    # Ask for the section as JSON following SECTION_SCHEMA instead of free-form markdown
+    structured_output = False
+    # ModelRouter choosing the model of each call; the process-wide default (SRS_MODEL_ROUTES) if None
+    router = None
+    # HedgePolicy duplicating requests slower than usual; the process-wide default
+    # (GEMINI_HEDGE_PERCENTILE) if None
+    hedge_policy = None
+    # Model of the agent's calls when no route names one; the backend's model if None
+    model = None
+    # Section registry whose order and labels lay out the upstream contents of prompts
+    sections = SECTIONS
+    # Reply tokens a call may reach when replies stopping at max_tokens are continued;
+    # CONTINUATION_TOKEN_FACTOR times the call's max_tokens if None. Set it to the
+    # call's max_tokens to keep cut-off replies as they are
+    max_total_tokens = None
+
+    def __init__(self, name, max_retries=5, verbose=True, backend=None):  # Increased retries for robustness
         self.name = name
         self.max_retries = max_retries
         self.verbose = verbose
-        load_dotenv()
+        load_environment()
         self.logger = logger
+        # LLMBackend of the agent; the process-wide default if None
+        self._backend = backend
+        # One attempt budget per logical call; agents do not retry on top of it
+        self.retry_policy = RetryPolicy(max_attempts=max_retries)
 
     @abstractmethod
-    def execute(self, *args, **kwargs):
+    async def execute_async(self, *args, **kwargs):
         """
         Execute the main functionality of the agent
         """
         pass
 
-    def call_gemini(self, messages, temperature=0.3, max_tokens=150):
+    def execute(self, *args, **kwargs):
+        """
+        Synchronous wrapper around execute_async
+        """
+        return run_sync(self.execute_async(*args, **kwargs))
+
+    @property
+    def backend(self):
         """
-        Calls the Gemini API and retrieves the response with exponential backoff
+        The LLMBackend the agent's calls go through
+        """
+        return self._backend or get_backend()
+
+    def call_gemini(self, messages, temperature=0.3, max_tokens=150, use_cache=True, response_schema=None, task=None,
+                    validate=None):
+        """
+        Synchronous wrapper around call_gemini_async
+        """
+        return run_sync(
+            self.call_gemini_async(messages, temperature, max_tokens, use_cache, response_schema, task, validate)
+        )
+
+    async def call_gemini_async(self, messages, temperature=0.3, max_tokens=150, use_cache=True, response_schema=None,
+                                task=None, validate=None):
+        """
+        Calls the model the agent's router picks for the task, retrying per the agent's retry
+        policy with decorrelated jitter and failing fast while the model's circuit breaker is
+        open. When every attempt fails, the route's fallback model is tried
         Args:
             messages(list): A list of message dictionaries with 'role' and 'content' keys
             temperature(float): Sampling temperature for generation
-            max_tokens(int): Maximum number of tokens in the response
-            
+            max_tokens(int): Maximum number of tokens in the response, unless the route sets one
+            use_cache(bool): Serve and store the reply through the response cache; pass False
+                to force a fresh generation
+            response_schema(dict): Constrain the reply to JSON following this schema; replies
+                that are not valid JSON are retried like garbled ones
+            task(str): What the call does, for model routing; defaults to the agent's section key
+            validate(callable): Raises ValueError for a reply that is well-formed but unusable,
+                e.g. JSON not following the schema. Such a reply is retried like a garbled one
+                and is never cached; a cached reply failing it is ignored
+
         Returns:
             str: The content of the model's response, or None if all retries fail
         """
-        api_key = os.getenv('GEMINI_API_KEY')
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY environment variable not set")
-
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={api_key}"
-        headers = {'Content-Type': 'application/json'}
-
-        # Combine messages into a single prompt
-        prompt = ""
-        for msg in messages:
-            prompt += f"{msg['role'].capitalize()}: {msg['content']}\n\n"
-
-        payload = {
-            "contents": [{
-                "parts": [{"text": prompt}]
-            }],
-            "generationConfig": {
-                "temperature": temperature,
-                "maxOutputTokens": max_tokens
-            }
-        }
+        task = task or self.section_key or DEFAULT_TASK
+        route = self.route_for(task)
+        while True:
+            backend = route.backend_for(self.backend)
+            reply = await self.call_route_async(
+                backend, route, task, messages, temperature, route.max_tokens or max_tokens, use_cache, response_schema,
+                validate
+            )
+            if reply is not None or route.fallback is None:
+                return reply
+            fallback = route.fallback.backend_for(self.backend)
+            self.logger.warning(f"[{self.name}] {backend.model} failed for {task}; falling back to {fallback.model}")
+            route = route.fallback
+
+    def route_for(self, task):
+        """
+        Returns:
+            Route: The route of the agent's calls for task, from its router, its own model
+                or the backend's default routes
+        """
+        default = Route(model=self.model) if self.model else self.backend.default_routes.get(task)
+        return (self.router or get_router()).route_for(self.name, task, default)
+
+    def output_settings(self, task=None):
+        """
+        Settings besides the prompt that decide what the agent writes, for checkpoint
+        fingerprints: a section generated by another model or with other token limits is
+        not reused
+        Args:
+            task(str): Routing task; defaults to the agent's section key
+
+        Returns:
+            list: Model and token limit of the task's route, and max_total_tokens
+        """
+        route = self.route_for(task or self.section_key or DEFAULT_TASK)
+        return [route.model or self.backend.model, route.max_tokens, self.max_total_tokens]
+
+    def cache_key(self, messages, temperature, max_tokens, task=None):
+        """
+        Returns:
+            str: Response cache key of call_gemini_async's request to the task's model
+        """
+        route = self.route_for(task or self.section_key or DEFAULT_TASK)
+        model = route.model or self.backend.model
+        return ResponseCache.make_key(model, messages, temperature, route.max_tokens or max_tokens)
+
+    async def cached_reply_async(self, messages, temperature, max_tokens, task=None):
+        """
+        Look up a reply stored with cache_reply_async, for replies that may only be cached
+        once a later check accepts them; call_gemini_async is then made with use_cache=False
+        Returns:
+            str: The cached reply, or None
+        """
+        cache = get_response_cache()
+        if cache is None:
+            return None
+        started = time.perf_counter()
+        reply = await asyncio.to_thread(cache.get, self.cache_key(messages, temperature, max_tokens, task))
+        if reply is not None:
+            self.logger.info(f"[{self.name}] Served reply from the response cache")
+            run = get_current_run()
+            if run is not None:
+                run.cache_hits += 1
+            self.record_metric("cache_hit", started, task=task, model=self.output_settings(task)[0])
+        return reply
+
+    async def cache_reply_async(self, messages, temperature, max_tokens, reply, task=None):
+        """
+        Store a reply that passed its checks, under the key of the request that produced it
+        """
+        cache = get_response_cache()
+        if cache is not None and reply:
+            await asyncio.to_thread(cache.put, self.cache_key(messages, temperature, max_tokens, task), reply)
+
+    async def call_route_async(self, backend, route, task, messages, temperature, max_tokens, use_cache, response_schema,
+                               validate=None):
+        """
+        One logical call to one model, through the response cache and single-flight
+        Returns:
+            str: The content of the model's response, or None if all retries fail
+        """
+        started = time.perf_counter()
+        run = get_current_run()
+        # Section text is streamed to the run's listener as it is generated; JSON and calls for
+        # other tasks, such as repairs of the section, are not worth showing
+        stream = (
+            run is not None and task == self.section_key and self.section_key in self.content_labels()
+            and response_schema is None
+        )
+        on_chunk = run.on_chunk if stream else None
+
+        request_key = ResponseCache.make_key(backend.model, messages, temperature, max_tokens, response_schema)
+        cache = get_response_cache() if use_cache else None
+        if cache is not None:
+            reply = await asyncio.to_thread(cache.get, request_key)
+            if reply is not None and not self.is_valid_reply(reply, validate):
+                self.logger.warning(f"[{self.name}] Ignoring a cached reply that fails validation")
+                reply = None
+            if reply is not None:
+                self.logger.info(f"[{self.name}] Served reply from the response cache")
+                if run is not None:
+                    run.cache_hits += 1
+                self.record_metric("cache_hit", started, task=task, model=backend.model)
+                return reply
+
+        # Identical requests already in flight, from any thread or loop, share one reply
+        reply, shared = await get_single_flight().do(
+            request_key,
+            lambda: self.complete_llm(
+                backend, messages, temperature, max_tokens, run, on_chunk, response_schema, task, route.timeout,
+                validate
+            )
+        )
+        if shared:
+            self.logger.info(f"[{self.name}] Shared the reply of an identical request in flight")
+            if run is not None:
+                run.shared_calls += 1
+            self.record_metric("shared", started, task=task, model=backend.model)
+        elif reply is not None and cache is not None:
+            await asyncio.to_thread(cache.put, request_key, reply)
+        return reply
+
+    async def complete_llm(self, backend, messages, temperature, max_tokens, run, on_chunk, response_schema=None,
+                           task=None, attempt_timeout=None, validate=None):
+        """
+        request_llm, continued while the reply stops at its token limit (MAX_TOKENS): the
+        prompt is sent again with the partial reply as the model's turn and CONTINUE_INSTRUCTION,
+        and the pieces are joined, until the reply has used max_total_tokens. JSON replies
+        and replies checked by validate are not continued; a cut-off one fails its check
+        and is retried
+        Returns:
+            str: The reply text, or None if the first request failed
+        """
+        reply, finish_reason = await self.request_llm(
+            backend, messages, temperature, max_tokens, run, on_chunk, response_schema, task, attempt_timeout, validate
+        )
+        total_tokens = self.max_total_tokens or CONTINUATION_TOKEN_FACTOR * max_tokens
+        used_tokens = max_tokens
+        while reply is not None and finish_reason == "MAX_TOKENS" and response_schema is None and validate is None:
+            if used_tokens >= total_tokens:
+                self.logger.warning(f"[{self.name}] Reply still cut off after {used_tokens} tokens; keeping it as is")
+                if run is not None:
+                    run.truncated_replies += 1
+                break
+            tokens = min(max_tokens, total_tokens - used_tokens)
+            self.logger.warning(f"[{self.name}] Reply cut off at the token limit; requesting up to {tokens} more")
+            if run is not None:
+                run.continuations += 1
+            continuation_messages = messages + [
+                self.format_message("assistant", reply),
+                self.format_message("user", CONTINUE_INSTRUCTION)
+            ]
+            partial = reply
+
+            def on_continuation(key, text, partial=partial):
+                # A failed attempt only discards its own text; the listener gets the partial reply back
+                on_chunk(key, text)
+                if text is None:
+                    on_chunk(key, partial)
+
+            try:
+                continuation, finish_reason = await self.request_llm(
+                    backend, continuation_messages, temperature, tokens, run,
+                    on_continuation if on_chunk is not None else None, response_schema, task, attempt_timeout
+                )
+            except BudgetExceeded:
+                self.logger.warning(f"[{self.name}] Generation budget exhausted; keeping the cut-off reply")
+                break
+            if continuation is None:
+                break
+            reply = join_continuation(reply, continuation)
+            used_tokens += tokens
+        return reply
+
+    async def request_llm(self, backend, messages, temperature, max_tokens, run, on_chunk, response_schema=None,
+                          task=None, attempt_timeout=None, validate=None):
+        """
+        Send a request with the retry policy, budget and circuit breaker applied. When the
+        run has a context cache, the leading context messages are referenced from it.
+        An attempt running past attempt_timeout seconds fails as a timeout, and one whose
+        reply fails validate (or is not JSON when a schema was asked for) as a garbled reply
+        Returns:
+            tuple: (reply text, finish reason), or (None, None) if every attempt failed
+        """
+        started = time.perf_counter()
+        prompt = render_prompt(messages)
+        context_cache = run.context_cache if run is not None else None
 
         if self.verbose:
-            self.logger.info(f"[{self.name}] Sending prompt to Gemini API:")
+            self.logger.info(f"[{self.name}] Sending prompt to {backend.name} ({backend.model}):")
             self.logger.debug(f"Prompt:\n{prompt}")
 
-        for attempt in range(self.max_retries):
+        budget = run.budget if run is not None else None
+        attempts = rate_limited = 0
+        delay = 0.0
+        breaker = get_circuit_breaker(backend.endpoint)
+        while attempts < self.retry_policy.max_attempts:
+            cached_content = await context_cache.prefix_for(messages, backend) if context_cache is not None else None
             try:
-                response = requests.post(url, headers=headers, json=payload)
-                response.raise_for_status()
-                
-                json_response = response.json()
-                reply = json_response['candidates'][0]['content']['parts'][0]['text']
-                
-                if self.verbose:
-                    self.logger.info(f"[{self.name}] Received response: {reply}")
-                return reply
-            except requests.exceptions.HTTPError as e:
-                if e.response.status_code == 429:
-                    self.logger.warning(f"[{self.name}] Rate limit exceeded (429). Waiting {2 ** attempt} seconds before retry.")
-                    time.sleep(2 ** attempt)  # Exponential backoff: 1, 2, 4, 8, 16 seconds
-                else:
-                    self.logger.error(f"[{self.name}] Gemini API call failed: {str(e)}")
-                    time.sleep(1)
-                if attempt < self.max_retries - 1:
-                    self.logger.warning(f"[{self.name}] Retrying attempt {attempt + 2}/{self.max_retries}")
+                if budget is not None:
+                    budget.consume_call()
+            except BudgetExceeded:
+                self.logger.warning(f"[{self.name}] Generation budget exhausted; not calling the LLM")
+                self.record_call(attempts, False, rate_limited)
+                self.record_metric("budget_exhausted", started, attempts, task=task, model=backend.model)
+                raise
+            try:
+                breaker.before_call()
+            except CircuitOpenError as e:
+                self.logger.warning(f"[{self.name}] {e}")
+                self.record_call(attempts, False, rate_limited)
+                self.record_metric("circuit_open", started, attempts, task=task, model=backend.model)
+                return None, None
+
+            attempts += 1
+            # No single attempt (including rate-limit waits) may outlive the run's deadline
+            timeout = budget.remaining_seconds() if budget is not None else None
+            if on_chunk is not None:
+                # Tell the listener to discard text streamed by any earlier, failed attempt
+                on_chunk(self.section_key, None)
+                on_text = lambda text: on_chunk(self.section_key, text)
+            else:
+                on_text = None
+
+            def send(reserved_tokens):
+                request = backend.generate(
+                    messages, temperature, max_tokens, on_text, cached_content, response_schema, reserved_tokens
+                )
+                if attempt_timeout is not None:
+                    request = self.attempt_with_timeout(request, attempt_timeout)
+                return request
+
+            async def attempt(on_text=on_text):
+                # Waiting for the local rate limiter is queueing, not a slow backend: only the
+                # exchange itself is held to the route's timeout
+                reserved_tokens = await backend.reserve(messages, max_tokens)
+                # A streamed reply cannot be raced: both copies would reach the listener
+                hedge_policy = (self.hedge_policy or get_hedge_policy()) if on_text is None else None
+                return await hedged(
+                    hedge_policy, f"{self.name}:{task}:{backend.model}", lambda: send(reserved_tokens),
+                    lambda: self.start_hedge(backend, messages, max_tokens, budget, run, send)
+                )
+
+            try:
+                (reply, usage, finish_reason), won_by_hedge = await asyncio.wait_for(attempt(), timeout)
+                if validate is not None:
+                    validate(reply)
+                elif response_schema is not None:
+                    json.loads(reply)
+            except asyncio.TimeoutError:
+                # Cut off by the run's deadline, which says nothing about the backend
+                breaker.release_probe()
+                self.logger.warning(f"[{self.name}] LLM call cut off at the run's deadline")
+                continue
+            except asyncio.CancelledError:
+                breaker.release_probe()
+                raise
             except Exception as e:
-                self.logger.error(f"[{self.name}] Gemini API call failed: {str(e)}")
-                time.sleep(1)
-                if attempt < self.max_retries - 1:
-                    self.logger.warning(f"[{self.name}] Retrying attempt {attempt + 2}/{self.max_retries}")
-        
-        self.logger.error(f"[{self.name}] Failed to get response from Gemini API after {self.max_retries} retries")
-        return None
+                error_class = classify_error(e)
+                breaker.record_failure(error_class)
+                if cached_content is not None and error_class == CLIENT_ERROR:
+                    # The context cache expired or was rejected; send the context inline instead
+                    self.logger.warning(f"[{self.name}] Context cache {cached_content[0]} unusable: {str(e)}")
+                    context_cache.invalidate(cached_content[0])
+                    continue
+                if error_class == RATE_LIMITED:
+                    self.logger.warning(f"[{self.name}] Rate limit exceeded (429).")
+                    rate_limited += 1
+                    backend.on_rate_limited(e)
+                else:
+                    self.logger.error(f"[{self.name}] LLM call failed ({error_class}): {str(e)}")
+                if not self.retry_policy.should_retry(error_class, attempts):
+                    break
+                delay = self.retry_policy.next_delay(error_class, delay)
+                self.logger.warning(
+                    f"[{self.name}] Retrying attempt {attempts + 1}/{self.retry_policy.max_attempts} in {delay:.1f}s"
+                )
+                await self.backoff(budget, delay)
+                continue
+
+            breaker.record_success()
+            if won_by_hedge:
+                self.logger.info(f"[{self.name}] The hedged request answered first")
+                if run is not None:
+                    run.hedge_wins += 1
+            if self.verbose:
+                self.logger.info(f"[{self.name}] Received response: {reply}")
+            self.record_call(attempts, True, rate_limited)
+            self.record_metric("ok", started, attempts, usage, finish_reason, task, backend.model)
+            return reply, finish_reason
+
+        self.logger.error(f"[{self.name}] Failed to get response from the LLM after {attempts} attempts")
+        self.record_call(attempts, False, rate_limited)
+        self.record_metric("failed", started, attempts, task=task, model=backend.model)
+        return None, None
+
+    def is_valid_reply(self, reply, validate):
+        """
+        Returns:
+            bool: True if there is no validate or the reply passes it
+        """
+        if validate is None:
+            return True
+        try:
+            validate(reply)
+        except ValueError:
+            return False
+        return True
+
+    def start_hedge(self, backend, messages, max_tokens, budget, run, send):
+        """
+        Send a hedged duplicate of a slow request, if the backend's local quota has room
+        for it right away and the run's call budget allows it. A hedge that had to queue
+        behind the rate limiter would only spend quota waiting where the request already did
+        Returns:
+            Awaitable: The hedged request, or None if it is not sent
+        """
+        reserved_tokens = backend.try_reserve(messages, max_tokens)
+        if reserved_tokens is None:
+            self.logger.info(f"[{self.name}] Slow request, but the rate limiter is saturated; not hedging")
+            return None
+        try:
+            if budget is not None:
+                budget.consume_call()
+        except BudgetExceeded:
+            backend.release(reserved_tokens)
+            return None
+        self.logger.info(f"[{self.name}] No reply yet at the usual latency; sending a hedged request")
+        if run is not None:
+            run.hedged_requests += 1
+        return send(reserved_tokens)
+
+    async def attempt_with_timeout(self, request, seconds):
+        """
+        Await one attempt, failing it like a transport timeout after seconds
+        """
+        try:
+            return await asyncio.wait_for(request, seconds)
+        except asyncio.TimeoutError:
+            raise httpx.ReadTimeout(f"No reply within the route's {seconds}s timeout") from None
+
+    async def backoff(self, budget, seconds):
+        """
+        Sleep between attempts without overrunning the run's deadline
+        """
+        if budget is not None:
+            await budget.sleep(seconds)
+        else:
+            await asyncio.sleep(seconds)
+
+    def record_call(self, attempts, succeeded, rate_limited=0):
+        """
+        Count a finished call against the current run, if any
+        """
+        run = get_current_run()
+        if run is not None:
+            run.record_call(attempts, succeeded, rate_limited)
+
+    def record_metric(self, outcome, started, attempts=0, usage=None, finish_reason=None, task=None, model=None):
+        """
+        Record one logical call in the process-wide metrics and in the current run, if any
+        Args:
+            outcome(str): ok, failed, cache_hit, shared, budget_exhausted or circuit_open
+            started(float): time.perf_counter() when the call began
+            attempts(int): HTTP attempts made
+            usage(dict): usageMetadata of the reply
+            finish_reason(str): finishReason of the reply
+            task(str): Routing task of the call
+            model(str): Model the call went to
+        """
+        run = get_current_run()
+        usage = usage or {}
+        metric = CallMetric(
+            self.name,
+            run.run_id if run is not None else None,
+            outcome,
+            time.perf_counter() - started,
+            attempts,
+            usage.get('promptTokenCount', 0),
+            usage.get('candidatesTokenCount', 0),
+            finish_reason,
+            usage.get('cachedContentTokenCount', 0),
+            task,
+            model
+        )
+        get_metrics().record(metric)
+        if run is not None:
+            run.record_metric(metric)
+
+    async def generate_section_async(self, messages, temperature=0.3, max_tokens=1024):
+        """
+        Generate the agent's section. With structured_output the reply is constrained to
+        SECTION_SCHEMA; the parsed structure is kept on the run for the document writer and
+        the text returned is rendered from it
+        Args:
+            messages(list): Messages of the section prompt
+            temperature(float): Sampling temperature for generation
+            max_tokens(int): Maximum number of tokens of a free-form reply
+
+        Returns:
+            str: Section text, or None if generation failed
+        """
+        if not self.structured_output:
+            return await self.call_gemini_async(messages, temperature, max_tokens)
+
+        messages = messages + [self.format_message("user", STRUCTURED_INSTRUCTION)]
+        # JSON syntax costs tokens of its own. Replies not following the schema are retried
+        # and kept out of the response cache, so a bad one cannot be served to later runs
+        reply = await self.call_gemini_async(
+            messages, temperature, max_tokens * 3 // 2, response_schema=SECTION_SCHEMA, validate=parse_section
+        )
+        if reply is None:
+            return None
+        try:
+            structure = parse_section(reply)
+        except ValueError as e:
+            self.logger.error(f"[{self.name}] Structured reply does not follow the section schema: {e}")
+            return None
+        run = get_current_run()
+        if run is not None:
+            run.section_structures[self.section_key] = structure
+        return render_markdown(structure)
+
+    def context_messages(self, topic, previous_contents):
+        """
+        The stable prefix of the agent's prompt: the project description, then one message
+        per upstream content the agent reads, in document order, digested to fit the
+        agent's context_budget
+        Args:
+            topic(str): The project description
+            previous_contents(dict): Section texts keyed by section key, or {'outline': ...}
+                in outline-first mode
+
+        Returns:
+            list: Context messages; each carries the 'key' of the content it holds
+        """
+        labels = self.content_labels()
+        contents = {
+            key: previous_contents[key] for key in labels
+            if (key == "outline" or key in self.dependencies) and previous_contents.get(key)
+        }
+        contents = digest_contents(contents, self.context_budget, self.context_weights)
+        messages = [{"role": CONTEXT_ROLE, "key": "description", "content": f"Here is the project description:\n{topic}"}]
+        for key, text in contents.items():
+            messages.append({"role": CONTEXT_ROLE, "key": key, "content": f"{labels[key]}:\n{text}"})
+        return messages
+
+    def content_labels(self):
+        """
+        Returns:
+            dict: 'outline' and the section keys of the agent's registry -> label, in document order
+        """
+        return CONTENT_LABELS if self.sections is SECTIONS else content_labels(self.sections)
+
+    def outline_instruction(self, previous_contents):
+        """
+        Returns:
+            str: OUTLINE_INSTRUCTION when the agent expands an outline, otherwise an empty string
+        """
+        return OUTLINE_INSTRUCTION if previous_contents.get("outline") else ""
 
     def format_message(self, role, content):
         """
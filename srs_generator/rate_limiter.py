@@ -0,0 +1,219 @@
+import os
+import re
+import time
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+from loguru import logger
+
+DEFAULT_REQUESTS_PER_MINUTE = 15
+DEFAULT_TOKENS_PER_MINUTE = 1_000_000
+
+class TokenBucket:
+    def __init__(self, per_minute):
+        """
+        A bucket refilled continuously at per_minute / 60 units per second
+        Args:
+            per_minute(float): Sustained rate, also the bucket capacity
+        """
+        self.per_minute = float(per_minute)
+        self.available = float(per_minute)
+        self.updated_at = time.monotonic()
+
+    def refill(self, now, rate_factor):
+        rate = self.per_minute * rate_factor / 60.0
+        self.available = min(self.per_minute, self.available + (now - self.updated_at) * rate)
+        self.updated_at = now
+
+    def wait_time(self, amount, rate_factor):
+        """
+        Seconds until amount units are available at the current rate
+        """
+        deficit = amount - self.available
+        if deficit <= 0:
+            return 0.0
+        return deficit / (self.per_minute * rate_factor / 60.0)
+
+class RateLimiter:
+    def __init__(self, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, tokens_per_minute=DEFAULT_TOKENS_PER_MINUTE,
+                 name="RateLimiter", min_rate_factor=0.1, recovery_step=0.05):
+        """
+        Adaptive token-bucket limiter shared by every agent in the process
+        Args:
+            requests_per_minute(float): Request quota
+            tokens_per_minute(float): Input plus output token quota
+            min_rate_factor(float): Lowest fraction of the quota the limiter backs off to
+            recovery_step(float): Fraction of the quota regained after each successful call
+        """
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.min_rate_factor = min_rate_factor
+        self.recovery_step = recovery_step
+        self.rate_factor = 1.0
+        self.blocked_until = 0.0
+        self.logger = logger
+        self._lock = threading.Lock()
+
+    async def acquire(self, tokens=0):
+        """
+        Wait until a request carrying the given number of tokens fits within the quota
+        Args:
+            tokens(int): Estimated prompt plus completion tokens
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            wait = self._take(tokens)
+            if wait <= 0:
+                return waited
+            await asyncio.sleep(wait)
+            waited += wait
+
+    def try_acquire(self, tokens=0):
+        """
+        Take room for a request only if the quota has it right now
+        Returns:
+            bool: False if the request would have to wait
+        """
+        return self._take(tokens) <= 0
+
+    def release(self, tokens=0):
+        """
+        Give back the room taken for a request that was not sent
+        """
+        tokens = min(float(tokens), self.tokens.per_minute)
+        with self._lock:
+            self.requests.available = min(self.requests.per_minute, self.requests.available + 1)
+            self.tokens.available = min(self.tokens.per_minute, self.tokens.available + tokens)
+
+    def _take(self, tokens):
+        """
+        Take room for one request if the quota has it
+        Returns:
+            float: 0 if it was taken, otherwise the seconds until it is available
+        """
+        tokens = min(float(tokens), self.tokens.per_minute)
+        with self._lock:
+            now = time.monotonic()
+            self.requests.refill(now, self.rate_factor)
+            self.tokens.refill(now, self.rate_factor)
+            wait = max(
+                self.blocked_until - now,
+                self.requests.wait_time(1, self.rate_factor),
+                self.tokens.wait_time(tokens, self.rate_factor)
+            )
+            if wait <= 0:
+                self.requests.available -= 1
+                self.tokens.available -= tokens
+                return 0.0
+            return wait
+
+    def on_success(self, headers=None, reserved_tokens=0, used_tokens=None):
+        """
+        Record a successful call: recover part of the rate, sync with quota headers
+        and settle the token estimate against actual usage
+        """
+        with self._lock:
+            # Replies to requests sent before a throttling pause say nothing about the new rate
+            if time.monotonic() >= self.blocked_until:
+                self.rate_factor = min(1.0, self.rate_factor + self.recovery_step)
+            if used_tokens is not None:
+                self.tokens.available = min(self.tokens.per_minute, self.tokens.available + reserved_tokens - used_tokens)
+            if headers:
+                self._apply_quota_headers(headers)
+
+    def on_rate_limited(self, headers=None, body=None):
+        """
+        Record a 429: halve the rate and block every caller until the server's retry delay passes
+        Args:
+            headers(Mapping): Response headers
+            body(str): Response body, which may carry a Gemini RetryInfo delay
+
+        Returns:
+            float: The retry delay that was applied
+        """
+        retry_after = parse_retry_after(headers, body)
+        with self._lock:
+            now = time.monotonic()
+            # 429s from a burst that is already paused count as one throttling event
+            if now >= self.blocked_until:
+                self.rate_factor = max(self.min_rate_factor, self.rate_factor / 2)
+            self.requests.available = min(self.requests.available, 0.0)
+            if retry_after is None:
+                # No hint from the server: wait for one request slot at the reduced rate
+                retry_after = self.requests.wait_time(1, self.rate_factor)
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+            if headers:
+                self._apply_quota_headers(headers)
+        self.logger.warning(
+            f"[{self.name}] Rate limited; pausing {retry_after:.1f}s, rate now "
+            f"{self.rate_factor * 100:.0f}% of quota"
+        )
+        return retry_after
+
+    def _apply_quota_headers(self, headers):
+        limit = _header_float(headers, "x-ratelimit-limit-requests")
+        if limit:
+            self.requests.per_minute = limit
+        remaining = _header_float(headers, "x-ratelimit-remaining-requests")
+        if remaining is not None:
+            self.requests.available = min(self.requests.available, remaining)
+        limit = _header_float(headers, "x-ratelimit-limit-tokens")
+        if limit:
+            self.tokens.per_minute = limit
+        remaining = _header_float(headers, "x-ratelimit-remaining-tokens")
+        if remaining is not None:
+            self.tokens.available = min(self.tokens.available, remaining)
+
+def _header_float(headers, key):
+    value = headers.get(key)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+def parse_retry_after(headers=None, body=None):
+    """
+    Extract the server's retry delay in seconds
+    Args:
+        headers(Mapping): Response headers; Retry-After may be seconds or an HTTP date
+        body(str): Response body; Gemini puts a RetryInfo retryDelay such as "37s" there
+
+    Returns:
+        float: The delay, or None if the server gave no hint
+    """
+    value = headers.get("retry-after") if headers else None
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    if body:
+        match = re.search(r'"retryDelay"\s*:\s*"([\d.]+)s"', body)
+        if match:
+            return float(match.group(1))
+    return None
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+def get_rate_limiter():
+    """
+    Returns the process-wide limiter, configured from GEMINI_RPM and GEMINI_TPM
+    """
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = RateLimiter(
+                requests_per_minute=float(os.getenv("GEMINI_RPM", DEFAULT_REQUESTS_PER_MINUTE)),
+                tokens_per_minute=float(os.getenv("GEMINI_TPM", DEFAULT_TOKENS_PER_MINUTE))
+            )
+        return _rate_limiter
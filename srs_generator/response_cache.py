@@ -0,0 +1,175 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from loguru import logger
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "gemini_responses.sqlite3")
+
+class ResponseCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=100 * 1024 * 1024, max_entries=20000,
+                 ttl_seconds=7 * 24 * 3600):
+        """
+        On-disk cache of Gemini replies keyed by a hash of the request. SQLite in WAL mode
+        lets several processes (Streamlit workers, batch runs) share one file.
+        Args:
+            path(str): SQLite database file
+            max_bytes(int): Total reply size kept before least recently used entries are evicted
+            max_entries(int): Number of replies kept before least recently used entries are evicted
+            ttl_seconds(float): Age after which a reply is no longer served
+        """
+        self.name = "ResponseCache"
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.logger = logger
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, reply TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(model, messages, temperature, max_tokens, response_schema=None):
+        """
+        Returns:
+            str: Hex digest identifying a request
+        """
+        parts = [model, messages, temperature, max_tokens]
+        if response_schema is not None:
+            parts.append(response_schema)
+        payload = json.dumps(parts, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _connect(self):
+        # One short-lived connection per operation: sqlite3 connections are not shared across threads
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def get(self, key):
+        """
+        Returns:
+            str: The cached reply, or None on a miss or an expired entry
+        """
+        now = time.time()
+        try:
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    "SELECT reply FROM responses WHERE key = ? AND created_at >= ?",
+                    (key, now - self.ttl_seconds)
+                ).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            self.logger.warning(f"[{self.name}] Lookup failed: {e}")
+            row = None
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return row[0] if row is not None else None
+
+    def put(self, key, reply):
+        """
+        Store a reply and evict expired and least recently used entries over the limits
+        """
+        now = time.time()
+        try:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, reply, size, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, reply, len(reply.encode("utf-8")), now, now)
+                )
+                self._evict(conn, now)
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            self.logger.warning(f"[{self.name}] Store failed: {e}")
+
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        entries, total_bytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if entries <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+        doomed = []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+            if entries <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            doomed.append((key,))
+            entries -= 1
+            total_bytes -= size
+        conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+        self.logger.info(f"[{self.name}] Evicted {len(doomed)} least recently used replies")
+
+    def clear(self):
+        """
+        Remove every cached reply
+        """
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM responses")
+        finally:
+            conn.close()
+
+    def stats(self):
+        """
+        Returns:
+            dict: Hit and miss counters of this process plus the size of the cache
+        """
+        conn = self._connect()
+        try:
+            entries, total_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        finally:
+            conn.close()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": total_bytes}
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_response_cache():
+    """
+    Returns the process-wide response cache configured from the environment, or None
+    when GEMINI_CACHE=0
+
+    GEMINI_CACHE_PATH, GEMINI_CACHE_MAX_MB and GEMINI_CACHE_TTL_HOURS override the location,
+    size limit and time to live.
+    """
+    global _cache
+    if os.getenv("GEMINI_CACHE", "1") == "0":
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(
+                path=os.getenv("GEMINI_CACHE_PATH", DEFAULT_CACHE_PATH),
+                max_bytes=int(float(os.getenv("GEMINI_CACHE_MAX_MB", "100")) * 1024 * 1024),
+                ttl_seconds=float(os.getenv("GEMINI_CACHE_TTL_HOURS", "168")) * 3600
+            )
+        return _cache
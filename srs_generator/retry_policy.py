@@ -0,0 +1,174 @@
+import json
+import time
+import random
+import asyncio
+import threading
+import httpx
+from loguru import logger
+
+# Error classes and whether a fresh attempt can help
+RATE_LIMITED = "rate_limited"
+SERVER_ERROR = "server_error"
+TIMEOUT = "timeout"
+NETWORK = "network"
+MALFORMED = "malformed"
+CLIENT_ERROR = "client_error"
+
+RETRYABLE = {RATE_LIMITED, SERVER_ERROR, TIMEOUT, NETWORK, MALFORMED}
+# Errors that say the backend itself is unhealthy
+BREAKER_FAILURES = {SERVER_ERROR, TIMEOUT, NETWORK}
+
+def classify_error(error):
+    """
+    Map an exception raised by a Gemini request to an error class
+    Args:
+        error(Exception): The exception
+
+    Returns:
+        str: One of RATE_LIMITED, SERVER_ERROR, TIMEOUT, NETWORK, MALFORMED or CLIENT_ERROR
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        if status == 429:
+            return RATE_LIMITED
+        if status >= 500 or status == 408:
+            return SERVER_ERROR
+        return CLIENT_ERROR
+    if isinstance(error, (httpx.TimeoutException, asyncio.TimeoutError)):
+        return TIMEOUT
+    if isinstance(error, httpx.TransportError):
+        return NETWORK
+    if isinstance(error, (json.JSONDecodeError, KeyError, IndexError, TypeError, ValueError)):
+        return MALFORMED
+    return CLIENT_ERROR
+
+class RetryPolicy:
+    def __init__(self, max_attempts=5, base_delay=1.0, max_delay=30.0):
+        """
+        How often and how long to wait before retrying one logical Gemini call
+        Args:
+            max_attempts(int): Total HTTP attempts for the call, including the first
+            base_delay(float): Smallest delay between attempts in seconds
+            max_delay(float): Largest delay between attempts in seconds
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def should_retry(self, error_class, attempt):
+        """
+        Args:
+            error_class(str): Class of the failed attempt, see classify_error
+            attempt(int): Number of attempts made so far
+
+        Returns:
+            bool: True if another attempt is worthwhile
+        """
+        return error_class in RETRYABLE and attempt < self.max_attempts
+
+    def next_delay(self, error_class, previous_delay):
+        """
+        Decorrelated jitter: each delay is drawn between the base delay and three times the
+        previous one, so concurrent callers spread out instead of retrying in lockstep
+        Args:
+            error_class(str): Class of the failed attempt
+            previous_delay(float): Delay before the failed attempt, 0 for the first
+
+        Returns:
+            float: Seconds to wait before the next attempt
+        """
+        if error_class == RATE_LIMITED:
+            # The shared rate limiter already waits for the server's retry delay
+            return 0.0
+        if error_class == MALFORMED:
+            # A garbled reply is usually a one-off; retry quickly
+            return self.base_delay / 4
+        upper = max(self.base_delay, previous_delay * 3)
+        return min(self.max_delay, random.uniform(self.base_delay, upper))
+
+class CircuitOpenError(Exception):
+    """Raised when a call is refused because the backend is considered down"""
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        """
+        Fails calls fast after repeated backend failures instead of adding load to an outage.
+        After reset_timeout one probe call is let through; its outcome closes or reopens the circuit.
+        Args:
+            failure_threshold(int): Consecutive backend failures that open the circuit
+            reset_timeout(float): Seconds the circuit stays open before a probe is allowed
+        """
+        self.name = "CircuitBreaker"
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with a probe in flight
+        """
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    raise CircuitOpenError("Gemini backend unavailable; failing fast")
+                self.state = "half_open"
+                self._probing = False
+            if self.state == "half_open":
+                if self._probing:
+                    raise CircuitOpenError("Gemini backend unavailable; waiting for probe")
+                self._probing = True
+
+    def release_probe(self):
+        """
+        Let another caller probe when a probe ended without an answer (deadline, cancellation)
+        """
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != "closed":
+                logger.info(f"[{self.name}] Backend recovered; closing circuit")
+            self.state = "closed"
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self, error_class):
+        """
+        Count a failed attempt; only backend failures (5xx, timeouts, network) trip the circuit
+        """
+        with self._lock:
+            if error_class not in BREAKER_FAILURES:
+                # The backend answered (429, 4xx, garbled reply), so it is up
+                self.failures = 0
+                if self.state == "half_open":
+                    self.state = "closed"
+                    self._probing = False
+                return
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning(
+                        f"[{self.name}] {self.failures} consecutive backend failures; "
+                        f"failing fast for {self.reset_timeout:.0f}s"
+                    )
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                self._probing = False
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get_circuit_breaker(endpoint):
+    """
+    Returns the process-wide circuit breaker of an endpoint, shared by every agent
+    """
+    with _breakers_lock:
+        if endpoint not in _breakers:
+            _breakers[endpoint] = CircuitBreaker()
+        return _breakers[endpoint]
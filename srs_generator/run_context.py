@@ -0,0 +1,130 @@
+import time
+import uuid
+import contextvars
+from .budget import RunBudget
+from .metrics import aggregate, aggregate_routes
+
+class RunContext:
+    def __init__(self, run_id=None, budget=None, on_chunk=None):
+        """
+        Per-run state shared by every agent taking part in one generate_srs call
+        Args:
+            run_id(str): Identifier of the run; a random one is generated if omitted
+            budget(RunBudget): Time and call budget checked before every LLM call; unlimited if omitted
+            on_chunk(callable): Receives on_chunk(section_key, text) while sections stream in; text
+                is None when a failed attempt's partial text must be discarded. Sections are only
+                streamed when it is set
+        """
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.budget = budget or RunBudget()
+        self.on_chunk = on_chunk
+        # ContextCache of the run when context caching is on
+        self.context_cache = None
+        # Parsed structures of sections generated in structured output mode, by section key
+        self.section_structures = {}
+        # PlantUML code of the run's diagrams, by diagram type
+        self.diagrams = {}
+        # Start and end of every pipeline stage, in seconds since the run's scheduler started
+        self.stage_timings = {}
+        self.started_at = time.time()
+        self.calls = 0
+        self.attempts = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.failed_calls = 0
+        self.cache_hits = 0
+        # Replies taken from an identical request another caller had in flight
+        self.shared_calls = 0
+        # Duplicates sent for requests slower than usual, and how many of them answered first
+        self.hedged_requests = 0
+        self.hedge_wins = 0
+        # Sections completed with a repair call for their missing parts, and those still
+        # incomplete afterwards
+        self.section_repairs = 0
+        self.incomplete_sections = 0
+        # Requests continuing replies cut off at their token limit, and replies still cut
+        # off once they reached their total token budget
+        self.continuations = 0
+        self.truncated_replies = 0
+        self.metrics = []
+
+    def record_call(self, attempts, succeeded, rate_limited=0):
+        """
+        Record one logical LLM call
+        Args:
+            attempts(int): HTTP attempts made for the call
+            succeeded(bool): Whether a reply was obtained
+            rate_limited(int): Attempts rejected with 429
+        """
+        self.calls += 1
+        self.attempts += attempts
+        self.retries += max(0, attempts - 1)
+        self.rate_limited += rate_limited
+        if not succeeded:
+            self.failed_calls += 1
+
+    def record_metric(self, metric):
+        """
+        Keep a CallMetric of this run
+        """
+        self.metrics.append(metric)
+
+    def agent_metrics(self):
+        """
+        Returns:
+            dict: Per-agent calls, tokens and latency of this run
+        """
+        return aggregate(self.metrics)
+
+    def route_metrics(self):
+        """
+        Returns:
+            dict: Calls, latency and estimated cost of this run per task and model
+        """
+        return aggregate_routes(self.metrics)
+
+    def summary(self):
+        """
+        Returns:
+            dict: Counters of the run
+        """
+        return {
+            "run_id": self.run_id,
+            "calls": self.calls,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "failed_calls": self.failed_calls,
+            "cache_hits": self.cache_hits,
+            "shared_calls": self.shared_calls,
+            "hedged_requests": self.hedged_requests,
+            "hedge_wins": self.hedge_wins,
+            "section_repairs": self.section_repairs,
+            "incomplete_sections": self.incomplete_sections,
+            "continuations": self.continuations,
+            "truncated_replies": self.truncated_replies,
+            "budget_exhausted": self.budget.exhausted,
+            "prompt_tokens": sum(metric.prompt_tokens for metric in self.metrics),
+            "response_tokens": sum(metric.response_tokens for metric in self.metrics),
+            "cached_tokens": sum(metric.cached_tokens for metric in self.metrics),
+            "cost_usd": round(sum(metric.cost for metric in self.metrics), 6),
+            "agents": self.agent_metrics(),
+            "routes": self.route_metrics()
+        }
+
+_current_run = contextvars.ContextVar("srs_current_run", default=None)
+
+def get_current_run():
+    """
+    Returns the RunContext of the generate_srs call in progress, or None outside a run
+    """
+    return _current_run.get()
+
+def set_current_run(run):
+    """
+    Make run the current RunContext; returns a token for reset_current_run
+    """
+    return _current_run.set(run)
+
+def reset_current_run(token):
+    _current_run.reset(token)
@@ -0,0 +1,137 @@
+import time
+import asyncio
+from loguru import logger
+from .event_loop import run_sync
+
+class Stage:
+    def __init__(self, name, func, dependencies=()):
+        """
+        A unit of work in the generation graph
+        Args:
+            name(str): Unique stage name, also the key of its result
+            func(callable): Coroutine function called with a dict of {dependency name: result}
+            dependencies(iterable): Names of the stages whose results this stage reads
+        """
+        self.name = name
+        self.func = func
+        self.dependencies = tuple(dependencies)
+
+class DependencyScheduler:
+    def __init__(self, name="DependencyScheduler", verbose=True):
+        self.name = name
+        self.verbose = verbose
+        self.logger = logger
+        self.timings = {}
+
+    def validate(self, stages):
+        """
+        Check that every dependency exists and that the graph has no cycles
+        Args:
+            stages(list): List of Stage objects
+
+        Raises:
+            ValueError: On duplicate names, unknown dependencies or cycles
+        """
+        by_name = {}
+        for stage in stages:
+            if stage.name in by_name:
+                raise ValueError(f"Duplicate stage name: {stage.name}")
+            by_name[stage.name] = stage
+
+        for stage in stages:
+            for dep in stage.dependencies:
+                if dep not in by_name:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+
+        visiting, done = set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle detected at stage '{name}'")
+            visiting.add(name)
+            for dep in by_name[name].dependencies:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+
+        for stage in stages:
+            visit(stage.name)
+
+    def run(self, stages):
+        """
+        Synchronous wrapper around run_async
+        """
+        return run_sync(self.run_async(stages))
+
+    async def run_async(self, stages):
+        """
+        Run stages concurrently, starting each one as soon as its dependencies finish
+        Args:
+            stages(list): List of Stage objects
+
+        Returns:
+            dict: Stage name to stage result
+        """
+        self.validate(stages)
+        timings = {}
+        self.timings = timings
+        results = {}
+        pending = {stage.name: stage for stage in stages}
+        running = {}
+        started_at = time.perf_counter()
+
+        async def timed(stage, inputs):
+            start = time.perf_counter()
+            try:
+                return await stage.func(inputs)
+            finally:
+                end = time.perf_counter()
+                timings[stage.name] = {
+                    "start": start - started_at,
+                    "end": end - started_at,
+                    "duration": end - start
+                }
+
+        try:
+            while pending or running:
+                ready = [stage for stage in pending.values() if all(dep in results for dep in stage.dependencies)]
+                for stage in ready:
+                    del pending[stage.name]
+                    inputs = {dep: results[dep] for dep in stage.dependencies}
+                    if self.verbose:
+                        self.logger.info(f"[{self.name}] Starting stage '{stage.name}'")
+                    running[asyncio.ensure_future(timed(stage, inputs))] = stage.name
+
+                finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    stage_name = running.pop(task)
+                    try:
+                        results[stage_name] = task.result()
+                    except Exception:
+                        self.logger.error(f"[{self.name}] Stage '{stage_name}' failed, cancelling pending stages")
+                        raise
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+        self.log_timings(timings)
+        return results
+
+    def log_timings(self, timings=None):
+        """
+        Log per-stage timings, ordered by start time (defaults to the last run)
+        """
+        timings = self.timings if timings is None else timings
+        if not timings:
+            return
+        total = max(timing["end"] for timing in timings.values())
+        for stage_name, timing in sorted(timings.items(), key=lambda item: item[1]["start"]):
+            self.logger.info(
+                f"[{self.name}] {stage_name}: {timing['duration']:.2f}s "
+                f"(started +{timing['start']:.2f}s, finished +{timing['end']:.2f}s)"
+            )
+        self.logger.info(f"[{self.name}] Wall-clock total: {total:.2f}s")
@@ -0,0 +1,149 @@
+from .rag import AgentBase, is_failed_content
+from .sections import get_section
+from .budget import BudgetExceeded
+from .run_context import get_current_run
+from .section_validator import (
+    REPAIR_MARKER, find_gaps, renumber_requirements, section_issues, splice_parts, split_parts
+)
+from loguru import logger
+
+# Reply tokens allowed per missing part in a repair call
+REPAIR_TOKENS_PER_PART = 400
+
+class SectionAgent(AgentBase):
+    """
+    Writes one section of the document as its SectionSpec declares: the spec's prompts
+    over the upstream sections it reads, with its token limit, budget and model.
+    """
+    # Check each section against its spec's skeleton and request only the missing parts
+    repair_sections = False
+
+    def __init__(self, spec, max_retries=None, verbose=True, backend=None):
+        """
+        Args:
+            spec(SectionSpec|str): The section, or the key of a default section
+            max_retries(int): Attempts per call; the spec's max_retries if None
+            verbose(bool): Log prompts and replies
+            backend(LLMBackend): Backend of the agent's calls; the process-wide default if None
+        """
+        if isinstance(spec, str):
+            spec = get_section(spec)
+        self.spec = spec
+        super().__init__(
+            name=spec.agent_name, max_retries=spec.max_retries if max_retries is None else max_retries,
+            verbose=verbose, backend=backend
+        )
+        self.section_key = spec.key
+        self.dependencies = spec.dependencies
+        self.prompt_version = spec.prompt_version
+        self.context_budget = spec.context_budget
+        self.context_weights = spec.context_weights
+        self.model = spec.model
+        self.max_total_tokens = spec.max_total_tokens
+        self.logger = logger
+
+    def output_settings(self, task=None):
+        return super().output_settings(task) + [self.spec.max_tokens, self.repair_sections]
+
+    async def execute_async(self, topic, previous_contents):
+        """
+        Args:
+            topic(str): The project description
+            previous_contents(dict): Section texts the prompt reads, or {'outline': ...}
+
+        Returns:
+            dict: previous_contents with the section added under its key; a placeholder
+                if every attempt failed
+        """
+        spec = self.spec
+        user_message = f"{self.outline_instruction(previous_contents)}{spec.user_prompt}"
+        messages = self.context_messages(topic, previous_contents) + [
+            self.format_message("system", spec.system_prompt),
+            self.format_message("user", user_message)
+        ]
+
+        content = await self.generate_section_async(messages, temperature=spec.temperature, max_tokens=spec.max_tokens)
+
+        if not content:
+            self.logger.error(f"[{self.name}] Failed to generate {spec.title.lower()} content after all retries")
+            content = f"Failed to generate {spec.title.lower()} content."
+        else:
+            content = await self.complete_section_async(topic, previous_contents, content)
+
+        # Return all contents for use in next sections
+        return {**previous_contents, spec.key: content}
+
+    async def complete_section_async(self, topic, previous_contents, text):
+        """
+        With repair_sections, check a written section against its spec's skeleton.
+        Misnumbered requirement ids are renumbered locally; missing subsections, item fields
+        and requirements are requested in one small call and spliced in where they belong,
+        instead of regenerating the section. Structured sections are only checked, since
+        their text has to keep matching their structure
+        Args:
+            topic(str): The project description
+            previous_contents(dict): Section texts the section's prompt read
+            text(str): The section as written
+
+        Returns:
+            str: The section, repaired as far as the repair reply allowed
+        """
+        spec = self.spec
+        if not self.repair_sections or is_failed_content(text):
+            return text
+        if self.structured_output:
+            issues = section_issues(spec, text)
+            if issues:
+                self.logger.warning(f"[{self.name}] Structured {spec.title} is incomplete: {'; '.join(issues)}")
+            return text
+
+        renumbered = renumber_requirements(spec, text)
+        if renumbered != text:
+            self.logger.info(f"[{self.name}] Renumbered the {spec.requirement_prefix} ids of {spec.title}")
+            text = renumbered
+        gaps = find_gaps(spec, text)
+        if not gaps:
+            return text
+
+        headings = [heading for heading, _ in gaps]
+        self.logger.warning(f"[{self.name}] {spec.title} is missing {', '.join(headings)}; requesting only those parts")
+        run = get_current_run()
+        if run is not None:
+            run.section_repairs += 1
+        parts = "\n".join(
+            f"{index}. {heading}: start it with the line {REPAIR_MARKER.format(index=index)}"
+            for index, heading in enumerate(headings, start=1)
+        )
+        system_message = (
+            f"You are an expert system requirement specification document writer. The {spec.title} section "
+            "below is incomplete. Write only these missing parts, in the numbering, format and style of the "
+            "rest of the section and consistent with it:\n\n"
+            + parts +
+            "\n\nFormat Rules:\n"
+            "1. Put each marker line exactly as given, alone on its line, before its part.\n"
+            "2. Start each part with its heading in double asterisks (e.g., **1.3 Definitions**).\n"
+            "3. Do not repeat anything the section already has.\n"
+            "4. Return ONLY the parts without any conversational preamble."
+        )
+        user_message = f"Here is the {spec.title} section so far:\n{text}\n\nWrite the {len(gaps)} missing parts."
+        messages = self.context_messages(topic, previous_contents) + [
+            self.format_message("system", system_message),
+            self.format_message("user", user_message)
+        ]
+        try:
+            reply = await self.call_gemini_async(
+                messages, temperature=spec.temperature,
+                max_tokens=min(spec.max_tokens, REPAIR_TOKENS_PER_PART * len(gaps)), task="repair_section"
+            )
+        except BudgetExceeded as e:
+            self.logger.warning(f"[{self.name}] {e}; keeping {spec.title} without the missing parts")
+            return text
+
+        found = split_parts(reply, len(gaps))
+        text = splice_parts(text, gaps, found)
+        remaining = section_issues(spec, text)
+        if remaining:
+            self.logger.warning(f"[{self.name}] {spec.title} is still incomplete: {'; '.join(remaining)}")
+            if run is not None:
+                run.incomplete_sections += 1
+        return text
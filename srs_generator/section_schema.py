@@ -0,0 +1,92 @@
+import json
+
+# Gemini responseSchema (OpenAPI subset) of one SRS section
+SECTION_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "subsections": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "number": {"type": "STRING"},
+                    "title": {"type": "STRING"},
+                    "paragraphs": {"type": "ARRAY", "items": {"type": "STRING"}},
+                    "bullets": {"type": "ARRAY", "items": {"type": "STRING"}},
+                    "requirements": {
+                        "type": "ARRAY",
+                        "items": {
+                            "type": "OBJECT",
+                            "properties": {
+                                "id": {"type": "STRING"},
+                                "text": {"type": "STRING"}
+                            },
+                            "required": ["id", "text"]
+                        }
+                    }
+                },
+                "required": ["number", "title"],
+                "propertyOrdering": ["number", "title", "paragraphs", "bullets", "requirements"]
+            }
+        }
+    },
+    "required": ["subsections"]
+}
+
+STRUCTURED_INSTRUCTION = (
+    "Return the section as JSON matching the response schema: one entry per subsection with its "
+    "number (e.g. 2.1) and title, its paragraphs, its bullet points, and its numbered requirements "
+    "(id such as FR-1 and text). Use plain text in every field; do not use markdown."
+)
+
+def parse_section(reply):
+    """
+    Parse and check a structured section reply
+    Args:
+        reply(str): JSON text of the reply
+
+    Returns:
+        dict: {'subsections': [{'number', 'title', 'paragraphs', 'bullets', 'requirements'}]}
+            with every list present
+
+    Raises:
+        ValueError: If the reply is not JSON or does not follow SECTION_SCHEMA
+    """
+    data = json.loads(reply)
+    if not isinstance(data, dict) or not isinstance(data.get("subsections"), list):
+        raise ValueError("Structured section has no subsections list")
+    subsections = []
+    for entry in data["subsections"]:
+        if not isinstance(entry, dict) or not isinstance(entry.get("title"), str):
+            raise ValueError("Structured subsection without a title")
+        subsection = {
+            "number": str(entry.get("number", "")).strip(),
+            "title": entry["title"].strip(),
+            "paragraphs": [text for text in entry.get("paragraphs", []) if isinstance(text, str) and text.strip()],
+            "bullets": [text for text in entry.get("bullets", []) if isinstance(text, str) and text.strip()],
+            "requirements": []
+        }
+        for requirement in entry.get("requirements", []):
+            if not isinstance(requirement, dict) or not isinstance(requirement.get("text"), str):
+                raise ValueError("Structured requirement without text")
+            subsection["requirements"].append({"id": str(requirement.get("id", "")).strip(), "text": requirement["text"]})
+        subsections.append(subsection)
+    if not subsections:
+        raise ValueError("Structured section is empty")
+    return {"subsections": subsections}
+
+def render_markdown(structure):
+    """
+    Render a parsed section as the markdown the free-form mode produces, for prompts,
+    checkpoints and the UI
+    """
+    blocks = []
+    for subsection in structure["subsections"]:
+        blocks.append(f"**{subsection['number']} {subsection['title']}**".replace("** ", "**", 1))
+        blocks.extend(subsection["paragraphs"])
+        points = [f"- {text}" for text in subsection["bullets"]]
+        points.extend(f"- **{item['id']}**: {item['text']}" if item["id"] else f"- {item['text']}"
+                      for item in subsection["requirements"])
+        if points:
+            blocks.append("\n".join(points))
+    return "\n\n".join(blocks)
@@ -0,0 +1,191 @@
+import re
+
+# What may precede a subsection number or field name at the start of a line: markdown
+# heading marks, bold markers, bullets and quotes
+LINE_START = r"^[ \t>#*\-]*"
+# The same, also allowing the cell border opening a markdown table row
+ROW_START = r"^[ \t>#*\-|]*"
+
+REPAIR_MARKER = "=== part {index} ==="
+PART_PATTERN = re.compile(r'^\s*={3,}\s*part\s+(\d+)\s*={3,}\s*$', re.MULTILINE | re.IGNORECASE)
+
+def find_heading(text, number, title, start=0, end=None):
+    """
+    Find the line opening a subsection, by its number (not a longer one, e.g. 1.1 is not
+    1.10) or by its title
+    Returns:
+        int: Offset of the line in text, or None if text[start:end] has no such line
+    """
+    pattern = re.compile(
+        LINE_START + r"(?:" + re.escape(number) + r"(?!\d)|" + re.escape(title) + r"\b)",
+        re.MULTILINE | re.IGNORECASE
+    )
+    match = pattern.search(text, start, len(text) if end is None else end)
+    return match.start() if match else None
+
+def find_field(text, field, start=0, end=None):
+    """
+    Find the line opening a field of an item, e.g. '**6.1.5 Main Flow**' or 'Priority:'
+    Returns:
+        int: Offset of the line in text, or None if text[start:end] has no such line
+    """
+    pattern = re.compile(
+        LINE_START + r"(?:\d+(?:\.\d+)*\.?[ \t]*)?\**[ \t]*" + re.escape(field) + r"\b",
+        re.MULTILINE | re.IGNORECASE
+    )
+    match = pattern.search(text, start, len(text) if end is None else end)
+    return match.start() if match else None
+
+def find_items(spec, text):
+    """
+    The numbered items of a section made of items, e.g. the features 3.1, 3.2 ...
+    Returns:
+        list: (item number, offset of its heading line), first heading of each number, in text order
+    """
+    pattern = re.compile(LINE_START + re.escape(str(spec.number)) + r"\.(\d+)(?!\d|\.\d)", re.MULTILINE)
+    items, seen = [], set()
+    for match in pattern.finditer(text):
+        number = f"{spec.number}.{match.group(1)}"
+        if number not in seen:
+            seen.add(number)
+            items.append((number, match.start()))
+    return items
+
+def item_blocks(spec, text):
+    """
+    Returns:
+        list: (item number, start, end) of every item's text
+    """
+    items = find_items(spec, text)
+    return [
+        (number, start, items[index + 1][1] if index + 1 < len(items) else len(text))
+        for index, (number, start) in enumerate(items)
+    ]
+
+def requirement_pattern(prefix):
+    return re.compile(r"\b" + re.escape(prefix) + r"[ \t-]*(\d+(?:\.\d+)*)")
+
+def definition_pattern(prefix):
+    """
+    Requirement ids opening a line (a bullet, heading or table row), which define a
+    requirement rather than refer to one
+    """
+    return re.compile(ROW_START + r"\b" + re.escape(prefix) + r"[ \t-]*(\d+(?:\.\d+)*)", re.MULTILINE)
+
+def find_gaps(spec, text):
+    """
+    Compare a section with the skeleton its spec declares
+    Args:
+        spec(SectionSpec): The section's spec
+        text(str): Section text
+
+    Returns:
+        list: (heading of the missing part, offset in text where it belongs), in document
+            order. Empty when the section is complete, or when it has no numbered items at
+            all and only a full regeneration can help
+    """
+    gaps = []
+
+    def missing(headings, positions, end):
+        for index, heading in enumerate(headings):
+            if positions[index] is None:
+                following = [position for position in positions[index + 1:] if position is not None]
+                gaps.append((heading, following[0] if following else end))
+
+    if spec.subsections:
+        missing(
+            [f"{number} {title}" for number, title in spec.subsections],
+            [find_heading(text, number, title) for number, title in spec.subsections],
+            len(text)
+        )
+    for item, start, end in item_blocks(spec, text) if spec.item_fields or spec.requirement_prefix else ():
+        missing(
+            [f"{item} {field}" for field in spec.item_fields],
+            [find_field(text, field, start, end) for field in spec.item_fields],
+            end
+        )
+        if spec.requirement_prefix and not requirement_pattern(spec.requirement_prefix).search(text, start, end):
+            prefix = spec.requirement_prefix
+            gaps.append((f"{item} requirements numbered {prefix} {item}.1, {prefix} {item}.2, ...", end))
+    return sorted(gaps, key=lambda gap: gap[1])
+
+def section_issues(spec, text):
+    """
+    Everything structurally wrong with a section, for logs
+    Returns:
+        list: Descriptions of the missing parts and misnumbered requirements
+    """
+    issues = [f"missing {heading}" for heading, _ in find_gaps(spec, text)]
+    if (spec.item_fields or spec.requirement_prefix) and not find_items(spec, text):
+        issues.append(f"no numbered items {spec.number}.1, {spec.number}.2, ...")
+    if spec.requirement_prefix and renumber_requirements(spec, text) != text:
+        issues.append(f"{spec.requirement_prefix} ids not numbered {spec.requirement_prefix} {spec.number}.x.1, .2, ...")
+    return issues
+
+def renumber_requirements(spec, text):
+    """
+    Number the requirements of each item as the spec asks, e.g. FR 3.2.1, FR 3.2.2 ... in
+    feature 3.2. Only ids defined in the item, at the start of a line, are renumbered;
+    references to them in the item follow, and references to other items' ids are kept
+    Returns:
+        str: The text with requirement ids renumbered; text itself if they already were
+    """
+    if not spec.requirement_prefix:
+        return text
+    pattern = requirement_pattern(spec.requirement_prefix)
+    definitions = definition_pattern(spec.requirement_prefix)
+    pieces, position = [], 0
+    for item, start, end in item_blocks(spec, text):
+        block = text[start:end]
+        renumbered = {}
+        for match in definitions.finditer(block):
+            renumbered.setdefault(match.group(1), f"{item}.{len(renumbered) + 1}")
+        if all(old == new for old, new in renumbered.items()):
+            continue
+
+        def renumber(match):
+            number = renumbered.get(match.group(1))
+            return match.group(0) if number is None else f"{spec.requirement_prefix} {number}"
+
+        pieces.append(text[position:start])
+        pieces.append(pattern.sub(renumber, block))
+        position = end
+    pieces.append(text[position:])
+    return "".join(pieces)
+
+def split_parts(reply, count):
+    """
+    Split a repair reply by its part markers
+    Returns:
+        dict: Part index (1-based) -> text, for every part found with content
+    """
+    parts = {}
+    if not reply:
+        return parts
+    markers = list(PART_PATTERN.finditer(reply))
+    for index, marker in enumerate(markers):
+        number = int(marker.group(1))
+        end = markers[index + 1].start() if index + 1 < len(markers) else len(reply)
+        text = reply[marker.end():end].strip()
+        if 1 <= number <= count and text and number not in parts:
+            parts[number] = text
+    return parts
+
+def splice_parts(text, gaps, parts):
+    """
+    Insert repaired parts where they belong
+    Args:
+        text(str): Section text
+        gaps(list): find_gaps(spec, text)
+        parts(dict): Part index (1-based, in the order of gaps) -> text of the part
+
+    Returns:
+        str: The section with every part found inserted at its gap
+    """
+    for index in range(len(gaps), 0, -1):
+        if index not in parts:
+            continue
+        position = gaps[index - 1][1]
+        before, after = text[:position].rstrip(), text[position:].lstrip("\n")
+        text = f"{before}\n\n{parts[index]}\n\n{after}" if after else f"{before}\n\n{parts[index]}"
+    return text.strip()
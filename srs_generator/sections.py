@@ -0,0 +1,420 @@
+class SectionSpec:
+    def __init__(self, key, number, title, system_prompt, user_prompt, dependencies=(), max_tokens=1024,
+                 temperature=0.3, context_budget=None, context_weights=None, model=None, prompt_version=1,
+                 agent_name=None, label=None, brief=None, max_retries=2, subsections=(), item_fields=(),
+                 requirement_prefix=None, max_total_tokens=None):
+        """
+        Everything the pipeline needs to know about one section of the document
+        Args:
+            key(str): Key of the section in the contents dict, checkpoints and routes
+            number(int): Number of the section's heading in the document
+            title(str): Heading of the section in the document
+            system_prompt(str): Instructions of the section prompt
+            user_prompt(str): Request closing the section prompt
+            dependencies(tuple): Keys of the sections the prompt reads; the section is
+                generated as soon as they are written
+            max_tokens(int): Token limit of the reply
+            temperature(float): Sampling temperature
+            context_budget(int): Tokens of upstream contents the prompt may embed before
+                they are digested; None embeds them in full
+            context_weights(dict): Relevance of each upstream section for the budget
+            model(str): Model of the section's calls when no route names one; None keeps
+                the backend's model
+            prompt_version(int): Bump when the prompts change so stored sections are regenerated
+            agent_name(str): Name of the agent in logs, metrics, routes and checkpoints
+            label(str): Line introducing the section when later prompts embed it
+            brief(str): Subsections asked for when the section is requested with others
+                in one call
+            max_retries(int): Attempts per call
+            subsections(tuple): (number, title) of every subsection the section must have,
+                checked by section_validator
+            item_fields(tuple): For sections made of numbered items (e.g. features 3.1, 3.2 ...),
+                the fields every item must have
+            requirement_prefix(str): Prefix of the requirement ids every item must list,
+                numbered <item>.1, <item>.2 ..., e.g. FR 3.2.1
+            max_total_tokens(int): Reply tokens the section may reach when a reply cut off at
+                max_tokens is continued; None allows CONTINUATION_TOKEN_FACTOR times max_tokens
+        """
+        self.key = key
+        self.number = number
+        self.title = title
+        self.system_prompt = system_prompt
+        self.user_prompt = user_prompt
+        self.dependencies = tuple(dependencies)
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.context_budget = context_budget
+        self.context_weights = dict(context_weights or {})
+        self.model = model
+        self.prompt_version = prompt_version
+        self.agent_name = agent_name or "".join(word.title() for word in key.split("_")) + "Agent"
+        self.label = label or f"Here is the {title.lower()}"
+        self.brief = brief or title
+        self.max_retries = max_retries
+        self.subsections = tuple(tuple(subsection) for subsection in subsections)
+        self.item_fields = tuple(item_fields)
+        self.requirement_prefix = requirement_prefix
+        self.max_total_tokens = max_total_tokens
+
+    @property
+    def heading(self):
+        return f"{self.number}. {self.title}"
+
+    def replace(self, **changes):
+        """
+        Returns:
+            SectionSpec: A copy of the spec with the given arguments changed
+        """
+        arguments = dict(vars(self), **changes)
+        return SectionSpec(**arguments)
+
+    def __repr__(self):
+        return f"SectionSpec(key={self.key!r}, number={self.number!r}, dependencies={self.dependencies!r})"
+
+
+INTRODUCTION = SectionSpec(
+    key="introduction",
+    number=1,
+    title="Introduction",
+    system_prompt="""You are an expert system requirement specification document writer. Based on the project description provided, write a comprehensive Introduction section for the system described by the user, including in this format:
+
+**1.1** Purpose: State the purpose of the SRS document, including the intended audience.
+**1.2** Scope: Describe the system's features, objectives, and benefits.
+**1.3** Definitions, Acronyms, and Abbreviations: Define key terms, acronyms, and abbreviations used.
+**1.4** Document Conventions: Specify formatting rules and numbering schemes.
+**1.5** Intended Audience and Reading Suggestions: Specify who should read the document and in what order.
+
+Format Rules:
+1. Start directly with subsection 1.1 Purpose (do NOT include the top-level heading '1. Introduction').
+2. Return ONLY the section content without any conversational preamble.
+3. Use clear, professional language suitable for an SRS document.
+4. Don't write the main heading e.g. 1. Introduction, as it has already been added.
+""",
+    user_prompt="Generate the Introduction section for this system, starting with subsection 1.1 Purpose.",
+    max_tokens=1024,
+    prompt_version=2,
+    agent_name="IntroductionAgent",
+    label="Here is the introduction",
+    brief=(
+        "1.1 Purpose, 1.2 Scope, 1.3 Definitions, Acronyms, and Abbreviations, 1.4 Document Conventions, "
+        "1.5 Intended Audience and Reading Suggestions"
+    ),
+    max_retries=5,
+    subsections=(
+        ("1.1", "Purpose"), ("1.2", "Scope"), ("1.3", "Definitions, Acronyms, and Abbreviations"),
+        ("1.4", "Document Conventions"), ("1.5", "Intended Audience and Reading Suggestions"),
+    ),
+)
+
+OVERALL_DESCRIPTION = SectionSpec(
+    key="overall_description",
+    number=2,
+    title="Overall Description",
+    system_prompt="""You are an expert system requirement specification document writer. Based on the introduction provided, write a comprehensive overall description section that includes:
+
+**2.1 Product Perspective**: Describe the product's context, including system interfaces and dependencies.
+**2.2 Product Functions**: High-level overview of the system's major functionalities.
+**2.3 User Classes and Characteristics**: Identify the types of users (e.g., Admin, Regular User).
+**2.4 Operating Environment**: Specify hardware, software, and network requirements.
+**2.5 Design and Implementation Constraints**: Highlight limitations like technology choices or legal constraints.
+**2.6 Assumptions and Dependencies**: Assumptions that may impact requirements.
+Format Rules:
+1. Use clear, structured headings for each subsection and add double asterisks (e.g., **2.1 Product Perspective**, **2.2 Product Functions**).
+2. Return ONLY the section content without any conversational preamble (e.g., do NOT include 'Here is the Overall Description section' or similar text).
+3. Ensure content aligns with the provided introduction and project description.
+4. Use clear, professional language suitable for an SRS document.
+5. Don't write the main heading e.g. 2. Overall Description, as it has already been added.
+Keep your response consistent with the introduction provided.
+""",
+    user_prompt=(
+        "Please write the Overall Description section that aligns with this introduction:"
+        "Ive already added the main heading e.g. 2. Overall Description, so you can start with the first subsection 2.1 Product Perspective."
+    ),
+    dependencies=("introduction",),
+    max_tokens=1024,
+    prompt_version=3,
+    agent_name="OverallDescriptionAgent",
+    label="Here is the overall description",
+    brief=(
+        "2.1 Product Perspective, 2.2 Product Functions, 2.3 User Classes and Characteristics, "
+        "2.4 Operating Environment, 2.5 Design and Implementation Constraints, 2.6 Assumptions and Dependencies"
+    ),
+    subsections=(
+        ("2.1", "Product Perspective"), ("2.2", "Product Functions"), ("2.3", "User Classes and Characteristics"),
+        ("2.4", "Operating Environment"), ("2.5", "Design and Implementation Constraints"),
+        ("2.6", "Assumptions and Dependencies"),
+    ),
+)
+
+SYSTEM_FEATURES = SectionSpec(
+    key="system_features",
+    number=3,
+    title="System Features",
+    system_prompt="""You are an expert system requirement specification document writer. Based on the introduction and overall description provided, write a detailed system features section.
+
+For each major feature mentioned in the previous sections, provide:
+
+3.x Feature Name: (Meaningful name of the feature)
+Description: Detailed overview of what the feature does
+Input: Required data inputs for this feature
+Output: Expected outputs or results
+Priority: Importance level (High, Medium, Low)
+Functional Requirements: Detailed requirements numbered as **FR 3.x.1**, **FR 3.x.2**, etc.
+
+Format each feature consistently using the structure above.
+Ensure features align with the product functions mentioned in the overall description.
+Number features as **3.1**, **3.2**, etc.
+Format Rules:
+1. Use clear, structured headings for each subsection and add double asterisks (e.g., **3.1 Feature Name**, **3.2 Description**).
+2. Return ONLY the section content without any conversational preamble (e.g., do NOT include 'Here is the Overall Description section' or similar text).
+3. Ensure content aligns with the provided introduction and project description.
+4. Use clear, professional language suitable for an SRS document.
+5. Don't write the main heading e.g. 3. System Features, as it has already been added.
+""",
+    user_prompt=(
+        "Please write the System Features section that aligns with these previous sections:"
+        "Ive already added the main heading e.g. 3. System Features, so you can start with the first subsection 3.1 Feature Name."
+    ),
+    dependencies=("introduction", "overall_description"),
+    max_tokens=2000,
+    context_budget=2000,
+    context_weights={"overall_description": 2},
+    prompt_version=2,
+    agent_name="SystemFeaturesAgent",
+    label="Here are the system features",
+    brief=(
+        "3.x Feature Name for each major feature, each with Description, Input, Output, Priority and "
+        "Functional Requirements numbered **FR 3.x.1**, **FR 3.x.2**"
+    ),
+    item_fields=("Description", "Input", "Output", "Priority"),
+    requirement_prefix="FR",
+)
+
+EXTERNAL_INTERFACES = SectionSpec(
+    key="external_interfaces",
+    number=4,
+    title="External Interfaces",
+    system_prompt="""You are an expert system requirement specification document writer. Based on all previous sections provided, write a comprehensive external interface requirements section that includes:
+
+**4.1 User Interfaces**:
+**4.1.1** Detailed description of UI design and functionality
+**4.1.2** Screen layouts and user interaction flows
+**4.1.3** Response time requirements
+**4.1.4** UI standards and guidelines
+
+**4.2 Hardware Interfaces**:
+**4.2.1** Required hardware components and devices
+**4.2.2** Interface characteristics and protocols
+**4.2.3** Communication methods with hardware
+**4.2.4** Physical connectivity requirements
+
+**4.3 Software Interfaces**:
+**4.3.1** External software systems and APIs
+**4.3.2** Data formats and exchange protocols
+**4.3.3** Third-party service integrations
+**4.3.4** Communication methods and frequencies
+
+**4.4 Communication Interfaces**:
+**4.4.1** Network protocols and standards
+**4.4.2** Communication security requirements
+**4.4.3** Data format specifications
+**4.4.4** Bandwidth and timing requirements
+Format Rules:
+1. Use clear, structured headings for each subsection and add double asterisks (e.g., **4.1 User Interfaces**, **4.2 Hardware Interfaces**).
+2. Return ONLY the section content without any conversational preamble (e.g., do NOT include 'Here is the Overall Description section' or similar text).
+3. Ensure content aligns with the provided introduction and project description.
+4. Use clear, professional language suitable for an SRS document.
+5. Don't write the main heading e.g. 4. External Interface Requirements, as it has already been added.
+Ensure alignment with previously defined features and requirements.
+""",
+    user_prompt=(
+        "Please write the External Interface Requirements section that aligns with all previous sections:"
+        "Ive already added the main heading e.g. 4. External Interface Requirements, so you can start with the first subsection 4.1 User Interfaces."
+    ),
+    dependencies=("introduction", "overall_description", "system_features"),
+    max_tokens=1024,
+    context_budget=2000,
+    context_weights={"system_features": 2},
+    prompt_version=2,
+    agent_name="ExternalInterfaceAgent",
+    label="Here are the external interfaces",
+    brief=(
+        "4.1 User Interfaces, 4.2 Hardware Interfaces, 4.3 Software Interfaces, 4.4 Communication Interfaces, "
+        "each with numbered points such as **4.1.1**"
+    ),
+    subsections=(
+        ("4.1", "User Interfaces"), ("4.2", "Hardware Interfaces"), ("4.3", "Software Interfaces"),
+        ("4.4", "Communication Interfaces"),
+    ),
+)
+
+NON_FUNCTIONAL_REQUIREMENTS = SectionSpec(
+    key="non_functional_requirements",
+    number=5,
+    title="Non Functional Requirements",
+    system_prompt="""You are an expert system requirement specification document writer. Based on all previous sections provided, write a comprehensive non-functional requirements section that includes:
+
+**5.1 Performance Requirements**:
+- Speed, latency, and response time requirements.
+- Maximum concurrent users and system load capacity.
+- Data processing times and throughput.
+
+**5.2 Security Requirements**:
+- Data security and encryption standards.
+- Authentication and authorization mechanisms.
+- Protection against data breaches and cyber threats.
+- Compliance with security regulations (e.g., GDPR, CCPA).
+
+**5.3 Reliability Requirements**:
+- Uptime and availability targets (e.g., 99.9% uptime).
+- Backup and disaster recovery mechanisms.
+- Error detection and self-healing features.
+
+**5.4 Usability Requirements**:
+- User experience standards and accessibility guidelines.
+- Ease of navigation and learnability.
+- Multi-language support (if applicable).
+
+**5.5 Scalability Requirements**:
+- Support for increasing user load and data growth.
+- Horizontal and vertical scaling capabilities.
+- Performance under peak load conditions.
+
+**5.6 Maintainability Requirements**:
+- Code structure and modularity.
+- Ease of debugging and updating.
+- Automated testing and CI/CD integration.
+
+**5.7 Compliance Requirements**:
+- Legal or regulatory compliance (e.g., GDPR, ISO 27001).
+- Data retention policies and audit requirements.
+- Compliance with industry-specific standards.
+
+**5.8 Availability Requirements**:
+- System uptime and fault tolerance.
+- Offline mode functionality and data synchronization.
+- Redundancy and failover mechanisms.
+Format Rules:
+1. Use clear, structured headings for each subsection and add double asterisks (e.g., **5.1 Performance Requirements**, **5.2 Security Requirements**).
+2. Return ONLY the section content without any conversational preamble (e.g., do NOT include 'Here is the Overall Description section' or similar text).
+3. Ensure content aligns with the provided introduction and project description.
+4. Use clear, professional language suitable for an SRS document.
+5. Don't write the main heading e.g. 5. Non-functional Requirements, as it has already been added.
+Ensure alignment with previously defined features and requirements.
+""",
+    user_prompt=(
+        "Please write the Non-functional Requirements section that aligns with all previous sections:"
+        "Ive already added the main heading e.g. 5. Non-functional Requirements, so you can start with the first subsection 5.1 Performance Requirements."
+    ),
+    dependencies=("introduction", "overall_description", "system_features"),
+    max_tokens=2000,
+    context_budget=2000,
+    context_weights={"system_features": 2},
+    prompt_version=2,
+    agent_name="NonFunctionalRequirementsAgent",
+    label="Here are the non-functional requirements",
+    brief=(
+        "5.1 Performance, 5.2 Security, 5.3 Reliability, 5.4 Usability, 5.5 Scalability, "
+        "5.6 Maintainability, 5.7 Compliance, 5.8 Availability Requirements, each with bulleted measurable requirements"
+    ),
+    subsections=(
+        ("5.1", "Performance Requirements"), ("5.2", "Security Requirements"), ("5.3", "Reliability Requirements"),
+        ("5.4", "Usability Requirements"), ("5.5", "Scalability Requirements"),
+        ("5.6", "Maintainability Requirements"), ("5.7", "Compliance Requirements"),
+        ("5.8", "Availability Requirements"),
+    ),
+)
+
+USE_CASES = SectionSpec(
+    key="use_cases",
+    number=6,
+    title="Use Cases",
+    system_prompt="""You are an expert system requirement specification document writer. Based on all previous sections provided, write a comprehensive Use Cases section that includes:
+- Detailed scenarios for each primary feature or interaction.
+- Include the following for each use case:
+
+**6.1 Use Case Name** (e.g., Real-Time Monitoring)
+**6.1.1 Actors**: Users or systems interacting with the feature.
+**6.1.2 Description**: Detailed scenario of the use case.
+**6.1.3 Preconditions**: Conditions that must be met before the use case.
+**6.1.4 Postconditions**: Expected state after the use case is executed.
+**6.1.5 Main Flow**: Primary sequence of steps.
+**6.1.6 Alternate Flows**: Variations or exceptions in the flow.
+Format Rules:
+1. Use clear, structured headings for each subsection and add double asterisks (e.g., **6.1 Use Case Name**, **6.1.1 Actors**).
+2. Return ONLY the section content without any conversational preamble (e.g., do NOT include 'Here is the Overall Description section' or similar text).
+3. Ensure content aligns with the provided introduction and project description.
+4. Use clear, professional language suitable for an SRS document.
+5. Don't write the main heading e.g. 6. Use Cases, as it has already been added.
+
+Ensure alignment with previously defined features and requirements.""",
+    user_prompt=(
+        "Please write the Use Cases section that aligns with all previous sections:"
+        "Ive already added the main heading e.g. 6. Use Cases, so you can start with the first subsection 6.1 Use Case Name."
+    ),
+    dependencies=(
+        "introduction", "overall_description", "system_features", "external_interfaces", "non_functional_requirements"
+    ),
+    max_tokens=2000,
+    context_budget=2500,
+    context_weights={"system_features": 3, "external_interfaces": 2},
+    prompt_version=2,
+    agent_name="UseCasesAgent",
+    label="Here are the use cases",
+    brief=(
+        "6.x Use Case Name for each primary interaction, each with Actors, Description, Preconditions, "
+        "Postconditions, Main Flow and Alternate Flows numbered **6.x.1** to **6.x.6**"
+    ),
+    item_fields=("Actors", "Description", "Preconditions", "Postconditions", "Main Flow", "Alternate Flows"),
+)
+
+# The sections of an SRS, in document order. Pass a different list to SRSAgentManager to
+# add, drop or rewire sections; each is generated as soon as its dependencies are written
+SECTIONS = (
+    INTRODUCTION,
+    OVERALL_DESCRIPTION,
+    SYSTEM_FEATURES,
+    EXTERNAL_INTERFACES,
+    NON_FUNCTIONAL_REQUIREMENTS,
+    USE_CASES,
+)
+
+OUTLINE_LABEL = "Here is the project outline"
+
+def get_section(key, sections=SECTIONS):
+    """
+    Returns:
+        SectionSpec: The spec of the section key
+
+    Raises:
+        KeyError: If no section has the key
+    """
+    for spec in sections:
+        if spec.key == key:
+            return spec
+    raise KeyError(f"No section {key!r}")
+
+def content_labels(sections=SECTIONS):
+    """
+    How upstream contents are introduced in prompts, in document order
+    Returns:
+        dict: 'outline' and every section key -> label
+    """
+    return {"outline": OUTLINE_LABEL, **{spec.key: spec.label for spec in sections}}
+
+def validate_sections(sections):
+    """
+    Check a registry before it is used
+    Args:
+        sections(list): SectionSpecs in document order
+
+    Raises:
+        ValueError: If keys repeat or a section reads a section that is not registered
+    """
+    keys = [spec.key for spec in sections]
+    for spec in sections:
+        if keys.count(spec.key) > 1:
+            raise ValueError(f"Section {spec.key!r} is registered more than once")
+        unknown = [key for key in spec.dependencies if key not in keys]
+        if unknown:
+            raise ValueError(f"Section {spec.key!r} reads unregistered sections: {', '.join(unknown)}")
@@ -0,0 +1,67 @@
+import asyncio
+import threading
+import concurrent.futures
+
+class _Abandoned(Exception):
+    """The leading call ended without a result its followers can use"""
+
+class SingleFlight:
+    def __init__(self):
+        """
+        Collapses concurrent identical calls into one. The outstanding call is tracked
+        with a concurrent.futures.Future, so followers may run on any thread or event loop
+        (Streamlit sessions, batch jobs, the background loop of the sync wrappers).
+        """
+        self.name = "SingleFlight"
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    async def do(self, key, call):
+        """
+        Run call() unless an identical call is already in flight, in which case wait for its result
+        Args:
+            key(str): Identity of the call
+            call(callable): Returns the coroutine to run when this caller leads
+
+        Returns:
+            tuple: (result, shared) where shared is True if another caller's result was reused
+
+        If the leading call raises or is cancelled (e.g. its run ran out of budget), its
+        followers do not inherit that outcome; one of them runs the call itself instead.
+        """
+        while True:
+            with self._lock:
+                future = self._inflight.get(key)
+                leader = future is None
+                if leader:
+                    future = concurrent.futures.Future()
+                    # Running futures cannot be cancelled by a follower giving up
+                    future.set_running_or_notify_cancel()
+                    self._inflight[key] = future
+
+            if not leader:
+                try:
+                    return await asyncio.wrap_future(future), True
+                except _Abandoned:
+                    continue
+
+            try:
+                result = await call()
+            except BaseException:
+                future.set_exception(_Abandoned())
+                raise
+            else:
+                future.set_result(result)
+                return result, False
+            finally:
+                with self._lock:
+                    if self._inflight.get(key) is future:
+                        del self._inflight[key]
+
+_single_flight = SingleFlight()
+
+def get_single_flight():
+    """
+    Returns the process-wide single-flight group used for Gemini requests
+    """
+    return _single_flight
@@ -1,15 +1,28 @@
 import subprocess
 import os
+import asyncio
 from .rag import AgentBase
+from .sections import SECTIONS
+from .event_loop import run_sync
+from .budget import BudgetExceeded, RunCancelled
+from .run_context import get_current_run
 from docx.shared import Inches
 from loguru import logger
 import re
-from dotenv import load_dotenv
 
 class SystemModelsAgent(AgentBase):
-    def __init__(self, max_retries=5, verbose=True):  # Increased retries for robustness
-        super().__init__(name="SystemModelsAgent", max_retries=max_retries, verbose=verbose)
-        load_dotenv()
+    # Diagrams are drawn from every section of the document
+    dependencies = tuple(spec.key for spec in SECTIONS)
+    # Bump when the diagram prompts change so stored diagrams are regenerated
+    prompt_version = 2
+    context_budget = 2000
+    context_weights = {"use_cases": 3, "system_features": 2}
+    # Fresh generations when the code cannot be extracted or fails validation;
+    # transport retries happen inside call_gemini_async
+    max_regenerations = 2
+
+    def __init__(self, max_retries=5, verbose=True, backend=None):  # Increased retries for robustness
+        super().__init__(name="SystemModelsAgent", max_retries=max_retries, verbose=verbose, backend=backend)
         self.logger = logger
         self.diagram_types = {
             "ActivityDiagram": """Generate a detailed PlantUML Activity Diagram that shows the complete flow of actions for these use cases and with no errors.
@@ -115,9 +128,12 @@ class SystemModelsAgent(AgentBase):
                              User "1" *-- "*" Order: places
                              @enduml"""
         }
-        self.diagrams = {}
 
     def validate_diagram_code(self, code, diagram_type):
+        """Synchronous wrapper around validate_diagram_code_async"""
+        return run_sync(self.validate_diagram_code_async(code, diagram_type))
+
+    async def validate_diagram_code_async(self, code, diagram_type):
         """Validate the generated PlantUML code using Gemini"""
         if not code:
             self.logger.error(f"[{self.name}] No PlantUML code provided for {diagram_type}")
@@ -142,14 +158,17 @@ class SystemModelsAgent(AgentBase):
             self.format_message("user", "Please validate the provided PlantUML code.")
         ]
 
-        for attempt in range(self.max_retries):
-            validation_result = self.call_gemini(messages, temperature=0.3, max_tokens=500)
-            if validation_result and 'VALID' in validation_result.upper():
-                self.logger.info(f"[{self.name}] {diagram_type} code validated successfully")
-                return True
-            self.logger.warning(f"[{self.name}] Validation attempt {attempt + 1} failed: {validation_result or 'No response'}")
-        
-        self.logger.error(f"[{self.name}] Validation failed for {diagram_type} after {self.max_retries} attempts")
+        # Not cached: a cached 'INVALID' would reject the same code in every later run, and
+        # code that passes is cached as a diagram instead, so it is not validated again
+        validation_result = await self.call_gemini_async(
+            messages, temperature=0.3, max_tokens=500, use_cache=False, task="validate_diagram"
+        )
+        # 'INVALID' contains 'VALID', so only the leading verdict counts
+        if validation_result and validation_result.strip().upper().startswith('VALID'):
+            self.logger.info(f"[{self.name}] {diagram_type} code validated successfully")
+            return True
+
+        self.logger.warning(f"[{self.name}] Validation failed for {diagram_type}: {validation_result or 'No response'}")
         return False
 
     def extract_plantuml(self, text):
@@ -168,32 +187,49 @@ class SystemModelsAgent(AgentBase):
         code = '\n'.join(line.strip() for line in code.split('\n'))
         return code
 
+    def has_inputs(self, previous_contents):
+        """
+        Returns:
+            bool: True if previous_contents hold the outline or any of the sections the
+                diagrams are drawn from (the agent's dependencies, set from the registry)
+        """
+        return any(previous_contents.get(key) for key in ("outline",) + tuple(self.dependencies))
+
     def generate_diagram_code(self, diagram_type, topic, previous_contents):
+        """Synchronous wrapper around generate_diagram_code_async"""
+        return run_sync(self.generate_diagram_code_async(diagram_type, topic, previous_contents))
+
+    async def generate_diagram_code_async(self, diagram_type, topic, previous_contents):
         """Generate PlantUML code using Gemini with improved prompting"""
-        if 'use_cases' not in previous_contents:
-            self.logger.error(f"[{self.name}] No use cases found in previous contents")
+        if not self.has_inputs(previous_contents):
+            self.logger.error(
+                f"[{self.name}] No outline or section to draw diagrams from ({', '.join(self.dependencies)}) "
+                f"found in previous contents"
+            )
             return None
 
         system_message = self.diagram_types.get(diagram_type, "")
         user_message = (
-            f"Here is the project description:\n{topic}\n\n"
-            f"Here is the introduction:\n{previous_contents['introduction']}\n\n"
-            f"Here is the overall description:\n{previous_contents['overall_description']}\n\n"
-            f"Here are the system features:\n{previous_contents['system_features']}\n\n"
-            f"Here are the external interfaces:\n{previous_contents['external_interfaces']}\n\n"
-            f"Here are the non-functional requirements:\n{previous_contents['non_functional_requirements']}\n\n"
-            f"Here are the use cases:\n{previous_contents['use_cases']}\n\n"
+            f"{self.outline_instruction(previous_contents)}"
             f"Generate ONLY the PlantUML code for a {diagram_type}, ensuring all elements are properly connected, with clear labels, and no explanations."
         )
 
-        messages = [
+        messages = self.context_messages(topic, previous_contents) + [
             self.format_message("system", system_message),
             self.format_message("user", user_message)
         ]
 
-        for attempt in range(self.max_retries):
+        # Only code that passed validation is cached, so a cached reply needs no validator call
+        cached = await self.cached_reply_async(messages, temperature=0.3, max_tokens=2000, task="diagram")
+        plantuml_code = self.extract_plantuml(cached) if cached else None
+        if plantuml_code:
+            return plantuml_code
+
+        for attempt in range(self.max_regenerations):
             try:
-                response = self.call_gemini(messages, temperature=0.3, max_tokens=2000)
+                response = await self.call_gemini_async(
+                    messages, temperature=0.3, max_tokens=2000, use_cache=False, task="diagram"
+                )
                 if not response:
                     self.logger.error(f"[{self.name}] No response from Gemini API for {diagram_type} in attempt {attempt + 1}")
                     continue
@@ -203,18 +239,21 @@ class SystemModelsAgent(AgentBase):
                     self.logger.error(f"[{self.name}] Failed to extract PlantUML code for {diagram_type} in attempt {attempt + 1}")
                     continue
                 
-                if self.validate_diagram_code(plantuml_code, diagram_type):
+                if await self.validate_diagram_code_async(plantuml_code, diagram_type):
                     self.logger.info(f"[{self.name}] Successfully generated valid PlantUML code for {diagram_type}")
+                    await self.cache_reply_async(messages, 0.3, 2000, response, task="diagram")
                     return plantuml_code
                 
                 self.logger.warning(f"[{self.name}] Attempt {attempt + 1}: Generated code failed validation for {diagram_type}")
+            except (BudgetExceeded, RunCancelled):
+                raise
             except Exception as e:
                 self.logger.error(f"[{self.name}] Error in attempt {attempt + 1} for {diagram_type}: {str(e)}")
         
-        self.logger.error(f"[{self.name}] Failed to generate valid PlantUML code for {diagram_type} after {self.max_retries} attempts")
+        self.logger.error(f"[{self.name}] Failed to generate valid PlantUML code for {diagram_type} after {self.max_regenerations} attempts")
         return None
 
-    def create_diagram(self, name, plantuml_code):
+    def create_diagram(self, name, plantuml_code, output_dir="diagrams"):
         """Generate PNG from PlantUML code with robust error handling"""
         if not plantuml_code:
             self.logger.error(f"[{self.name}] No PlantUML code provided for {name}")
@@ -222,13 +261,13 @@ class SystemModelsAgent(AgentBase):
             
         try:
             # Create diagrams directory if it doesn't exist
-            os.makedirs("diagrams", exist_ok=True)
+            os.makedirs(output_dir, exist_ok=True)
             
             # Clean and normalize the PlantUML code
             plantuml_code = self._normalize_plantuml_code(plantuml_code)
             
             # Save PUML file with proper newlines and encoding
-            puml_file = os.path.join("diagrams", f"{name}.puml")
+            puml_file = os.path.join(output_dir, f"{name}.puml")
             with open(puml_file, "w", encoding='utf-8', newline='\n') as f:
                 f.write(plantuml_code)
                 
@@ -299,13 +338,13 @@ class SystemModelsAgent(AgentBase):
                     fixed_code = self._fix_common_plantuml_issues(plantuml_code)
                     if fixed_code != plantuml_code:
                         self.logger.info(f"[{self.name}] Attempting with fixed PlantUML code")
-                        return self.create_diagram(name, fixed_code)
+                        return self.create_diagram(name, fixed_code, output_dir)
                 elif result.returncode != 0:
                     self.logger.error(f"[{self.name}] PlantUML execution failed with code: {result.returncode}")
                     return None
                     
                 # Verify PNG was generated
-                png_path = os.path.join("diagrams", f"{name}.png")
+                png_path = os.path.join(output_dir, f"{name}.png")
                 if os.path.exists(png_path):
                     self.logger.info(f"[{self.name}] Successfully generated {name} image at {png_path}")
                     return png_path
@@ -379,18 +418,57 @@ class SystemModelsAgent(AgentBase):
             
         return fixed_code
     
-    def add_diagrams_to_doc(self, doc, topic, previous_contents):
-        """Generate diagrams and add them to Word document without duplication"""
+    def generate_diagram(self, diagram_type, topic, previous_contents, output_dir="diagrams", diagrams=None):
+        """Synchronous wrapper around generate_diagram_async"""
+        return run_sync(self.generate_diagram_async(diagram_type, topic, previous_contents, output_dir, diagrams))
+
+    async def generate_diagram_async(self, diagram_type, topic, previous_contents, output_dir="diagrams", diagrams=None):
+        """
+        Generate the PlantUML code and PNG image for a single diagram type
+        Args:
+            diagram_type(str): One of the keys of self.diagram_types
+            topic(str): The project description
+            previous_contents(dict): The generated SRS sections
+            output_dir(str): Directory for the .puml and .png files
+            diagrams(dict): Receives the PlantUML code under diagram_type
+
+        Returns:
+            str: Path of the generated PNG, or None if generation failed
+        """
+        plantuml_code = await self.generate_diagram_code_async(diagram_type, topic, previous_contents)
+        if not plantuml_code:
+            self.logger.warning(f"[{self.name}] Failed to generate PlantUML code for {diagram_type}")
+            return None
+        if diagrams is not None:
+            diagrams[diagram_type] = plantuml_code
+        return await self.render_diagram_async(diagram_type, plantuml_code, output_dir)
+
+    async def render_diagram_async(self, diagram_type, plantuml_code, output_dir="diagrams"):
+        """
+        Render already generated PlantUML code to a PNG image off the event loop
+        Returns:
+            str: Path of the generated PNG, or None if rendering failed
+        """
+        png_path = await asyncio.to_thread(self.create_diagram, diagram_type, plantuml_code, output_dir)
+        if not png_path:
+            self.logger.warning(f"[{self.name}] Failed to create diagram image for {diagram_type}")
+        return png_path
+
+    def add_diagrams_to_doc(self, doc, topic, previous_contents, png_paths=None):
+        """Generate diagrams and add them to Word document without duplication.
+        Diagram types present in png_paths are taken from there instead of being generated again."""
+        # The diagrams follow the last section of the registry
+        number = max((spec.number for spec in self.sections), default=0) + 1
         # Check if section already exists
         section_exists = False
         for paragraph in doc.paragraphs:
-            if paragraph.text == "7. System Models and Diagrams":
+            if paragraph.text == f"{number}. System Models and Diagrams":
                 section_exists = True
                 break
         
         if not section_exists:
             # Add new section if it doesn't exist
-            doc.add_heading("7. System Models and Diagrams", level=1)
+            doc.add_heading(f"{number}. System Models and Diagrams", level=1)
             doc.add_paragraph("This section presents the system models using various UML diagrams to visualize different aspects of the system.")
         else:
             # If section exists, add spacing
@@ -401,7 +479,7 @@ class SystemModelsAgent(AgentBase):
             # Check if this diagram type already exists
             diagram_exists = False
             for paragraph in doc.paragraphs:
-                if paragraph.text == f"7.{index} {diagram_type}":
+                if paragraph.text == f"{number}.{index} {diagram_type}":
                     diagram_exists = True
                     break
             
@@ -409,51 +487,62 @@ class SystemModelsAgent(AgentBase):
                 self.logger.info(f"[{self.name}] {diagram_type} already exists in document, skipping...")
                 continue
                 
-            # Generate PlantUML code using LLM
-            plantuml_code = self.generate_diagram_code(diagram_type, topic, previous_contents)
-            if not plantuml_code:
-                self.logger.warning(f"[{self.name}] Failed to generate PlantUML code for {diagram_type}, skipping...")
-                doc.add_heading(f"7.{index} {diagram_type}", level=2)
-                doc.add_paragraph(f"Failed to generate {diagram_type} image.")
-                continue
-                
-            # Store generated code
-            self.diagrams[diagram_type] = plantuml_code
-                
-            # Create diagram
-            png_path = self.create_diagram(diagram_type, plantuml_code)
+            if png_paths is not None and diagram_type in png_paths:
+                png_path = png_paths[diagram_type]
+            else:
+                png_path = self.generate_diagram(diagram_type, topic, previous_contents)
             if not png_path:
-                self.logger.warning(f"[{self.name}] Failed to create diagram image for {diagram_type}, adding placeholder...")
-                doc.add_heading(f"7.{index} {diagram_type}", level=2)
+                self.logger.warning(f"[{self.name}] No diagram image for {diagram_type}, adding placeholder...")
+                doc.add_heading(f"{number}.{index} {diagram_type}", level=2)
                 doc.add_paragraph(f"Failed to generate {diagram_type} image.")
                 continue
                 
             # Add to document
-            doc.add_heading(f"7.{index} {diagram_type}", level=2)
+            doc.add_heading(f"{number}.{index} {diagram_type}", level=2)
             doc.add_picture(png_path, width=Inches(6))
             doc.add_paragraph()  # Add spacing
 
-    def execute(self, topic, previous_contents, file_name):
+    def write_diagrams(self, topic, previous_contents, file_name, png_paths=None):
+        """Add the diagrams section to the document on disk and save it"""
+        # Load existing document
+        from docx import Document
+        doc = Document(file_name) if os.path.exists(file_name) else Document()
+
+        # Generate and add diagrams
+        self.add_diagrams_to_doc(doc, topic, previous_contents, png_paths)
+
+        # Save document
+        doc.save(file_name)
+
+    async def execute_async(self, topic, previous_contents, file_name, png_paths=None, output_dir="diagrams"):
         """Main execution method required by AgentBase"""
-        if 'use_cases' not in previous_contents:
-            self.logger.error(f"[{self.name}] No use cases found in previous contents")
+        if not self.has_inputs(previous_contents):
+            self.logger.error(
+                f"[{self.name}] No section to draw diagrams from ({', '.join(self.dependencies)}) found in previous contents"
+            )
             return previous_contents
 
         try:
-            # Load existing document
-            from docx import Document
-            doc = Document(file_name) if os.path.exists(file_name) else Document()
-            
-            # Generate and add diagrams
-            self.add_diagrams_to_doc(doc, topic, previous_contents)
-            
-            # Save document
-            doc.save(file_name)
-            
+            # Code of the diagrams the run already has, plus those generated here. It is kept
+            # per run, since concurrent runs share the agent
+            run = get_current_run()
+            diagrams = dict(run.diagrams) if run is not None else {}
+            # Generate missing diagrams concurrently
+            png_paths = dict(png_paths or {})
+            missing = [diagram_type for diagram_type in self.diagram_types if diagram_type not in png_paths]
+            generated = await asyncio.gather(*(
+                self.generate_diagram_async(diagram_type, topic, previous_contents, output_dir, diagrams)
+                for diagram_type in missing
+            ))
+            png_paths.update(zip(missing, generated))
+
+            # Write them into the document off the event loop
+            await asyncio.to_thread(self.write_diagrams, topic, previous_contents, file_name, png_paths)
+
             # Add generated diagrams to previous contents
-            previous_contents['system_models'] = self.diagrams
+            previous_contents['system_models'] = diagrams
             
         except Exception as e:
             self.logger.error(f"[{self.name}] Error in execute: {str(e)}")
             
-        return previous_contents
\ No newline at end of file
+        return previous_contents
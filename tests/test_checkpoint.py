@@ -0,0 +1,30 @@
+import os
+from srs_generator.checkpoint import Checkpoint, prune_checkpoints
+
+def make_checkpoint(root, run_id, written_at, completed):
+    checkpoint = Checkpoint(str(root), run_id)
+    checkpoint.save_section("introduction", "text", "fingerprint")
+    checkpoint.set_completed(completed)
+    os.utime(checkpoint.state_file, (written_at, written_at))
+
+def test_prune_keeps_the_newest_completed_checkpoints(tmp_path):
+    for index in range(4):
+        make_checkpoint(tmp_path, f"run{index}", 1000 + index, True)
+    assert sorted(prune_checkpoints(str(tmp_path), 2)) == ["run0", "run1"]
+    assert sorted(os.listdir(tmp_path)) == ["run2", "run3"]
+
+def test_prune_keeps_incomplete_and_current_checkpoints(tmp_path):
+    make_checkpoint(tmp_path, "failed", 1000, False)
+    make_checkpoint(tmp_path, "current", 1001, True)
+    make_checkpoint(tmp_path, "old", 1002, True)
+    make_checkpoint(tmp_path, "new", 1003, True)
+    os.makedirs(tmp_path / "unknown")
+    assert prune_checkpoints(str(tmp_path), 1, current="current") == ["old"]
+    assert sorted(os.listdir(tmp_path)) == ["current", "failed", "new", "unknown"]
+
+def test_a_new_run_clears_the_completed_mark(tmp_path):
+    make_checkpoint(tmp_path, "run", 1000, True)
+    Checkpoint(str(tmp_path), "run").set_completed(False)
+    assert prune_checkpoints(str(tmp_path), 0) == []
+    Checkpoint(str(tmp_path), "missing").set_completed(False)
+    assert not os.path.exists(tmp_path / "missing")
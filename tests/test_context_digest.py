@@ -0,0 +1,56 @@
+from srs_generator.context_digest import (
+    BULLET, HEADING, LEAD_SENTENCE, NAMED, allocate_budget, classify_line, digest_contents, digest_section,
+    estimate_tokens, first_clause
+)
+
+SECTION = "\n".join([
+    "## 3.1 Login",
+    "Users sign in with their email. The form also offers a reset link for forgotten passwords.",
+    "It checks the password against the stored hash before creating a session.",
+    "",
+    "- FR-1: The system shall lock an account after five failed attempts. Admins may unlock it.",
+    "- Sessions expire after thirty minutes of inactivity.",
+] * 10)
+
+def test_first_clause():
+    assert first_clause("One sentence. Another one.") == "One sentence."
+    assert first_clause("No stop at all") == "No stop at all"
+    assert first_clause("x" * 200, limit=10) == "x" * 10 + "..."
+
+def test_classify_line():
+    assert classify_line("## 3.1 Login", True) == (HEADING, "## 3.1 Login")
+    assert classify_line("See FR-2 for details. More.", False) == (NAMED, "See FR-2 for details.")
+    assert classify_line("- Plain bullet. More.", False) == (BULLET, "- Plain bullet.")
+    assert classify_line("Lead sentence. More.", True) == (LEAD_SENTENCE, "Lead sentence.")
+    assert classify_line("Continuation of a paragraph.", False) is None
+    assert classify_line("   ", True) is None
+
+def test_digest_section_keeps_short_text():
+    assert digest_section("short", 100) == "short"
+
+def test_digest_section_keeps_the_higher_tiers_in_order():
+    digest = digest_section(SECTION, 150)
+    assert estimate_tokens(digest) <= 150
+    lines = digest.splitlines()
+    # Every heading fits; requirement lines fill the rest, cut to their first sentence
+    assert lines.count("## 3.1 Login") == 10
+    assert "- FR-1: The system shall lock an account after five failed attempts." in lines
+    assert "Admins may unlock it" not in digest
+    assert "It checks the password" not in digest
+    # Kept lines stay in document order
+    assert lines[:4] == ["## 3.1 Login", lines[1], "## 3.1 Login", lines[1]]
+
+def test_allocate_budget_gives_back_unused_shares():
+    shares = allocate_budget({"small": 10, "large": 1000}, {}, 200)
+    assert shares == {"small": 10, "large": 190}
+
+def test_allocate_budget_by_weight():
+    shares = allocate_budget({"a": 1000, "b": 1000}, {"a": 3}, 400)
+    assert shares == {"a": 300, "b": 100}
+
+def test_digest_contents():
+    contents = {"introduction": SECTION, "scope": "short"}
+    assert digest_contents(contents, None) == contents
+    digested = digest_contents(contents, 200)
+    assert digested["scope"] == "short"
+    assert estimate_tokens(digested["introduction"]) <= 200 - estimate_tokens("short")
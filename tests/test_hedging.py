@@ -0,0 +1,33 @@
+import asyncio
+from srs_generator.hedging import HedgePolicy, hedged
+
+def test_new_keys_use_the_latencies_of_all_keys():
+    policy = HedgePolicy(percentile=90, min_samples=10)
+    assert policy.delay_for("intro") is None
+    for latency in range(1, 11):
+        policy.record("intro", latency / 10)
+    assert policy.delay_for("intro") == 1.0
+    assert policy.delay_for("use_cases") == 1.0
+    for _ in range(10):
+        policy.record("use_cases", 3.0)
+    assert policy.delay_for("use_cases") == 3.0
+
+def test_allowance_starts_at_the_burst_and_is_earned_per_request():
+    policy = HedgePolicy(max_ratio=0.5, burst=2)
+    assert policy.try_hedge() and policy.try_hedge()
+    assert not policy.try_hedge()
+    policy.on_request()
+    policy.on_request()
+    assert policy.try_hedge()
+    assert policy.stats()["hedges"] == 3
+
+def test_slow_request_is_hedged():
+    policy = HedgePolicy(min_samples=1, min_delay=0.01)
+    policy.record("key", 0.01)
+    replies = iter([asyncio.sleep(1, result="slow"), asyncio.sleep(0, result="hedge")])
+
+    async def main():
+        return await hedged(policy, "key", lambda: next(replies))
+
+    assert asyncio.run(main()) == ("hedge", True)
+    assert policy.stats() == {"requests": 1, "hedges": 1, "hedge_wins": 1}
@@ -0,0 +1,27 @@
+from srs_generator.llm_backend import GeminiBackend, render_contents, render_prompt
+
+MESSAGES = [
+    {"role": "system", "content": "Write the introduction."},
+    {"role": "user", "content": "Project: a habit tracker."},
+]
+
+def test_single_turn_prompt():
+    assert render_contents(MESSAGES) == [{"role": "user", "parts": [{"text": render_prompt(MESSAGES)}]}]
+
+def test_partial_reply_is_a_model_turn():
+    continuation = MESSAGES + [
+        {"role": "assistant", "content": "1.1 Purpose\nThe system"},
+        {"role": "user", "content": "Continue."},
+    ]
+    assert render_contents(continuation) == [
+        {"role": "user", "parts": [{"text": render_prompt(MESSAGES)}]},
+        {"role": "model", "parts": [{"text": "1.1 Purpose\nThe system"}]},
+        {"role": "user", "parts": [{"text": "User: Continue.\n\n"}]},
+    ]
+
+def test_build_request_skips_cached_messages():
+    backend = GeminiBackend("gemini-2.0-flash", base_url="http://localhost", api_key="key")
+    _, _, payload, prompt = backend.build_request(MESSAGES, cached_content=("cachedContents/1", 1))
+    assert payload["cachedContent"] == "cachedContents/1"
+    assert payload["contents"] == render_contents(MESSAGES[1:])
+    assert prompt == render_prompt(MESSAGES[1:])
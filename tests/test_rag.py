@@ -0,0 +1,21 @@
+from srs_generator.rag import join_continuation
+
+def test_join_continuation_drops_the_repeated_overlap():
+    partial = "The system shall store every reading with its timestamp and the sensor"
+    continuation = "with its timestamp and the sensor id, and keep it for a year."
+    assert join_continuation(partial, continuation) == (
+        "The system shall store every reading with its timestamp and the sensor id, and keep it for a year."
+    )
+
+def test_join_continuation_keeps_short_overlaps():
+    # A repeat under 20 characters is more likely a common word than a restart
+    assert join_continuation("Users sign in with the", "the password.") == "Users sign in with thethe password."
+
+def test_join_continuation_without_overlap():
+    assert join_continuation("First half, ", "second half.") == "First half, second half."
+    assert join_continuation("", "whole reply") == "whole reply"
+    assert join_continuation("whole reply", "") == "whole reply"
+
+def test_join_continuation_limits_the_overlap_searched():
+    repeated = "x" * 300
+    assert join_continuation(repeated, repeated) == "x" * 400
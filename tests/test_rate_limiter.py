@@ -0,0 +1,55 @@
+import time
+import pytest
+from srs_generator.rate_limiter import RateLimiter, TokenBucket, parse_retry_after
+
+def test_token_bucket_refills_at_its_rate():
+    bucket = TokenBucket(60)
+    bucket.available = 0.0
+    bucket.refill(bucket.updated_at + 2, 1.0)
+    assert bucket.available == pytest.approx(2.0)
+    # A reduced rate refills proportionally slower
+    bucket.refill(bucket.updated_at + 2, 0.5)
+    assert bucket.available == pytest.approx(3.0)
+
+def test_token_bucket_refill_is_capped_at_capacity():
+    bucket = TokenBucket(60)
+    bucket.available = 59.0
+    bucket.refill(bucket.updated_at + 600, 1.0)
+    assert bucket.available == 60.0
+
+def test_token_bucket_wait_time():
+    bucket = TokenBucket(60)
+    bucket.available = 1.0
+    assert bucket.wait_time(1, 1.0) == 0.0
+    assert bucket.wait_time(3, 1.0) == pytest.approx(2.0)
+    assert bucket.wait_time(3, 0.5) == pytest.approx(4.0)
+
+def test_try_acquire_and_release():
+    limiter = RateLimiter(requests_per_minute=2, tokens_per_minute=1000)
+    assert limiter.try_acquire(400)
+    assert limiter.try_acquire(400)
+    # Out of requests, then out of tokens once a request is given back
+    assert not limiter.try_acquire(100)
+    limiter.release(400)
+    assert not limiter.try_acquire(700)
+    assert limiter.try_acquire(500)
+
+def test_release_is_capped_at_capacity():
+    limiter = RateLimiter(requests_per_minute=2, tokens_per_minute=1000)
+    limiter.release(5000)
+    assert limiter.requests.available == 2
+    assert limiter.tokens.available == 1000
+
+def test_rate_limited_halves_the_rate_and_blocks():
+    limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=1000)
+    assert limiter.on_rate_limited({"retry-after": "5"}) == 5.0
+    assert limiter.rate_factor == 0.5
+    assert not limiter.try_acquire()
+    assert limiter.blocked_until == pytest.approx(time.monotonic() + 5, abs=0.5)
+
+def test_parse_retry_after():
+    assert parse_retry_after({"retry-after": "12"}) == 12.0
+    assert parse_retry_after({"retry-after": "-3"}) == 0.0
+    assert parse_retry_after(body='{"retryDelay": "37s"}') == 37.0
+    assert parse_retry_after({"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"}) == 0.0
+    assert parse_retry_after({}, "") is None
@@ -0,0 +1,104 @@
+from srs_generator.section_validator import (
+    REPAIR_MARKER, find_gaps, find_heading, renumber_requirements, section_issues, split_parts, splice_parts
+)
+from srs_generator.sections import INTRODUCTION, SYSTEM_FEATURES
+
+COMPLETE_INTRODUCTION = "\n\n".join(
+    f"**{number} {title}**\nText of {number}." for number, title in INTRODUCTION.subsections
+)
+
+def feature(number, requirements=("FR 1", "FR 2")):
+    fields = "\n".join(f"**{number}.{index} {field}**: text" for index, field in enumerate(SYSTEM_FEATURES.item_fields, 1))
+    ids = "\n".join(f"- **{requirement}**: The system shall work." for requirement in requirements)
+    return f"**{number} Feature**\n{fields}\n{ids}"
+
+def introduction_without(*numbers):
+    return "\n\n".join(
+        f"**{number} {title}**\nText of {number}."
+        for number, title in INTRODUCTION.subsections if number not in numbers
+    )
+
+def test_find_heading_does_not_match_a_longer_number():
+    text = "**1.10 Other**\n**1.1 Purpose**"
+    assert find_heading(text, "1.1", "Nothing") == text.index("**1.1 ")
+    assert find_heading("**1.10 Other**", "1.1", "Nothing") is None
+
+def test_find_gaps_complete_section():
+    assert find_gaps(INTRODUCTION, COMPLETE_INTRODUCTION) == []
+    assert section_issues(INTRODUCTION, COMPLETE_INTRODUCTION) == []
+
+def test_find_gaps_point_at_the_following_heading_or_the_end():
+    text = introduction_without("1.3", "1.5")
+    assert find_gaps(INTRODUCTION, text) == [
+        ("1.3 Definitions, Acronyms, and Abbreviations", text.index("**1.4")),
+        ("1.5 Intended Audience and Reading Suggestions", len(text)),
+    ]
+
+def test_find_gaps_in_items():
+    text = feature("3.1") + "\n\n" + feature("3.2", requirements=())
+    text = text.replace("**3.1.3 Output**: text\n", "")
+    gaps = find_gaps(SYSTEM_FEATURES, text)
+    assert [heading for heading, _ in gaps] == [
+        "3.1 Output", "3.2 requirements numbered FR 3.2.1, FR 3.2.2, ...",
+    ]
+    assert gaps[0][1] == text.index("**3.1.4 Priority")
+    assert gaps[1][1] == len(text)
+
+def test_splice_parts_inserts_every_part_at_its_gap():
+    text = introduction_without("1.1", "1.3", "1.5")
+    gaps = find_gaps(INTRODUCTION, text)
+    parts = {1: "**1.1 Purpose**\nNew.", 2: "**1.3 Definitions**\nNew.", 3: "**1.5 Intended Audience**\nNew."}
+    spliced = splice_parts(text, gaps, parts)
+    order = [spliced.index(f"**{number} ") for number, _ in INTRODUCTION.subsections]
+    assert order == sorted(order)
+    assert find_gaps(INTRODUCTION, spliced) == []
+
+def test_splice_parts_skips_missing_parts():
+    text = introduction_without("1.2", "1.4")
+    gaps = find_gaps(INTRODUCTION, text)
+    spliced = splice_parts(text, gaps, {2: "**1.4 Document Conventions**\nNew."})
+    assert [heading for heading, _ in find_gaps(INTRODUCTION, spliced)] == ["1.2 Scope"]
+    assert spliced.index("**1.3") < spliced.index("**1.4") < spliced.index("**1.5")
+
+def test_split_parts():
+    reply = "\n".join([
+        "preamble",
+        REPAIR_MARKER.format(index=2), "second",
+        "=== PART 1 ===", "first",
+        REPAIR_MARKER.format(index=3), "  ",
+        REPAIR_MARKER.format(index=4), "out of range",
+        REPAIR_MARKER.format(index=1), "repeated",
+    ])
+    assert split_parts(reply, 3) == {1: "first", 2: "second"}
+    assert split_parts("", 3) == {}
+    assert split_parts("no markers", 3) == {}
+
+def test_renumber_requirements_per_item():
+    text = feature("3.1", ("FR 1", "FR 7")) + "\n\n" + feature("3.2", ("FR-1", "FR 3.9"))
+    renumbered = renumber_requirements(SYSTEM_FEATURES, text)
+    assert "FR 3.1.1" in renumbered and "FR 3.1.2" in renumbered
+    assert "FR 3.2.1" in renumbered and "FR 3.2.2" in renumbered
+    assert "FR 7" not in renumbered and "FR 3.9" not in renumbered
+    assert renumber_requirements(SYSTEM_FEATURES, renumbered) == renumbered
+
+def test_renumber_requirements_keeps_references_consistent():
+    text = feature("3.1", ("FR 4", "FR 5")) + "\nSee FR 4."
+    renumbered = renumber_requirements(SYSTEM_FEATURES, text)
+    assert renumbered.endswith("See FR 3.1.1.")
+
+def test_renumber_requirements_leaves_numbered_text_alone():
+    text = feature("3.1", ("FR 3.1.1", "FR 3.1.2"))
+    assert renumber_requirements(SYSTEM_FEATURES, text) is text
+    assert renumber_requirements(INTRODUCTION, COMPLETE_INTRODUCTION) is COMPLETE_INTRODUCTION
+
+def test_renumber_requirements_keeps_references_to_other_features():
+    text = feature("3.1", ("FR 3.1.1", "FR 3.1.2")) + "\n\n" + feature("3.2", ("FR 1", "FR 2")) + "\nSee FR 3.1.1 and FR 2."
+    renumbered = renumber_requirements(SYSTEM_FEATURES, text)
+    assert renumbered.endswith("See FR 3.1.1 and FR 3.2.2.")
+    assert "- **FR 3.2.1**" in renumbered
+
+def test_renumber_requirements_in_table_rows():
+    text = feature("3.1", ()) + "\n| FR-4 | The system shall work. |\n| FR-9 | Depends on FR-4. |"
+    renumbered = renumber_requirements(SYSTEM_FEATURES, text)
+    assert "| FR 3.1.1 |" in renumbered
+    assert "| FR 3.1.2 | Depends on FR 3.1.1. |" in renumbered
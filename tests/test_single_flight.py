@@ -0,0 +1,70 @@
+import asyncio
+import pytest
+from srs_generator.single_flight import SingleFlight
+
+def test_concurrent_calls_share_one_result():
+    group = SingleFlight()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "reply"
+
+    async def main():
+        return await asyncio.gather(*(group.do("key", call) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert sorted(results) == [("reply", False)] + [("reply", True)] * 4
+
+def test_different_keys_do_not_share():
+    group = SingleFlight()
+
+    async def main():
+        return await asyncio.gather(
+            group.do("a", lambda: asyncio.sleep(0.01, result="a")),
+            group.do("b", lambda: asyncio.sleep(0.01, result="b")),
+        )
+
+    assert asyncio.run(main()) == [("a", False), ("b", False)]
+
+def test_followers_retry_when_the_leader_fails():
+    group = SingleFlight()
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        await asyncio.sleep(0.05)
+        if len(attempts) == 1:
+            raise RuntimeError("leader failed")
+        return "reply"
+
+    async def main():
+        return await asyncio.gather(*(group.do("key", call) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert isinstance(results[0], RuntimeError)
+    # One follower leads the retry and the other shares its result
+    assert sorted(results[1:]) == [("reply", False), ("reply", True)]
+    assert len(attempts) == 2
+
+def test_finished_calls_are_not_reused():
+    group = SingleFlight()
+    results = iter(["first", "second"])
+
+    async def call():
+        return next(results)
+
+    assert asyncio.run(group.do("key", call)) == ("first", False)
+    assert asyncio.run(group.do("key", call)) == ("second", False)
+
+def test_leader_exception_propagates():
+    group = SingleFlight()
+
+    async def call():
+        raise ValueError("bad")
+
+    with pytest.raises(ValueError):
+        asyncio.run(group.do("key", call))
+    assert group._inflight == {}